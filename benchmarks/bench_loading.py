@@ -0,0 +1,158 @@
+"""
+Benchmark of loading large instance files: the single-pass columnar loaders (src/loader.py) against the loaders
+they replaced (kept below as they were).
+
+For every number of jobs we write a random txt and json file and report the load time and the peak memory
+(measured by tracemalloc) of
+- legacy: the old loaders, the txt file is read into a list and every line split twice, the json file goes through json.load
+- columns: src.loader, only the columns (no Job objects)
+- schedule: load_jobs_from_input_file, now built on src.loader (txt: columns, then the Jobs; json: the Jobs as they are parsed)
+
+Run with:
+```
+uv run python -m benchmarks.bench_loading --sizes=10000,100000,300000
+```
+"""
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from fire import Fire
+
+from src.job import Job
+from src.loader import load_columns
+from src.penalty_function import PenaltyFunction
+from src.schedule import Schedule
+from src.utility import load_jobs_from_input_file
+
+
+def legacy_load_txt(file_path) -> Schedule:
+    with open(file_path, 'r') as f:
+        lines = [line.strip() for line in f if line.strip() != ""]
+
+    num_jobs = int(lines[0])
+    offset = 1
+    if len(lines[1].split(',')) < 2:
+        num_jobs = int(lines[1])
+        offset = 2
+
+    jobs = []
+
+    min_release_time = float('inf')
+    for i in range(num_jobs):
+        job_data = lines[i + offset].split(',')
+        release_time, deadline, processing_time, reward, drop_penalty = job_data
+        min_release_time = min(min_release_time, int(release_time))
+
+    for i in range(num_jobs):
+        job_data = lines[i + offset].split(',')
+        release_time, deadline, processing_time, reward, drop_penalty = job_data
+        penalty_function = PenaltyFunction(
+            function_type="linear",
+            parameters={
+                "slope": int(reward)+int(drop_penalty),
+                "intercept": int(reward)+int(drop_penalty)
+            }
+        )
+        jobs.append(Job(
+            id=i,
+            release_time=int(release_time) - min_release_time,
+            deadline=int(deadline),
+            processing_time=int(processing_time),
+            reward=int(reward),
+            drop_penalty=int(drop_penalty),
+            penalty_function=penalty_function
+        ))
+
+    return Schedule(jobs=jobs, total_time_slots=max(job.deadline for job in jobs))
+
+
+def legacy_load_json(file_path) -> Schedule:
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+
+    jobs = []
+    for job_data in data["jobs"]:
+        pf_data = job_data["penalty_function"]
+        jobs.append(Job(
+            id=job_data["id"],
+            release_time=job_data["release_time"],
+            processing_time=job_data["processing_time"],
+            deadline=job_data["deadline"],
+            reward=job_data["reward"],
+            drop_penalty=job_data["drop_penalty"],
+            penalty_function=PenaltyFunction(pf_data["function_type"], pf_data["parameters"])
+        ))
+    return Schedule(jobs=jobs, total_time_slots=max(job.deadline for job in jobs))
+
+
+def write_random_files(directory: str, num_jobs: int, seed: int = 0):
+    '''A txt and a json file with the same num_jobs random jobs (linear penalty functions in the json file).'''
+    rng = random.Random(seed)
+    num_time_slots = 4 * num_jobs
+    rows = []
+    for i in range(num_jobs):
+        release_time = 0 if i == 0 else rng.randint(0, num_time_slots - 10)
+        rows.append((release_time, release_time + rng.randint(1, 10), rng.randint(1, 5), rng.randint(1, 50), rng.randint(0, 30)))
+
+    txt_path = os.path.join(directory, f"n{num_jobs}.txt")
+    with open(txt_path, 'w') as f:
+        f.write(f"{num_jobs}\n")
+        for release_time, deadline, processing_time, reward, drop_penalty in rows:
+            f.write(f"{release_time + 1}, {deadline}, {min(processing_time, deadline - release_time)}, {reward}, {drop_penalty}\n")
+
+    json_path = os.path.join(directory, f"n{num_jobs}.json")
+    with open(json_path, 'w') as f:
+        json.dump({
+            "total_time_slots": num_time_slots,
+            "jobs": [
+                {
+                    "id": f"job{i}", "release_time": release_time, "processing_time": min(processing_time, deadline - release_time),
+                    "deadline": deadline, "reward": reward, "drop_penalty": drop_penalty,
+                    "penalty_function": {"function_type": "linear", "parameters": {"slope": rng.randint(1, 10), "intercept": rng.randint(0, reward)}}
+                }
+                for i, (release_time, deadline, processing_time, reward, drop_penalty) in enumerate(rows)
+            ]
+        }, f, indent=4)
+    return txt_path, json_path
+
+
+def measure(load, path: str):
+    '''Load time (without tracing) and peak traced memory of load(path).'''
+    start = time.perf_counter()
+    result = load(path)
+    elapsed = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = load(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main(sizes: str = "10000,100000,300000"):
+    sizes = sizes if isinstance(sizes, (tuple, list)) else [int(size) for size in str(sizes).split(',')]
+    print(f"{'n':>8} {'format':>6} {'MB':>7} | {'legacy [s]':>10} {'peak [MB]':>10} | {'columns [s]':>11} {'peak [MB]':>10} | {'schedule [s]':>12} {'peak [MB]':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for num_jobs in sizes:
+            txt_path, json_path = write_random_files(directory, int(num_jobs))
+            for path, legacy in [(txt_path, legacy_load_txt), (json_path, legacy_load_json)]:
+                legacy_time, legacy_peak, legacy_schedule = measure(legacy, path)
+                columns_time, columns_peak, _ = measure(load_columns, path)
+                schedule_time, schedule_peak, schedule = measure(load_jobs_from_input_file, path)
+                # the same instance either way
+                assert schedule.T == legacy_schedule.T and schedule.score() == legacy_schedule.score()
+                assert all(vars(job).keys() == vars(other).keys() and all(
+                    value == vars(other)[key] for key, value in vars(job).items() if key != "penalty_function"
+                ) for job, other in zip(schedule.jobs, legacy_schedule.jobs))
+                print(f"{num_jobs:>8} {path.rsplit('.', 1)[1]:>6} {os.path.getsize(path) / 2**20:>7.1f} | "
+                      f"{legacy_time:>10.3f} {legacy_peak / 2**20:>10.1f} | {columns_time:>11.3f} {columns_peak / 2**20:>10.1f} | "
+                      f"{schedule_time:>12.3f} {schedule_peak / 2**20:>10.1f}")
+                del legacy_schedule, schedule
+
+
+if __name__ == "__main__":
+    Fire(main)
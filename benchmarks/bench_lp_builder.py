@@ -0,0 +1,73 @@
+"""
+Benchmark for building the LP relaxation used as upper bound in our offline algorithm.
+
+For growing numbers of jobs (n) and time slots (T) we report the time to build the sparse model,
+the peak memory (measured by tracemalloc) and the number of non-zeros.
+For reference we also print how much memory the dense list-of-lists matrices would have needed
+(one 8 byte pointer per entry, ignoring the integer objects themselves).
+
+Run with:
+```
+uv run python -m benchmarks.bench_lp_builder
+```
+"""
+import random
+import time
+import tracemalloc
+
+from fire import Fire
+
+from src.job import Job
+from src.penalty_function import PenaltyFunction
+from src.schedule import Schedule
+from src.algorithms.our.get_upper_bound_by_LP import build_LP_linear
+
+
+def random_schedule(num_jobs: int, num_time_slots: int, seed: int = 0) -> Schedule:
+    '''Random instance in the style of the txt input files (linear push-back functions).'''
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(num_jobs):
+        release_time = rng.randint(0, num_time_slots - 2)
+        deadline = rng.randint(release_time + 1, num_time_slots)
+        reward = rng.randint(1, 100)
+        drop_penalty = rng.randint(0, 100)
+        jobs.append(Job(
+            id=i,
+            release_time=release_time,
+            processing_time=rng.randint(1, max(1, (deadline - release_time))),
+            deadline=deadline,
+            reward=reward,
+            drop_penalty=drop_penalty,
+            penalty_function=PenaltyFunction("linear", {"slope": reward + drop_penalty, "intercept": reward + drop_penalty})
+        ))
+    # make sure the horizon is exactly num_time_slots
+    jobs[0].deadline = num_time_slots
+    return Schedule(jobs, num_time_slots)
+
+
+def main(sizes: str = "10x50,20x100,40x200,80x400", repeat: int = 3):
+    print(f"{'n':>5} {'T':>6} {'vars':>8} {'rows':>8} {'nnz':>9} {'build [s]':>10} {'peak [MB]':>10} {'dense [MB]':>11}")
+    for size in sizes.split(','):
+        num_jobs, num_time_slots = (int(value) for value in size.split('x'))
+        schedule = random_schedule(num_jobs, num_time_slots)
+
+        build_times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            build_LP_linear(schedule)
+            build_times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        c, A_ub, b_ub, A_eq, b_eq, bounds = build_LP_linear(schedule)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        num_rows = A_ub.shape[0] + A_eq.shape[0]
+        dense_bytes = num_rows * len(c) * 8
+        print(f"{num_jobs:>5} {num_time_slots:>6} {len(c):>8} {num_rows:>8} {A_ub.nnz + A_eq.nnz:>9} "
+              f"{min(build_times):>10.4f} {peak / 2**20:>10.2f} {dense_bytes / 2**20:>11.1f}")
+
+
+if __name__ == "__main__":
+    Fire(main)
@@ -0,0 +1,65 @@
+"""
+Benchmark for the parallel branch and bound of our offline algorithm.
+
+Every instance is solved once with the serial search and then with the parallel tree search for every number of workers.
+We report the wall time, the speedup over the serial search and check that the score is the same.
+The instances are the test files (tests/Job-*.txt) and a few random instances.
+
+Note that every parallel run pays for starting the worker processes (a few seconds), so the speedup only shows
+on instances where the serial search takes longer than that, and only on a machine with enough cores.
+
+Run with:
+```
+uv run python -m benchmarks.bench_parallel_search --workers=1,2,4 --deterministic=False
+```
+"""
+import glob
+import time
+
+from fire import Fire
+
+from src.schedule import Schedule
+from src.utility import load_jobs_from_input_file
+from src.algorithms.ours_offline import OurOffline
+from benchmarks.bench_lp_builder import random_schedule
+
+from typing import Callable, List, Tuple
+
+
+def instances(files: str, random_sizes: str) -> List[Tuple[str, Callable[[], Schedule]]]:
+    '''(name, loader) pairs, every run gets a fresh schedule.'''
+    result = [(path, lambda path=path: load_jobs_from_input_file(path)) for path in sorted(glob.glob(files))]
+    for size in (random_sizes if isinstance(random_sizes, (tuple, list)) else random_sizes.split(',') if random_sizes else []):
+        num_jobs, num_time_slots = (int(value) for value in size.split('x'))
+        result.append((f"random {size}", lambda num_jobs=num_jobs, num_time_slots=num_time_slots: random_schedule(num_jobs, num_time_slots)))
+    return result
+
+
+def main(
+        files: str = "tests/Job-[3-7].txt",
+        random_sizes: str = "6x12,8x14",
+        workers: str = "1,2,4",
+        deterministic: bool = False,
+        max_expansions_per_task: int = 200
+    ):
+    # Fire turns "1,2,4" into a tuple
+    worker_counts = [int(value) for value in (workers if isinstance(workers, (tuple, list)) else str(workers).split(','))]
+    print(f"{'instance':<22} {'workers':>8} {'time [s]':>10} {'speedup':>8} {'score':>10}")
+    for name, load in instances(files, random_sizes):
+        serial_time = None
+        serial_score = None
+        for num_workers in worker_counts:
+            solver = OurOffline(workers=num_workers, parallel="tree", deterministic=deterministic, max_expansions_per_task=max_expansions_per_task)
+            start = time.perf_counter()
+            result = solver.schedule(load())
+            elapsed = time.perf_counter() - start
+
+            score = result.score() if result is not None else None
+            if serial_time is None:
+                serial_time, serial_score = elapsed, score
+            assert score == serial_score, f"{name}: {num_workers} workers found {score}, but the serial search found {serial_score}"
+            print(f"{name:<22} {num_workers:>8} {elapsed:>10.2f} {serial_time / elapsed:>8.2f} {score:>10}")
+
+
+if __name__ == "__main__":
+    Fire(main)
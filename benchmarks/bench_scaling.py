@@ -0,0 +1,129 @@
+"""
+Scaling benchmark of the offline and online engines on seeded random instances (test_instances.generate_instance).
+
+Sweeps the grid of all given sizes (n x T), load factors, window tightnesses, penalty types, engines and seeds.
+Every case runs in a fresh process (so the peak RSS is its own) and becomes one row of the CSV:
+wall time, score, search status, expanded nodes, nodes per second, share of the time spent in the LP (offline only)
+and peak RSS. Two CSVs of different versions can be compared with `compare`.
+
+Run with:
+```
+uv run python -m benchmarks.bench_scaling run --sizes=10x40,20x80 --load_factors=0.8,1.5 --tightness=0.3,0.8 --penalties=linear,per-timeslot --seeds=2 --out=scaling.csv
+uv run python -m benchmarks.bench_scaling compare old.csv scaling.csv
+```
+"""
+import csv
+import itertools
+import math
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fire import Fire
+
+from src.algorithms.ours_offline import OurOffline
+from src.algorithms.ours_online import OurOnline
+from src.algorithms.our.parallel import process_context
+from test_instances import generate_instance
+
+from typing import Dict, List, Optional
+
+
+# the parameters of a case, together they identify a row when comparing two CSVs
+KEY = ["engine", "num_jobs", "num_time_slots", "load_factor", "window_tightness", "penalty", "seed"]
+COLUMNS = KEY + ["score", "status", "wall_time", "expanded", "nodes_per_second", "lp_time_share", "peak_rss_mb"]
+
+
+def _values(value, cast) -> list:
+    '''Fire turns "1,2" into a tuple and "1" into an int.'''
+    values = value if isinstance(value, (tuple, list)) else str(value).split(',')
+    return [cast(item) for item in values]
+
+
+def run_case(case: dict) -> dict:
+    '''Generate the instance of a case, solve it and measure (meant to run in its own process).'''
+    schedule = generate_instance(
+        case["num_jobs"], case["num_time_slots"], case["load_factor"], case["window_tightness"], case["penalty"], case["seed"]
+    )
+    row = dict(case)
+    start = time.perf_counter()
+    if case["engine"] == "offline":
+        solver = OurOffline(time_limit=case["time_limit"], progress=False)
+        result = solver.schedule(schedule)
+        wall_time = time.perf_counter() - start
+        stats = solver.stats
+        row.update({
+            "status": stats.status,
+            "expanded": stats.expanded,
+            "nodes_per_second": stats.expanded / wall_time if wall_time > 0 else None,
+            "lp_time_share": stats.lp_time / wall_time if stats.lp_time is not None and wall_time > 0 else None,
+        })
+    else:
+        result = OurOnline().schedule(schedule)
+        wall_time = time.perf_counter() - start
+        row["status"] = "done"
+    row["score"] = result.score()
+    row["wall_time"] = wall_time
+    # ru_maxrss is in KiB on Linux
+    row["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return row
+
+
+def run(
+        sizes: str = "10x40,20x80",
+        load_factors: str = "0.8,1.5",
+        tightness: str = "0.3,0.8",
+        penalties: str = "linear,per-timeslot",
+        engines: str = "offline,online",
+        seeds: int = 1,
+        time_limit: float = 60.0,
+        out: str = "scaling.csv"
+    ):
+    cases = []
+    for size, load_factor, window_tightness, penalty, engine, seed in itertools.product(
+        _values(sizes, str), _values(load_factors, float), _values(tightness, float),
+        _values(penalties, str), _values(engines, str), range(seeds)
+    ):
+        num_jobs, num_time_slots = (int(value) for value in size.split('x'))
+        cases.append({
+            "engine": engine, "num_jobs": num_jobs, "num_time_slots": num_time_slots, "load_factor": load_factor,
+            "window_tightness": window_tightness, "penalty": penalty, "seed": seed, "time_limit": time_limit,
+        })
+
+    # a fresh process per case: max_tasks_per_child=1
+    with ProcessPoolExecutor(max_workers=1, mp_context=process_context(), max_tasks_per_child=1) as pool, \
+            open(out, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for k, row in enumerate(pool.map(run_case, cases)):
+            writer.writerow(row)
+            f.flush()
+            print(f"[{k + 1}/{len(cases)}] " + ", ".join(f"{column}={row.get(column)}" for column in COLUMNS), file=sys.stderr)
+    print(f"Wrote {len(cases)} rows to {out}")
+
+
+def _read(path: str) -> Dict[tuple, dict]:
+    with open(path, newline='') as f:
+        return {tuple(row[column] for column in KEY): row for row in csv.DictReader(f)}
+
+
+def compare(old: str, new: str):
+    '''Wall time ratio (new / old) and score difference of every case in both CSVs, and the geometric mean speedup.'''
+    old_rows, new_rows = _read(old), _read(new)
+    ratios: List[float] = []
+    print(f"{'case':<60} {'old [s]':>9} {'new [s]':>9} {'new/old':>8} {'score diff':>10}")
+    for key in sorted(set(old_rows) & set(new_rows)):
+        old_time, new_time = float(old_rows[key]["wall_time"]), float(new_rows[key]["wall_time"])
+        ratio: Optional[float] = new_time / old_time if old_time > 0 else None
+        if ratio is not None and ratio > 0:
+            ratios.append(ratio)
+        score_diff = float(new_rows[key]["score"]) - float(old_rows[key]["score"])
+        ratio_text = f"{ratio:>8.2f}" if ratio is not None else f"{'-':>8}"
+        print(f"{' '.join(key):<60} {old_time:>9.3f} {new_time:>9.3f} {ratio_text} {score_diff:>10.2f}")
+    if len(ratios) > 0:
+        print(f"geometric mean speedup (old / new): {1 / math.exp(sum(math.log(ratio) for ratio in ratios) / len(ratios)):0.2f}")
+
+
+if __name__ == "__main__":
+    Fire({"run": run, "compare": compare})
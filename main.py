@@ -7,26 +7,71 @@ from src.job import Job
 # from test_instances import generate_random_instance
 # from src.bruteforce import bruteforce_schedule, schedule_counter
 from fire import Fire
-from src.utility import load_jobs_from_input_file, display_schedule, load_solution
+from src.utility import load_jobs_from_input_file, display_schedule, load_solution, read_arrivals
+from src.algorithms.ours_online import OurOnline
 from src.scheduler import Scheduler
 from typing import Optional
 from src.schedule import Schedule
+from src.solutions import score_solutions
+from src.service import serve as serve_decisions, load_test
+from src.batch import find_instances, run_batch
+from src.profiling import run_profiled
+import asyncio
+import sys
 
-def main(file: str, name: str = 'ours', setting: str = 'offline', solution: Optional[str] = None, output_path: Optional[str] = None):
+def anytime_options(name: str, setting: str, time_limit=None, node_limit=None, gap_tolerance=None) -> dict:
+    '''The limits of the anytime mode that were given, as solver options. Only our offline algorithm supports them.'''
+    limits = {"time_limit": time_limit, "node_limit": node_limit, "gap_tolerance": gap_tolerance}
+    options = {key: value for key, value in limits.items() if value is not None}
+    if len(options) > 0 and (name, setting) != ("ours", "offline"):
+        raise ValueError(f"The anytime limits ({', '.join(options)}) are only supported by ours offline, not by {name} {setting}")
+    return options
+
+
+def main(
+        file: str,
+        name: str = 'ours',
+        setting: str = 'offline',
+        solution: Optional[str] = None,
+        output_path: Optional[str] = None,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        gap_tolerance: Optional[float] = None,
+        stats_json: Optional[str] = None,
+        progress: bool = True,
+        profile: Optional[str] = None,
+        profile_out: Optional[str] = None
+    ):
     # runtime : compare between bruteforce and infomads
     # online: existing work vs infomads
     # offline: bruteforce vs infomads
 
     # schedule = load_jobs_from_input_file("input.json")
     # schedule = load_jobs_from_input_file("input.txt")
+    # before loading the instance, so that a wrong combination fails right away
+    options = anytime_options(name, setting, time_limit, node_limit, gap_tolerance)
     schedule: Schedule = load_jobs_from_input_file(file)
 
     if solution is not None:
         schedule = load_solution(solution, schedule)
     else:
         # print(schedule)
-        scheduler = Scheduler(name, setting)
-        schedule = scheduler.schedule(schedule)
+        # anytime mode of the offline algorithm: return the best schedule found within the limits
+        if not progress and (name, setting) == ("ours", "offline"):
+            # --noprogress: no progress bar of the search (the other engines have none)
+            options["progress"] = False
+        scheduler = Scheduler(name, setting, **options)
+        if profile is not None:
+            # --profile=cprofile|sample|tracemalloc: only the solve is profiled, by the phases of the solver
+            schedule, summary = run_profiled(lambda: scheduler.schedule(schedule), profile, profile_out)
+            print(summary, file=sys.stderr)
+        else:
+            schedule = scheduler.schedule(schedule)
+        if scheduler.stats is not None:
+            print(scheduler.stats.report())
+            # counters, timings of the hot paths and the incumbent timeline of the search
+            if stats_json is not None:
+                scheduler.stats.to_json(stats_json)
     
     if output_path is not None:
         schedule.export(output_path)
@@ -36,6 +81,147 @@ def main(file: str, name: str = 'ours', setting: str = 'offline', solution: Opti
 
     
 
+def score(
+        file: str,
+        solutions: str,
+        workers: int = 1,
+        out: Optional[str] = None,
+        chunk_size: int = 1000
+    ):
+    '''
+    Validate and score many solutions of one instance:
+    `solutions` is a directory of txt solutions, a glob, a .jsonl file or "-" (JSONL on stdin).
+    Writes one JSON line per solution (to `out` or stdout) and a summary to stderr.
+    '''
+    schedule: Schedule = load_jobs_from_input_file(file)
+    output = sys.stdout if out is None else open(out, 'w')
+    num_solutions, num_invalid, num_mismatches = 0, 0, 0
+    try:
+        for report in score_solutions(schedule, solutions, workers=workers, chunk_size=chunk_size):
+            num_solutions += 1
+            num_invalid += not report.valid
+            num_mismatches += report.declared_score is not None and abs(report.declared_score - report.score) > 1e-6
+            output.write(json.dumps(report.to_dict()) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"{num_solutions} solutions: {num_invalid} invalid, {num_mismatches} with a different declared score", file=sys.stderr)
+
+
+def online(
+        arrivals: str = "-",
+        out: Optional[str] = None,
+        idle: bool = False,
+        drain: bool = True
+    ):
+    '''
+    Run the online algorithm on a stream of job arrivals (a file or "-" for stdin, see read_arrivals) and write every
+    decision as soon as it is made, one JSON line {"t": ..., "job": ...} per time slot (idle time slots only with --idle).
+    With --drain (the default) the remaining jobs are scheduled after the input ends.
+    '''
+    stream = sys.stdin if arrivals == "-" else open(arrivals, 'r')
+    output = sys.stdout if out is None else open(out, 'w')
+    decisions = OurOnline().stream()
+    next(decisions)
+    # next time slot to decide, jobs that arrived for a time slot that was already decided,
+    # and the last release time seen (nothing is left after it once the machine is idle)
+    t, pending, last_release = 0, [], -1
+
+    def decide(new_jobs) -> Optional[str]:
+        job_id = decisions.send((t, new_jobs))
+        if job_id is not None or idle:
+            output.write(json.dumps({"t": t, "job": job_id}) + '\n')
+            output.flush()
+        return job_id
+
+    try:
+        for arrival_time, new_jobs in read_arrivals(stream):
+            last_release = max([last_release, arrival_time] + [job.release_time for job in new_jobs])
+            pending.extend(new_jobs)
+            if arrival_time < t:
+                # the time slot is already decided, the jobs are added with the next one
+                continue
+            # the time slots in between have no arrivals
+            while t <= arrival_time:
+                decide(pending)
+                pending = []
+                t += 1
+        while drain:
+            job_id = decide(pending)
+            pending = []
+            t += 1
+            if job_id is None and t > last_release:
+                break
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+def serve(unix: Optional[str] = None, host: str = "127.0.0.1", port: int = 8765):
+    '''
+    Run the online algorithm as a decision service on a Unix socket (--unix=path) or on host:port,
+    see DecisionService in src/service.py for the protocol.
+    '''
+    print(f"Serving decisions on {unix if unix is not None else f'{host}:{port}'}", file=sys.stderr)
+    try:
+        asyncio.run(serve_decisions(unix, host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+def loadtest(
+        unix: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        clients: int = 8,
+        requests: int = 10000,
+        submit_every: int = 2,
+        seed: int = 0
+    ):
+    '''Load test a running decision service and print the client side latency and throughput as JSON.'''
+    result = asyncio.run(load_test(unix, host, port, clients, requests, submit_every, seed))
+    print(json.dumps(result, indent=2))
+
+
+def batch(
+        instances: str,
+        name: str = 'ours',
+        setting: str = 'offline',
+        workers: int = 1,
+        out: Optional[str] = None,
+        timeout: Optional[float] = None,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        gap_tolerance: Optional[float] = None
+    ):
+    '''
+    Solve every instance of a directory or glob in worker processes and write one JSON line per instance
+    (to `out` or stdout) as soon as it is done: score, time slots per job, wall time, expanded nodes and status.
+    `timeout` (seconds) kills an instance that takes longer, the limits are passed on to the solver (anytime mode,
+    ours offline only). A summary goes to stderr.
+    '''
+    options = anytime_options(name, setting, time_limit, node_limit, gap_tolerance)
+    output = sys.stdout if out is None else open(out, 'w')
+    counts = {}
+    try:
+        for result in run_batch(find_instances(instances), name, setting, options, workers=workers, timeout=timeout):
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"{sum(counts.values())} instances: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())), file=sys.stderr)
+
+
+# subcommands, `main.py <input> ...` without a subcommand schedules the input
+COMMANDS = {"score": score, "online": online, "serve": serve, "loadtest": loadtest, "batch": batch}
+
 
 if __name__ == "__main__":
-    Fire(main)
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        Fire(COMMANDS[sys.argv[1]], command=sys.argv[2:], name=f"main.py {sys.argv[1]}")
+    else:
+        Fire(main)
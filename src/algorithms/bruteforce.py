@@ -1,167 +1,145 @@
-# given jobs, find the optimal scheduling using brute-force search
-import copy
-from job import Job
-from operator import add
-from collections.abc import Iterable, Iterator, Sequence
-from typing import TypeVar
-
-
-T = TypeVar("T")
-
-
-def nth(n: int, it: Iterable[Sequence[T]]) -> Iterator[T]:
-    for tup in it:
-        yield tup[n]
-
-def two_th(it: Iterable[Sequence[T]]) -> Iterator[T]:
-    for tup in it:
-        yield tup[1]
-
-# a = [(1, 2), (3, 4)]
-# for item in nth(1, a):
-#     print(item)
-# for item in two_th(a):
-#     print(item)
-
-def schedule_counter(job_id, schedule_so_far):
-    count = 0
-    for schedule_slice in schedule_so_far:
-        time_slot = schedule_slice[0]
-        scheduled_job_id = schedule_slice[1]
-        if scheduled_job_id == job_id:
-            count += 1
-    return count
-
-class IDCounter:
-    def __init__(self):
-        self.current_id = 0
-    def get_next_id(self):
-        id_to_return = self.current_id
-        self.current_id += 1
-        return id_to_return
-
-
-def bruteforce_schedule(current_time_slot, job_instances, total_time_slots, reward_so_far, schedule_so_far):
+# given jobs, find the optimal scheduling by dynamic programming over the states of a partial schedule
+from src.algorithms.base import BaseOfflineSolver
+from src.schedule import Schedule
+from src.algorithms.our.search_node import SearchTree
+
+from collections import OrderedDict
+
+from typing import Dict, List, Optional, Tuple
+
+
+class BruteForceOffline(BaseOfflineSolver):
     '''
-    psedocode ~~as if we were writing a recursive function~~ We use DFS so the maximum stack depth is total_time_slots, there is no point in implementing fake stack here:
-    1. get all available jobs at this time slot, if no available jobs at this time slot and this time slot < total time slots, this time slot ++, append an idle time slot to optimal schedule, repeat
-    2. if available jobs exist and this time slot < total time slots,
-        1. for each available job
-            1. suppose we schedule that job at this time slot,
-                1. compute reward incurred by this time slot's assignment
-                    1. if this time slot made a job complete, reward_incurred_in_this_time_slot += reward - delay penalty (if any)
-                2. make a recursive call to compute the max reward and optimal schedule by [this time slot + 1, total time slots] assignments.
-                3. add the reward and optimal schedule from these 2 steps, save it as a candidate solution. add the idle time slot as well
-        2. return the maximum reward and corresponding optimal schedule among all candidate solutions.
-    3. if no available jobs and this time slot == total time slots,
-        1. final_settle = 0
-        2. for all jobs:
-            1. if job is unfinished, final_settle -= drop penalty + delay penalty (if any)
-            2. else if job is not scheduled at all, final_settle -= drop penalty
-        4. return final_settle and the corresponding optimal schedule (append an idle time slot to optimal schedule).
-    4. if available jobs exist and this time slot == total time slots,
-        1. for each available job
-            1. suppose we schedule that job at this time slot,
-                1. compute reward incurred by this time slot's assignment
-                    1. if this time slot made a job complete, reward_incurred_in_this_time_slot += reward - delay penalty (if any)
-                2. final_settle = 0
-                3. for all jobs:
-                    1. if job is unfinished, final_settle -= drop penalty + delay penalty (if any)
-                    2. else if job is not scheduled at all, final_settle -= drop penalty
-                4. add the reward (by adding reward_incurred_in_this_time_slot and final_settle) and append this job assignment assumption at the optimal schedule, save it as a candidate solution. add the idle time slot as well
-        2. return the maximum reward and corresponding optimal schedule among all candidate solutions.
+    Exact offline solver, used as ground truth for our branch and bound.
+
+    Instead of enumerating all schedules, we enumerate all states: (time slot t, remaining processing time of every job).
+    Everything that can still happen from time slot t on only depends on the state (see DominanceTable), so
+
+        V(t, remaining) = max( V(t+1, remaining),                                      # idle
+                               max over jobs j schedulable at t: gain_j(t) [if remaining_j == 1] + V(t+1, remaining - e_j) )
+        V(T, remaining) = 0
+
+    and the optimal score is the score of the schedule we start from plus V(t+1, remaining) (score_rewritten scale).
+
+    - A job that can no longer complete before deadline + t_i_asterisk is never scheduled again and counts as 0 remaining,
+      so states that only differ in such jobs are the same state.
+    - States are hash-consed: every distinct remaining vector is stored once and gets an integer id, the transitions
+      (t, state id, job) -> state id are memoized as well. The memo of V is keyed by (t, state id).
+    - The memo of V holds at most max_cache_size entries (least recently used are evicted), an evicted value is computed again.
+    The number of states grows exponentially with the number of jobs, which is fine up to about 15 jobs.
     '''
-    # get all available jobs at this time slot
-    available_jobs = []
-    for job in job_instances:
-        if job.release_time <= current_time_slot and schedule_counter(job.id, schedule_so_far) < job.processing_time:
-            available_jobs.append(job)
-    # if no available jobs at this time slot and this time slot < total time slots, this time slot ++, 
-    if not available_jobs and current_time_slot < total_time_slots:
-        return bruteforce_schedule(current_time_slot + 1, job_instances, total_time_slots, reward_so_far, schedule_so_far + [(current_time_slot, None)]) # this is a tail recursion where the return value of the last function call is the return value of the first function call
-    if available_jobs and current_time_slot < total_time_slots:
-        candidate_solutions = []
-        for job in available_jobs:
-            # suppose we schedule that job at this time slot
-            reward_incurred_in_this_time_slot = 0
-            # compute reward incurred by this job assignment assumption
-            # check if this job is completed at this time slot
-            scheduled_time_slots = [time_slot for time_slot, job_id in (schedule_so_far) if job_id == job.id]
-            if len(scheduled_time_slots) + 1 == job.processing_time: # job can be completed if we assign it at current_time_slot
-                reward_incurred_in_this_time_slot += job.reward
-                if current_time_slot > (job.deadline - 1):
-                    tardiness = current_time_slot - (job.deadline - 1)
-                    reward_incurred_in_this_time_slot -= job.penalty_function.evaluate(tardiness)
-            candidate_solutions.append(bruteforce_schedule(
-                current_time_slot + 1,
-                job_instances,
-                total_time_slots,
-                reward_so_far + reward_incurred_in_this_time_slot,
-                schedule_so_far + [(current_time_slot, job.id)]
-            ))
-        # consider the idle time slot as well
-        candidate_solutions.append(bruteforce_schedule( 
-            current_time_slot + 1,
-            job_instances,
-            total_time_slots,
-            reward_so_far,
-            schedule_so_far + [(current_time_slot, None)]
-        ))
-        # return the maximum reward and corresponding optimal schedule among all candidate solutions.
-        return max(candidate_solutions, key=lambda x: x[0])
-    if not available_jobs and current_time_slot == total_time_slots:
-        final_settle = 0
-        for job in job_instances:
-            if schedule_counter(job.id, schedule_so_far) == 0:
-                # job is not scheduled at all
-                final_settle -= job.drop_penalty
-            elif schedule_counter(job.id, schedule_so_far) < job.processing_time:
-                # job is unfinished
-                final_settle -= job.drop_penalty
-                # check if job is delayed
-                last_scheduled_time_slot = max(time_slot for time_slot, job_id in (schedule_so_far) if job_id == job.id)
-                if last_scheduled_time_slot > (job.deadline - 1):
-                    tardiness = last_scheduled_time_slot - (job.deadline - 1)
-                    final_settle -= job.penalty_function.evaluate(tardiness)
-        return (
-            reward_so_far + final_settle,
-            schedule_so_far + [(current_time_slot, None)]
-        )
-    if available_jobs and current_time_slot == total_time_slots:
-        candidate_solutions = []
-        for job in available_jobs:
-            # suppose we schedule that job at this time slot
-            reward_incurred_in_this_time_slot = 0
-            # compute reward incurred by this job assignment assumption
-            # check if this job is completed at this time slot
-            scheduled_time_slots = [time_slot for time_slot, job_id in (schedule_so_far) if job_id == job.id]
-            if len(scheduled_time_slots) + 1 == job.processing_time: # job can be completed if we assign it at current_time_slot
-                reward_incurred_in_this_time_slot += job.reward
-                if current_time_slot > (job.deadline - 1):
-                    tardiness = current_time_slot - (job.deadline - 1)
-                    reward_incurred_in_this_time_slot -= job.penalty_function.evaluate(tardiness)
-            final_settle = 0
-            for every_job in job_instances:
-                if schedule_counter(every_job.id, schedule_so_far) + (1 if every_job.id == job.id else 0) == 0:
-                    # job is not scheduled at all
-                    final_settle -= every_job.drop_penalty
-                elif schedule_counter(every_job.id, schedule_so_far) + (1 if every_job.id == job.id else 0) < every_job.processing_time:
-                    # job is unfinished
-                    final_settle -= every_job.drop_penalty
-                    # check if job is delayed
-                    last_scheduled_time_slot = max(time_slot for time_slot, job_id in (schedule_so_far + [(current_time_slot, job.id)]) if job_id == every_job.id)
-                    if every_job.id == job.id:
-                        last_scheduled_time_slot = max(last_scheduled_time_slot, current_time_slot)
-                    if last_scheduled_time_slot > (every_job.deadline - 1):
-                        tardiness = last_scheduled_time_slot - (every_job.deadline - 1)
-                        final_settle -= every_job.penalty_function.evaluate(tardiness)
-            candidate_solutions.append((
-                reward_so_far + reward_incurred_in_this_time_slot + final_settle,
-                schedule_so_far + [(current_time_slot, job.id)]
-            ))
-        # consider the idle time slot as well
-        candidate_solutions.append((
-            reward_so_far + final_settle,
-            schedule_so_far + [(current_time_slot, None)]
-        ))
-        return max(candidate_solutions, key=lambda x: x[0])
\ No newline at end of file
+    def __init__(self, max_cache_size: int = 2_000_000):
+        super().__init__()
+        assert max_cache_size > 0, "The cache must hold at least one state"
+        self.max_cache_size = max_cache_size
+        # number of evaluated states of the last call to schedule
+        self.states = 0
+
+    def schedule(self, schedule: Schedule) -> Schedule:
+        self.tree = SearchTree(schedule)
+        root = self.tree.root()
+
+        self._state_ids: Dict[Tuple[int, ...], int] = {}
+        self._states: List[Tuple[int, ...]] = []
+        self._transitions: Dict[Tuple[int, int, int], int] = {}
+        self._memo: 'OrderedDict[Tuple[int, int], float]' = OrderedDict()
+        self.states = 0
+
+        t = root.t + 1
+        state = self._canonical(t, tuple(int(remaining) for remaining in root.remaining))
+
+        # walk down the optimal decisions
+        jobs = []
+        while t < self.tree.T:
+            best_value, best_job, best_state = float('-inf'), -1, state
+            for job_index, next_state in self._successors(t, state):
+                value = self._value(t + 1, next_state) + (self._gain(t, state, job_index) if job_index >= 0 else 0)
+                if value > best_value:
+                    best_value, best_job, best_state = value, job_index, next_state
+            jobs.append(best_job)
+            state = best_state
+            t += 1
+
+        best_node = self.tree.extend(root, jobs)
+        result = self.tree.to_schedule(best_node)
+        result.lower_bound = result.upper_bound = best_node.score
+        return result
+
+    def _canonical(self, t: int, remaining: Tuple[int, ...]) -> int:
+        '''Id of the state at time slot t, jobs that can not complete anymore count as 0 remaining.'''
+        latest_time = self.tree.latest_time
+        if any(0 < remaining_i and t + remaining_i > latest_time[i] for i, remaining_i in enumerate(remaining)):
+            remaining = tuple(
+                0 if t + remaining_i > latest_time[i] else remaining_i
+                for i, remaining_i in enumerate(remaining)
+            )
+        state = self._state_ids.get(remaining)
+        if state is None:
+            state = self._state_ids[remaining] = len(self._states)
+            self._states.append(remaining)
+        return state
+
+    def _schedulable(self, t: int, state: int) -> List[int]:
+        remaining = self._states[state]
+        release_time = self.tree.release_time
+        return [i for i, remaining_i in enumerate(remaining) if remaining_i > 0 and release_time[i] <= t]
+
+    def _gain(self, t: int, state: int, job_index: int) -> float:
+        return self.tree.gain(job_index, t) if self._states[state][job_index] == 1 else 0
+
+    def _transition(self, t: int, state: int, job_index: int) -> int:
+        '''State after processing job_index in time slot t.'''
+        # the canonical state depends on the time slot, so does the transition
+        key = (t, state, job_index)
+        next_state = self._transitions.get(key)
+        if next_state is None:
+            remaining = list(self._states[state])
+            remaining[job_index] -= 1
+            next_state = self._transitions[key] = self._canonical(t + 1, tuple(remaining))
+        return next_state
+
+    def _successors(self, t: int, state: int) -> List[Tuple[int, int]]:
+        '''(job index, next state) of every decision in time slot t, -1 for idle.'''
+        successors = [(-1, self._canonical(t + 1, self._states[state]))]
+        successors += [(job_index, self._transition(t, state, job_index)) for job_index in self._schedulable(t, state)]
+        return successors
+
+    def _value(self, t: int, state: int) -> float:
+        '''
+        V(t, state). Depth-first without recursion: every frame on the stack keeps the best value of the successors
+        it has seen so far, a successor's value is read right after it is computed, so eviction can not lose it.
+        '''
+        if t >= self.tree.T:
+            return 0
+        memo = self._memo
+        if (t, state) in memo:
+            memo.move_to_end((t, state))
+            return memo[(t, state)]
+
+        # frame: [t, state, successors, index of the next successor, best value so far]
+        stack = [[t, state, self._successors(t, state), 0, float('-inf')]]
+        while stack:
+            frame = stack[-1]
+            t_, state_, successors, k, best = frame
+            if k < len(successors):
+                job_index, next_state = successors[k]
+                if t_ + 1 >= self.tree.T:
+                    value = 0
+                else:
+                    value = memo.get((t_ + 1, next_state))
+                    if value is None:
+                        stack.append([t_ + 1, next_state, self._successors(t_ + 1, next_state), 0, float('-inf')])
+                        continue
+                    memo.move_to_end((t_ + 1, next_state))
+                if job_index >= 0:
+                    value += self._gain(t_, state_, job_index)
+                frame[3] += 1
+                frame[4] = max(best, value)
+                continue
+
+            stack.pop()
+            memo[(t_, state_)] = best
+            self.states += 1
+            if len(memo) > self.max_cache_size:
+                memo.popitem(last=False)
+        return best
@@ -0,0 +1,320 @@
+from src.schedule import Schedule
+from src.algorithms.our.get_upper_bound_by_LP import LPBoundModel
+from src.algorithms.our.search_node import SearchNode, SearchTree
+from src.algorithms.our.frontier import Frontier
+from src.algorithms.our.dominance import DominanceTable
+from src.algorithms.our.get_lower_bound_by_greedy import best_greedy_completion, greedy_completion
+from src.algorithms.our.local_search import LocalSearch
+
+import time
+
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class BranchAndBound:
+    '''
+    The best-first branch and bound of our offline algorithm.
+
+    The state of the search (frontier, incumbent, counters) lives in this object, so that the search can be run
+    in steps: OurOffline runs it until the frontier is empty (or until a limit is reached), the parallel tree search
+    runs it on a subtree for a limited number of expansions and then collects the open nodes.
+    '''
+    def __init__(
+            self,
+            schedule: Schedule,
+            bound_model: Optional[LPBoundModel] = None,
+            warm_start: bool = True,
+            evaluator=None,
+            dominance_table: Optional[DominanceTable] = None,
+            greedy: bool = True
+        ):
+        # candidates are compact SearchNodes, a full Schedule is only rebuilt for the final incumbent
+        self.tree = SearchTree(schedule)
+        # the LP relaxation is built once, every candidate only changes the bounds of the decided time slots
+        self.bound_model = bound_model if bound_model is not None else LPBoundModel(schedule)
+        # warm-start the LPs of the children of the node expanded next from its optimal basis (only with highspy installed)
+        self.warm_start = warm_start
+        # (node, basis): the optimal LP basis of the child that comes first in the frontier after the last expansion,
+        # the one most likely expanded next. Only this one basis is kept, not one per node of the frontier (a HighsBasis
+        # holds the status of every column and row); the children of any other node start from the basis of the previous solve.
+        self._lp_basis: Optional[Tuple[SearchNode, object]] = None
+        # optional BoundEvaluator, computes the upper bounds of siblings in parallel
+        self.evaluator = evaluator
+        # optional DominanceTable, drops nodes that are dominated by a node with the same state
+        self.dominance_table = dominance_table
+        # use the score of a greedy completion as the lower bound of a node (instead of the score of the partial schedule),
+        # completions that beat the incumbent become the new incumbent
+        self.greedy = greedy
+
+        self.frontier = Frontier()
+
+        # incumbent, in the score_rewritten scale (subtract drop_penalties to get Schedule.score)
+        self.best_lower_case = float('-inf')
+        self.drop_penalties = sum(job.drop_penalty for job in schedule.jobs)
+        self.best_node: Optional[SearchNode] = None
+        # incumbent shared with other processes (a multiprocessing.Value), we prune against it as well
+        self.shared_incumbent = None
+
+        self.expanded = 0
+        self.pruned = 0
+        # nodes dropped because of the dominance table (not counted in pruned)
+        self.dominated = 0
+        # children generated by expansions (before the dominance check)
+        self.created = 0
+        # pruned and dominated nodes by reason:
+        # - "bound": upper bound not above the incumbent when the node was evaluated (never pushed)
+        # - "stale": the incumbent passed the upper bound while the node was in the frontier (lazy pruning on pop)
+        # - "dominated": a node with the same state and at least the same score was known when the node was evaluated
+        # - "dominated_later": such a node was found while the node was in the frontier
+        self.pruned_by: Dict[str, int] = {"bound": 0, "stale": 0, "dominated": 0, "dominated_later": 0}
+        # cumulative time (in seconds) of the hot paths of the search:
+        # - "upper_bound": LP relaxations (or waiting for the BoundEvaluator)
+        # - "lower_bound": greedy completions
+        # - "children": generating the children of a node
+        # - "prefix": materializing the time slots of nodes (for the LPs and the final schedule)
+        # - "dominance": lookups in the DominanceTable
+        self.timings: Dict[str, float] = {"upper_bound": 0.0, "lower_bound": 0.0, "children": 0.0, "prefix": 0.0, "dominance": 0.0}
+        # every improvement of the incumbent: (seconds since the search was created, Schedule.score, expanded nodes)
+        self.timeline: List[Tuple[float, float, int]] = []
+        self._created_at = time.perf_counter()
+        # the bound model may be shared with other searches (the tasks of a worker), lp_time only counts ours
+        self._lp_time_offset = self.bound_model.solve_time
+        # why the last run stopped: "optimal", "max_expansions", "time_limit", "node_limit" or "gap_tolerance"
+        self.status: Optional[str] = None
+
+    @property
+    def lp_time(self) -> Optional[float]:
+        '''Time spent solving LPs (in seconds), None if a BoundEvaluator solves them in other processes.'''
+        return self.bound_model.solve_time - self._lp_time_offset if self.evaluator is None else None
+
+    @property
+    def frontier_peak(self) -> int:
+        '''Highest number of open nodes at any time.'''
+        return self.frontier.peak
+
+    def threshold(self) -> float:
+        '''Candidates whose upper bound is not higher than this value can be pruned.'''
+        if self.shared_incumbent is not None:
+            return max(self.best_lower_case, self.shared_incumbent.value)
+        return self.best_lower_case
+
+    def evaluate(self, parent: SearchNode, new_candidates: List[SearchNode]):
+        '''Compute the lower and upper bound of the children of parent.'''
+        timings = self.timings
+        start = time.perf_counter()
+        for candidate in new_candidates:
+            if self.greedy:
+                candidate.lower_bound, jobs = best_greedy_completion(self.tree, candidate)
+                if candidate.lower_bound > self.best_lower_case:
+                    completed = self.tree.extend(candidate, jobs)
+                    completed.lower_bound = completed.upper_bound = completed.score
+                    self.update_incumbent(completed)
+            else:
+                # the partial schedule itself is a feasible schedule (the remaining time slots stay idle)
+                candidate.lower_bound = candidate.score
+        timings["lower_bound"] += time.perf_counter() - start
+
+        if self.dominance_table is not None:
+            start = time.perf_counter()
+            # a state we have seen before already has an upper bound, we only shift it by the difference in score
+            needs_LP = []
+            for candidate in new_candidates:
+                entry = self.dominance_table.lookup(candidate)
+                if entry is not None and entry[1] is not None:
+                    candidate.upper_bound = candidate.score + entry[1]
+                else:
+                    needs_LP.append(candidate)
+            new_candidates = needs_LP
+            timings["dominance"] += time.perf_counter() - start
+            if len(new_candidates) == 0:
+                return
+
+        if self.evaluator is not None:
+            start = time.perf_counter()
+            parent_prefix = self.tree.prefix(parent)
+            middle = time.perf_counter()
+            upper_bounds = self.evaluator.upper_bounds(parent_prefix, [candidate.job for candidate in new_candidates])
+            for candidate, upper_bound in zip(new_candidates, upper_bounds):
+                candidate.upper_bound = upper_bound
+            timings["prefix"] += middle - start
+            timings["upper_bound"] += time.perf_counter() - middle
+            return
+
+        basis = self._lp_basis[1] if self._lp_basis is not None and self._lp_basis[0] is parent else None
+        self._lp_basis = None
+        for candidate in new_candidates:
+            start = time.perf_counter()
+            prefix = self.tree.prefix(candidate)
+            middle = time.perf_counter()
+            candidate.upper_bound = self.bound_model.upper_bound_from_prefix(prefix, basis=basis)
+            # the frontier pops the highest lower bound first, then the highest upper bound
+            if self.warm_start and (self._lp_basis is None or
+                    (candidate.lower_bound, candidate.upper_bound) > (self._lp_basis[0].lower_bound, self._lp_basis[0].upper_bound)):
+                self._lp_basis = (candidate, self.bound_model.basis)
+            timings["prefix"] += middle - start
+            timings["upper_bound"] += time.perf_counter() - middle
+
+    def update_incumbent(self, candidate: SearchNode):
+        # Any partial schedule is a feasible schedule (the remaining time slots stay idle)
+        if candidate.score > self.best_lower_case:
+            self.best_lower_case = candidate.score
+            self.best_node = candidate
+            self.timeline.append((time.perf_counter() - self._created_at, candidate.score - self.drop_penalties, self.expanded))
+            if self.shared_incumbent is not None:
+                with self.shared_incumbent.get_lock():
+                    if candidate.score > self.shared_incumbent.value:
+                        self.shared_incumbent.value = candidate.score
+
+    def expand(self, parent: SearchNode):
+        '''Evaluate the children of parent and push those that cannot be pruned yet.'''
+        start = time.perf_counter()
+        new_candidates = self.tree.children(parent)
+        self.timings["children"] += time.perf_counter() - start
+        self.created += len(new_candidates)
+        if self.dominance_table is not None:
+            start = time.perf_counter()
+            # drop the children for which we already know a node with the same state and at least the same score
+            undominated = [candidate for candidate in new_candidates if not self.dominance_table.is_dominated(candidate)]
+            self.dominated += len(new_candidates) - len(undominated)
+            self.pruned_by["dominated"] += len(new_candidates) - len(undominated)
+            new_candidates = undominated
+            self.timings["dominance"] += time.perf_counter() - start
+        self.evaluate(parent, new_candidates)
+        threshold = self.threshold()
+        for new_candidate in new_candidates:
+            if self.dominance_table is not None:
+                self.dominance_table.store(new_candidate)
+            if new_candidate.upper_bound <= threshold:
+                self.pruned += 1
+                self.pruned_by["bound"] += 1
+            else:
+                self.frontier.push(new_candidate)
+        self.expanded += 1
+
+    def presolve(self, time_budget: float = 1.0, rules=("edf", "wsrt")):
+        '''
+        Seed the incumbent before the search: complete the root with every greedy rule, improve each completion
+        by local search (the time budget is split between the rules) and keep the best one.
+        '''
+        root = self.tree.root()
+        for rule in rules:
+            _, jobs = greedy_completion(self.tree, root, rule)
+            score, jobs = LocalSearch(self.tree, root, jobs, time_budget / len(rules)).run()
+            if score > self.best_lower_case:
+                completed = self.tree.extend(root, jobs)
+                completed.lower_bound = completed.upper_bound = completed.score
+                self.update_incumbent(completed)
+
+    def start(self):
+        '''Push the candidates at t=1 (the children of the schedule we start from).'''
+        self.expand(self.tree.root())
+
+    def best_upper_bound(self) -> float:
+        '''Best upper bound of all open candidates, at least the incumbent.'''
+        return max(self.frontier.best_upper_bound(), self.best_lower_case)
+
+    def gap(self) -> float:
+        '''Proven optimality gap: an optimal schedule scores at most this much more than the incumbent.'''
+        if self.best_node is None:
+            return float('inf')
+        return self.best_upper_bound() - self.best_lower_case
+
+    def relative_gap(self) -> float:
+        '''The gap relative to the score of the incumbent (Schedule.score, at least 1).'''
+        if self.best_node is None:
+            return float('inf')
+        return self.gap() / max(1.0, abs(self.best_lower_case - self.drop_penalties))
+
+    def done(self) -> bool:
+        '''Whether the incumbent is optimal.'''
+        # If no open candidate has a higher UPPER bound than the best LOWER bound, we found AN optimal schedule
+        return len(self.frontier) == 0 or self.frontier.best_upper_bound() <= self.threshold()
+
+    def step(self) -> bool:
+        '''One iteration of the search. Returns False once the search is done.'''
+        # * 1. Stop once the incumbent is optimal
+        if self.done():
+            return False
+
+        # * 2. Select candidate with highest lower bound, then by highest upper bound
+        best_candidate = self.frontier.pop()
+
+        # * 3. Lazy pruning: the incumbent may have improved since the candidate was pushed
+        if best_candidate.upper_bound <= self.threshold():
+            self.pruned += 1
+            self.pruned_by["stale"] += 1
+            return True
+
+        # * 3b. A node with the same state and a higher score was found after this one was pushed
+        if self.dominance_table is not None and self.dominance_table.is_strictly_dominated(best_candidate):
+            self.dominated += 1
+            self.pruned_by["dominated_later"] += 1
+            return True
+
+        # * 4. Update the incumbent
+        self.update_incumbent(best_candidate)
+
+        # * 5. Expand the candidate, unless it is a complete schedule (t == T-1)
+        if best_candidate.t < self.tree.T - 1:
+            self.expand(best_candidate)
+        return True
+
+    def incumbents(
+            self,
+            max_expansions: Optional[int] = None,
+            on_step: Optional[Callable[['BranchAndBound'], None]] = None,
+            time_limit: Optional[float] = None,
+            node_limit: Optional[int] = None,
+            gap_tolerance: Optional[float] = None
+        ) -> Iterator[SearchNode]:
+        '''
+        Run the search and yield every new incumbent (starting with the current one, if there is one).
+
+        The search stops when the incumbent is optimal, or as soon as one of the limits is reached:
+        - max_expansions: number of expansions in this run
+        - time_limit: seconds since the start of this run
+        - node_limit: total number of expanded nodes
+        - gap_tolerance: relative_gap() of the incumbent
+        `status` tells which one it was.
+        '''
+        start_time = time.perf_counter()
+        stop_at = None if max_expansions is None else self.expanded + max_expansions
+        last_incumbent = None
+        while True:
+            if self.best_node is not None and self.best_node is not last_incumbent:
+                last_incumbent = self.best_node
+                yield last_incumbent
+
+            if self.done():
+                self.status = "optimal"
+            elif stop_at is not None and self.expanded >= stop_at:
+                self.status = "max_expansions"
+            elif node_limit is not None and self.expanded >= node_limit:
+                self.status = "node_limit"
+            elif time_limit is not None and time.perf_counter() - start_time >= time_limit:
+                self.status = "time_limit"
+            elif gap_tolerance is not None and self.relative_gap() <= gap_tolerance:
+                self.status = "gap_tolerance"
+            else:
+                self.step()
+                if on_step is not None:
+                    on_step(self)
+                continue
+            break
+
+    def run(self, max_expansions: Optional[int] = None, on_step: Optional[Callable[['BranchAndBound'], None]] = None, **limits) -> str:
+        '''Run the search until it is done or a limit is reached (see `incumbents`), returns the status.'''
+        for _ in self.incumbents(max_expansions, on_step, **limits):
+            pass
+        return self.status
+
+    def best_schedule(self) -> Optional[Schedule]:
+        if self.best_node is None:
+            return None
+        start = time.perf_counter()
+        schedule = self.tree.to_schedule(self.best_node)
+        self.timings["prefix"] += time.perf_counter() - start
+        # the bounds of the returned schedule are those of the whole search (in the score_rewritten scale)
+        schedule.lower_bound = self.best_lower_case
+        schedule.upper_bound = self.best_upper_bound()
+        return schedule
@@ -0,0 +1,77 @@
+from src.schedule import Schedule
+from src.job import Job
+
+import numpy as np
+
+from typing import List
+
+
+class TimeBlock:
+    '''
+    A set of jobs whose schedulable windows [release_time, deadline + t_i_asterisk) overlap in a chain, and that no other
+    job overlaps with. Time slots start..end-1 are only ever used by these jobs, so the block can be solved on its own.
+    - jobs: indices (in schedule.jobs) of the jobs of the block, in the order of schedule.jobs
+    '''
+    def __init__(self, jobs: List[int], start: int, end: int):
+        self.jobs = jobs
+        self.start = start
+        self.end = end
+
+    def __repr__(self) -> str:
+        return f"TimeBlock(jobs={self.jobs}, start={self.start}, end={self.end})"
+
+
+def time_blocks(schedule: Schedule) -> List[TimeBlock]:
+    '''
+    Split the jobs of an (empty) schedule into independent time blocks, sorted by time.
+    Jobs that can not be scheduled at all (their window is empty or after the horizon) are in no block.
+    '''
+    windows = sorted(
+        (job.release_time, min(job.deadline + job.t_i_asterisk, schedule.T), job_index)
+        for job_index, job in enumerate(schedule.jobs)
+    )
+    blocks: List[TimeBlock] = []
+    for start, end, job_index in windows:
+        if start >= end:
+            continue
+        if len(blocks) > 0 and start < blocks[-1].end:
+            blocks[-1].jobs.append(job_index)
+            blocks[-1].end = max(blocks[-1].end, end)
+        else:
+            blocks.append(TimeBlock([job_index], start, end))
+    for block in blocks:
+        block.jobs.sort()
+    return blocks
+
+
+def block_instance(schedule: Schedule, block: TimeBlock) -> Schedule:
+    '''The sub-instance of a block: its jobs shifted to start at time slot 0, with horizon end - start.'''
+    jobs = [
+        Job(
+            id=job.id,
+            release_time=job.release_time - block.start,
+            processing_time=job.processing_time,
+            deadline=job.deadline - block.start,
+            reward=job.reward,
+            drop_penalty=job.drop_penalty,
+            penalty_function=job.penalty_function
+        )
+        for job in (schedule.jobs[job_index] for job_index in block.jobs)
+    ]
+    return Schedule(jobs, block.end - block.start)
+
+
+def stitch(schedule: Schedule, blocks: List[TimeBlock], block_schedules: List[Schedule]) -> Schedule:
+    '''
+    One complete schedule of the original instance from the schedules of its blocks. The score of a schedule is a sum
+    over the jobs, so the result scores the sum of the blocks (minus the drop penalties of the jobs in no block).
+    '''
+    slots = np.full(schedule.T, -1, dtype=np.int32)
+    for block, block_schedule in zip(blocks, block_schedules):
+        job_indices = np.asarray(block.jobs, dtype=np.int32)
+        block_slots = block_schedule.slots
+        slots[block.start:block.end] = np.where(block_slots >= 0, job_indices[np.maximum(block_slots, 0)], -1)
+    result = schedule.copy()
+    result.set_slots(slots)
+    result.t = schedule.T - 1
+    return result
@@ -0,0 +1,69 @@
+from src.algorithms.our.search_node import SearchNode
+
+from collections import OrderedDict
+
+from typing import Optional, Tuple
+
+
+class DominanceTable:
+    '''
+    Transposition table of the branch and bound: the best score seen so far for every state of a partial schedule.
+
+    The state of a node is its last decided time slot t and the remaining processing time of every job (a job is completed
+    when it is 0). Everything that can still happen after t only depends on this state: which jobs can be scheduled, and
+    what they gain when they complete. When and in which order the finished jobs were processed only changed the score
+    of the node. So of two nodes with the same state, the one with the higher score dominates the other, and the other
+    one does not have to be explored.
+
+    For the same reason an upper bound of one node carries over to all nodes with the same state: if ub is an upper bound
+    of a node with score s, then every node with the same state and score s' has the upper bound s' + (ub - s).
+    We store this offset (ub - s) with the state, so that a dominating node does not need another LP.
+
+    The table holds at most max_size states, the least recently used state is evicted first. Evicting a state only means
+    that we forget about it, this never makes the search incorrect.
+    '''
+    def __init__(self, max_size: int = 200_000):
+        self.max_size = max_size
+        # state -> (best score, upper bound - score), in the order of their last use
+        self._table: 'OrderedDict[Tuple[int, bytes], Tuple[float, Optional[float]]]' = OrderedDict()
+        self.hits = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    @staticmethod
+    def key(node: SearchNode) -> Tuple[int, bytes]:
+        return (node.t, node.remaining.tobytes())
+
+    def lookup(self, node: SearchNode) -> Optional[Tuple[float, Optional[float]]]:
+        '''(best score, upper bound offset) stored for the state of node, None if the state is unknown.'''
+        entry = self._table.get(self.key(node))
+        if entry is not None:
+            self.hits += 1
+            self._table.move_to_end(self.key(node))
+        return entry
+
+    def is_dominated(self, node: SearchNode) -> bool:
+        '''Whether a node with the same state and at least the same score was seen (and is not the node itself).'''
+        entry = self._table.get(self.key(node))
+        return entry is not None and entry[0] >= node.score
+
+    def is_strictly_dominated(self, node: SearchNode) -> bool:
+        '''Whether a node with the same state and a higher score was seen.'''
+        entry = self._table.get(self.key(node))
+        return entry is not None and entry[0] > node.score
+
+    def store(self, node: SearchNode):
+        '''Store node as the best node of its state, with the offset of its upper bound (if it has one).'''
+        key = self.key(node)
+        offset = None if node.upper_bound is None else node.upper_bound - node.score
+        entry = self._table.get(key)
+        if entry is not None and entry[1] is not None:
+            # both offsets are valid for this state, keep the tightest one
+            offset = entry[1] if offset is None else min(offset, entry[1])
+        self._table[key] = (node.score, offset)
+        self._table.move_to_end(key)
+        if len(self._table) > self.max_size:
+            self._table.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,54 @@
+from src.algorithms.our.search_node import SearchNode
+
+import heapq
+import itertools
+
+from typing import List, Tuple
+
+
+class Frontier:
+    '''
+    The open nodes of the branch and bound, as a priority queue.
+
+    Nodes are popped by the highest lower bound, ties broken by the highest upper bound and then by insertion order.
+    Next to it we keep a second heap on the upper bound only, so that the best upper bound of all open nodes
+    (which gives the optimality gap) is available in O(1). Popped nodes are removed from that heap lazily.
+    '''
+    def __init__(self):
+        self._heap: List[Tuple[float, float, int, SearchNode]] = []
+        self._upper_bounds: List[Tuple[float, int, SearchNode]] = []
+        self._counter = itertools.count()
+        self._size = 0
+        # high-water mark of the number of open nodes
+        self.peak = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, node: SearchNode):
+        count = next(self._counter)
+        node.in_frontier = True
+        # heapq is a min-heap, so we negate the bounds
+        heapq.heappush(self._heap, (-node.lower_bound, -node.upper_bound, count, node))
+        heapq.heappush(self._upper_bounds, (-node.upper_bound, count, node))
+        self._size += 1
+        if self._size > self.peak:
+            self.peak = self._size
+
+    def pop(self) -> SearchNode:
+        _, _, _, node = heapq.heappop(self._heap)
+        node.in_frontier = False
+        self._size -= 1
+        return node
+
+    def nodes(self) -> List[SearchNode]:
+        '''All nodes in the frontier, in no particular order.'''
+        return [entry[3] for entry in self._heap]
+
+    def best_upper_bound(self) -> float:
+        '''Highest upper bound of all nodes still in the frontier, -inf if it is empty.'''
+        while self._upper_bounds and not self._upper_bounds[0][2].in_frontier:
+            heapq.heappop(self._upper_bounds)
+        if not self._upper_bounds:
+            return float('-inf')
+        return -self._upper_bounds[0][0]
@@ -1,43 +1,87 @@
 from src.schedule import Schedule
-from src.job import Job
+from src.algorithms.our.search_node import SearchNode, SearchTree
+
+import heapq
+
+from typing import List, Sequence, Tuple
+
+
+def _priority(tree: SearchTree, rule: str, job_index: int, remaining: int) -> float:
+    if rule == "edf":
+        # Earliest Deadline First
+        return tree.deadline[job_index]
+    # Weighted Shortest Remaining Time: remaining work per unit of reward, smallest first
+    return remaining / tree.w_i_hat[job_index] if tree.w_i_hat[job_index] > 0 else float('inf')
+
+
+def greedy_completion(tree: SearchTree, node: SearchNode, rule: str = "edf") -> Tuple[float, List[int]]:
+    '''
+    Complete the partial schedule of node greedily, one time slot at a time (preemptive).
+
+    In every time slot we run the released, unfinished job with the best priority (see _priority) that can still be
+    completed before deadline + t_i_asterisk, jobs that can no longer be completed are dropped.
+    The jobs wait in a heap, so this takes O((n + T) log n): every job is pushed once when it is released and popped
+    once when it completes or is dropped, and every time slot only looks at the top of the heap.
+    Nothing is copied except the remaining processing times.
+
+    Returns the score of the completed schedule (in the score_rewritten scale, like node.score)
+    and the job index (-1 for idle) of every time slot after node.t.
+    '''
+    assert rule in ["edf", "wsrt"], f"Rule must be either 'edf' or 'wsrt'. Got {rule}"
+    remaining = node.remaining.copy()
+    score = node.score
+    jobs: List[int] = []
+
+    heap: List[Tuple[float, int]] = []
+    jobs_by_release = tree.jobs_by_release
+    next_release = 0
+    t = node.t + 1
+    while t < tree.T:
+        # release the jobs up to time slot t
+        while next_release < len(jobs_by_release) and tree.release_time[jobs_by_release[next_release]] <= t:
+            job_index = int(jobs_by_release[next_release])
+            if remaining[job_index] > 0:
+                heapq.heappush(heap, (_priority(tree, rule, job_index, remaining[job_index]), job_index))
+            next_release += 1
+
+        # drop the jobs that can not complete anymore (they need the time slots t .. t + remaining - 1)
+        while heap and t + remaining[heap[0][1]] > tree.latest_time[heap[0][1]]:
+            heapq.heappop(heap)
+
+        if not heap:
+            if next_release == len(jobs_by_release):
+                break
+            # nothing to do until the next release
+            next_t = min(int(tree.release_time[jobs_by_release[next_release]]), tree.T)
+            jobs.extend([-1] * (next_t - t))
+            t = next_t
+            continue
+
+        job_index = heap[0][1]
+        jobs.append(job_index)
+        remaining[job_index] -= 1
+        if remaining[job_index] == 0:
+            heapq.heappop(heap)
+            score += tree.gain(job_index, t)
+        elif rule == "wsrt":
+            # the priority of the running job only gets better, so it stays on top
+            heapq.heapreplace(heap, (_priority(tree, rule, job_index, remaining[job_index]), job_index))
+        t += 1
+
+    jobs.extend([-1] * (tree.T - node.t - 1 - len(jobs)))
+    return score, jobs
+
+
+def best_greedy_completion(tree: SearchTree, node: SearchNode, rules: Sequence[str] = ("edf", "wsrt")) -> Tuple[float, List[int]]:
+    '''The best of the greedy completions of node over all rules.'''
+    return max((greedy_completion(tree, node, rule) for rule in rules), key=lambda completion: completion[0])
 
-def lower_bound(schedule: Schedule) -> float:
-    # Earliest Completion Time First
-
-    # duplicate the schedule to ensure that we are not modifying the original schedule
-    schedule = schedule.copy()
-
-    # reduce the processing time of all the jobs that have been already scheduled
-    for job_id in schedule.schedule:
-        if job_id is not None:
-            job = schedule.get_job_from_id(job_id)
-            job.processing_time -= 1
-
-            if job.processing_time <= 0:
-                job.completed = True
-
-    t = schedule.T
-    while t < schedule.T:
-
-        candidates = schedule.get_candidates()
 
-        # sort the candidates by their processing time (same as deadline here)
-        def sort_function(candidate: Job):
-            return candidate.processing_time
-        candidates.sort(key=sort_function)
-
-        best_candidate: Job = candidates[0]
-
-        for _t in range(t+1, t+best_candidate.processing_time+1):
-            schedule.schedule[_t] = best_candidate.id
-            best_candidate.completed = True
-
-
-        schedule.t += best_candidate.processing_time
-
-    # score the schedule
-    # return schedule.score()
-    return schedule.score_rewritten()
+def lower_bound(schedule: Schedule) -> float:
+    '''Score (score_rewritten) of the best greedy completion of a partial schedule, the schedule itself is not modified.'''
+    tree = SearchTree(schedule)
+    score, _ = best_greedy_completion(tree, tree.root())
+    return score
 
 
 
@@ -1,428 +1,643 @@
 # scipy for MILP
 from math import floor
 from scipy.optimize import linprog
+from scipy import sparse
 
 from src.schedule import Schedule
 from src.job import Job
 
 import numpy as np
+import time
 
-def LP_linear(schedule: Schedule) -> float:
-    w_i_hat = [job_instance.reward + job_instance.drop_penalty for job_instance in schedule.jobs]
+from typing import List, Optional, Tuple
+
+try:
+    # highspy gives direct access to the HiGHS solver that linprog uses, which lets us keep the model
+    # between solves and warm-start from a basis. It is optional, without it we fall back to linprog.
+    import highspy
+except ImportError:
+    highspy = None
+
+
+def _ranges(starts: np.ndarray, stops: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    Vectorized version of `for i in range(len(starts)): for t in range(starts[i], stops[i])`.
+    Returns two flat arrays (owner, position): owner[k] is the index i of the range that produced position[k].
+    Empty ranges (stop <= start) produce nothing.
+    '''
+    lengths = np.maximum(stops - starts, 0)
+    owner = np.repeat(np.arange(len(starts)), lengths)
+    # position inside its own range: global counter minus the offset where that range starts
+    offsets = np.cumsum(lengths) - lengths
+    position = np.arange(int(lengths.sum())) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
+    return owner, position
 
-    num_jobs = len(schedule.jobs)
 
-    # r_i is the release time of job i, a fixed value
-    r_i = [job_instance.release_time for job_instance in schedule.jobs]
-    t_i_asterisk = [job_instance.t_i_asterisk for job_instance in schedule.jobs]
-    # d_i is the deadline of job i, a fixed value
-    d_i = [job_instance.deadline for job_instance in schedule.jobs]
-
-    # p_i is the processing time of job i, a fixed value
-    p_i = [job_instance.processing_time for job_instance in schedule.jobs]
-
-    # f_i is the penalty of pushing a job back (by a number of time slots). 
-    # Since it is an expression consisting of slope * tardiness + intercept, we define slope and intercept separately.
-    f_i_slope = [job_instance.penalty_function.parameters["slope"] for job_instance in schedule.jobs]
-    f_i_intercept = [job_instance.penalty_function.parameters["intercept"] for job_instance in schedule.jobs]
-
-
-    # x_i_t denotes whether we schedule job i at time slot t. In the original ILP problem it is a binary **decision** variable, but in the LP relaxation it is a continuous **decision** variable in [0,1].
-    # now we construct the coefficients for x_i_t. They are all 0 because they do not appear in the objective function.
-    # we will flatten the 2D (job i, time slot t) structure into a 1D list for linprog.
-    num_time_slots = schedule.T
-    
-    x_i_t_coefficients = [0] * (num_jobs * num_time_slots)
-
-    # now we construct the coefficients for y_i. The coefficient for y_i is w_i_hat.
-    # y_i_coefficients = [w_i_hat[job_index] for job_index in range(num_jobs)]
-    y_i_coefficients = w_i_hat
-
-    # now we construct the coefficients for t_i_tilde. The coefficient for t_i_tilde is -1 * (f_i_slope).
-    t_i_tilde_coefficients = [-f_i_slope[job_index] for job_index in range(num_jobs)]
-
-    # now we construct the coefficients for z_i. The coefficient for z_i is -1 * (f_i_intercept).
-    z_i_coefficients = [-f_i_intercept[job_index] for job_index in range(num_jobs)]
-
-    # now we can combine all coefficients to form the final list of coefficients for linprog's objective function. This is done by concatenating the lists in the order of x_i_t, y_i, t_i_tilde, z_i.
-    objective_function_coefficients = x_i_t_coefficients + y_i_coefficients + t_i_tilde_coefficients + z_i_coefficients
-
-    # Due to how scipy.optimize.linprog works, the length of objective_function_coefficients is the length of all decision variables. This length will be reused when we construct constraints.
-    total_num_decision_variables = len(objective_function_coefficients)
-
-    # now we construct constraints for linprog.
-    # For Linprog, constraints are being separated into inequality(<=) constraints, equality(==) constraints, and bounds (constraints of variables themselves).
-
-    # now we construct inequality constraints (A_ub, b_ub).
-    # For A_ub, each row corresponds to one inequality constraint, and each column corresponds to one variable (in the order of x_i_t, y_i, t_i_tilde, z_i). So the length of each row is the same as the length of objective_function_coefficients.
-    A_ub = [] # a list of lists
-    b_ub = [] # a list of real numbers
-
-    # There are a lot of inequality constraints, we will construct them one by one.
-    # ub constraint number one: For every time slot from 1 to total_time_slots, sum of x_i_t over i from 1 to total job amount <= 1
-    for t in range(num_time_slots):
-        constraint_row = [0] * total_num_decision_variables
-        for job_index in range(num_jobs):
-            variable_index = job_index * num_time_slots + t
-            # variable_index = job_index + num_time_slots * t
-            # print(variable_index, len(constraint_row))
-            constraint_row[variable_index] = 1
-        A_ub.append(constraint_row)
-        b_ub.append(1)
-
-    # ub constraint number two: For every job i from 1 to total job amount, z_i <= t_i_tilde
-    for job_index in range(num_jobs):
-        constraint_row = [0] * total_num_decision_variables
-        # coefficient for z_i
-        z_i_variable_index = num_jobs * num_time_slots + num_jobs + num_jobs + job_index
-        constraint_row[z_i_variable_index] = 1
-        # coefficient for t_i_tilde
-        t_i_tilde_variable_index = num_jobs * num_time_slots + num_jobs + job_index
-        constraint_row[t_i_tilde_variable_index] = -1
-        A_ub.append(constraint_row)
-        b_ub.append(0)
-
-    # ub constraint number three: For every job i from 1 to total job amount, sum of x_i_t over t from d_i to total_time_slots <= z_i * p_i
-    for job_index in range(num_jobs):
-        constraint_row = [0] * total_num_decision_variables
-        # coefficients for x_i_t
-        for t in range(d_i[job_index], num_time_slots): # t from d_i - 1 to total_time_slots - 1 inclusive, corresponding to time slots from d_i to total_time_slots inclusive.
-            variable_index = job_index * num_time_slots + t
-            constraint_row[variable_index] = 1
-        # coefficient for z_i
-        z_i_variable_index = num_jobs * num_time_slots + num_jobs + num_jobs + job_index
-        constraint_row[z_i_variable_index] = -p_i[job_index]
-        A_ub.append(constraint_row)
-        b_ub.append(0)
-
-    # ub constraint number four: For every job i from 1 to total job amount, for every time slot t from d_i to total_time_slots, x_i_t * (t-d_i) <= i_i_tilde, where t in this formula is the time slot index (1-based)
-    for job_index in range(num_jobs):
-        for t_0_based in range(d_i[job_index], num_time_slots): # t from d_i - 1 to total_time_slots - 1 inclusive, corresponding to time slots from d_i to total_time_slots inclusive.
-            constraint_row = [0] * total_num_decision_variables
-            # coefficient for x_i_t
-            x_i_t_variable_index = job_index * num_time_slots + t_0_based
-            # do we add a +1 here?
-            constraint_row[x_i_t_variable_index] = (t_0_based) - d_i[job_index] # (t + 1) because t is 0-based index, but time slots are 1-based.
-            # coefficient for t_i_tilde
-            t_i_tilde_variable_index = num_jobs * num_time_slots + num_jobs + job_index
-            constraint_row[t_i_tilde_variable_index] = -1
-            A_ub.append(constraint_row)
-            b_ub.append(0)
-
-
-    # now we construct equality constraints (A_eq, b_eq).
-    A_eq = [] # a list of lists
-    b_eq = [] # a list of real numbers
-
-    # eq constraint number one: For every job i from 1 to total job amount, sum of x_i_t over t from 1 to total_time_slots == y_i * p_i
-    for job_index in range(num_jobs):
-        constraint_row = [0] * total_num_decision_variables
-        # coefficients for x_i_t
-        for t in range(num_time_slots):
-            variable_index = job_index * num_time_slots + t
-            constraint_row[variable_index] = 1
-        # coefficient for y_i
-        y_i_variable_index = num_jobs * num_time_slots + job_index
-        constraint_row[y_i_variable_index] = -p_i[job_index]
-        A_eq.append(constraint_row)
-        b_eq.append(0)
-
-    # eq constraint number two: For every job from 1 to total job amount, sum of x_i_t over t from 1 to r_i - 1 == 0
-    for job_index in range(num_jobs):
-        constraint_row = [0] * total_num_decision_variables
-        # coefficients for x_i_t
-        if r_i[job_index] > 0:
-            for t in range(r_i[job_index]): # t from 0 to r_i - 2 inclusive, corresponding to time slots from 1 to r_i - 1 inclusive.
-                variable_index = job_index * num_time_slots + t
-                constraint_row[variable_index] = 1
-        A_eq.append(constraint_row)
-        b_eq.append(0)
-
-    # eq constraint number three: For every job from 1 to total job amount, sum of x_i_t over t from t_i_asterisk to total_time_slots == 0
+class _SparseRows:
+    '''
+    Collects the non-zero entries of a constraint matrix as COO triplets (row, column, value).
+    Each call to `add_rows` appends a block of rows, so rows end up in the same order as they were added.
+    '''
+    def __init__(self, num_columns: int):
+        self.num_columns = num_columns
+        self.num_rows = 0
+        self.rows: List[np.ndarray] = []
+        self.columns: List[np.ndarray] = []
+        self.values: List[np.ndarray] = []
+        self.rhs: List[np.ndarray] = []
+
+    def add_rows(self, num_rows: int, rows: np.ndarray, columns: np.ndarray, values, rhs):
+        '''`rows` are relative to the block (0 <= row < num_rows), `values` and `rhs` may be scalars.'''
+        rows = np.asarray(rows, dtype=np.int64)
+        values = np.broadcast_to(np.asarray(values, dtype=float), rows.shape)
+        # explicit zeros carry no information for the solver, the dense formulation did not store them either
+        non_zero = values != 0
+        self.rows.append(rows[non_zero] + self.num_rows)
+        self.columns.append(np.asarray(columns, dtype=np.int64)[non_zero])
+        self.values.append(values[non_zero])
+        self.rhs.append(np.broadcast_to(np.asarray(rhs, dtype=float), (num_rows,)))
+        self.num_rows += num_rows
+
+    def to_csr(self) -> Tuple[sparse.csr_array, np.ndarray]:
+        matrix = sparse.coo_array(
+            (np.concatenate(self.values), (np.concatenate(self.rows), np.concatenate(self.columns))),
+            shape=(self.num_rows, self.num_columns)
+        ).tocsr()
+        return matrix, np.concatenate(self.rhs)
+
+
+def _job_parameters(schedule: Schedule) -> dict:
+    '''Collect the per-job constants of the LP as numpy arrays, indexed by the position of the job in schedule.jobs.'''
+    return {
+        # w_i_hat = reward + drop penalty, the gain of accepting job i
+        "w_i_hat": np.array([job.reward + job.drop_penalty for job in schedule.jobs], dtype=float),
+        # r_i is the release time of job i, a fixed value
+        "r_i": np.array([job.release_time for job in schedule.jobs], dtype=np.int64),
+        # d_i is the deadline of job i, a fixed value
+        "d_i": np.array([job.deadline for job in schedule.jobs], dtype=np.int64),
+        # p_i is the processing time of job i, a fixed value
+        "p_i": np.array([job.processing_time for job in schedule.jobs], dtype=float),
+        "t_i_asterisk": np.array([int(job.t_i_asterisk) for job in schedule.jobs], dtype=np.int64),
+    }
+
+
+def _add_shared_constraints(A_ub: _SparseRows, A_eq: _SparseRows, params: dict, num_jobs: int, num_time_slots: int):
+    '''
+    Constraints on x_i_t that both formulations have in common.
+    x_i_t is flattened as job_index * num_time_slots + t, and y_i follows directly after all x_i_t.
+    '''
+    T = num_time_slots
+    job_indices = np.arange(num_jobs)
+
+    # ub constraint: for every time slot t, sum of x_i_t over all jobs <= 1
+    slots = np.tile(np.arange(T), num_jobs)
+    jobs_of_slots = np.repeat(job_indices, T)
+    A_ub.add_rows(T, rows=slots, columns=jobs_of_slots * T + slots, values=1, rhs=1)
+
+    # eq constraint number one: for every job i, sum of x_i_t over all t == y_i * p_i
+    y_i_index = num_jobs * T + job_indices
+    A_eq.add_rows(
+        num_jobs,
+        rows=np.concatenate([jobs_of_slots, job_indices]),
+        columns=np.concatenate([jobs_of_slots * T + slots, y_i_index]),
+        values=np.concatenate([np.ones(num_jobs * T), -params["p_i"]]),
+        rhs=0
+    )
+
+    # eq constraint number two: for every job i, sum of x_i_t over t before r_i == 0
+    owner, t = _ranges(np.zeros(num_jobs, dtype=np.int64), np.minimum(params["r_i"], T))
+    A_eq.add_rows(num_jobs, rows=owner, columns=owner * T + t, values=1, rhs=0)
+
+    # eq constraint number three: for every job i, sum of x_i_t over t from deadline + t_i_asterisk to the horizon == 0
     # Note: t_i_asterisk represents maximum acceptable tardiness (not an absolute time slot)
-    # The constraint means: cannot schedule job at time slots >= (deadline + t_i_asterisk)
-    for job_index in range(num_jobs):
-        constraint_row = [0] * total_num_decision_variables
-        # coefficients for x_i_t
-        # Maximum completion time is deadline + t_i_asterisk
-        # We cannot schedule at time slots >= max_completion_time
-        max_completion_time = d_i[job_index] + int(t_i_asterisk[job_index])
-        if max_completion_time < num_time_slots:
-            for t in range(max_completion_time, num_time_slots):
-                variable_index = job_index * num_time_slots + t
-                constraint_row[variable_index] = 1
-        A_eq.append(constraint_row)
-        b_eq.append(0)
-
-    # now we construct bounds for each variable.
-    # For every job i from 1 to total job amount, for every time slot t (1-based obviously) from t_hat to total_time_slots, x_i_t in [0,1]
-    bounds = []
-    for job_index in range(num_jobs):
-        for t_0_based in range(num_time_slots):
-            # bounds.append((0, 1))
-
-            if t_0_based <= schedule.t:
-                if schedule.schedule[t_0_based] is not None:
-                    scheduled_job = schedule.schedule[t_0_based]
-                    index_of_scheduled_job = schedule.jobs.index(schedule.get_job_from_id(scheduled_job))
-
-                    if index_of_scheduled_job == job_index:
-                        bounds.append((1, 1))
-                    else:
-                        bounds.append((0, 0))
-                else:
-                    bounds.append((0, 0))
-            else:
-                bounds.append((0, 1))
-
-            # if t_0_based + 1 >= t_hat:
-            #     bounds.append((0, 1))
-            # else:
-            #     # for time slots before current time slot, x_i_t is the value in partial_schedule
-            #     assigned_job_id = partial_schedule["content"].get(t_0_based + 1, None)
-            #     if assigned_job_id == index_to_job_id[job_index]:
-            #         bounds.append((1, 1))
-            #     else:
-                    # bounds.append((0, 0))
-
-    # For every job from 1 to total job amount, y_i in [0,1]
-    for job_index in range(num_jobs):
-        bounds.append((0, 1))
-
-    # For every job from 1 to total job amount, t_i_tilde >= 0
-    for job_index in range(num_jobs):
-        bounds.append((0, None))
-
-    # For every job from 1 to total job amount, z_i in [0,1]
-    for job_index in range(num_jobs):
-        bounds.append((0, 1))
-    # I thought linprog is maximizing by default, but it turns out it is minimizing by default. Therefore we need to negate the objective function coefficients to convert our maximization problem into a minimization problem.
-    objective_function_coefficients = [-coeff for coeff in objective_function_coefficients]
-
-    res = linprog(c=objective_function_coefficients, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method='highs')
-    # res = linprog(c=objective_function_coefficients, A_ub=A_ub, b_ub=b_ub, A_eq=None, b_eq=None, bounds=bounds, method='highs')
-    
+    max_completion_time = params["d_i"] + params["t_i_asterisk"]
+    owner, t = _ranges(max_completion_time, np.full(num_jobs, T))
+    A_eq.add_rows(num_jobs, rows=owner, columns=owner * T + t, values=1, rhs=0)
+
+
+def prefix_of(schedule: Schedule) -> np.ndarray:
+    '''
+    The decided part of a (partial) schedule as an array of job indices (position in schedule.jobs),
+    one entry for every time slot up to and including schedule.t. Idle time slots are -1.
+    '''
+    num_fixed = min(schedule.t + 1, schedule.T)
+    return schedule.slots[:max(num_fixed, 0)].astype(np.int64)
+
+
+def _fix_prefix(x_bounds: np.ndarray, prefix: np.ndarray, num_jobs: int, num_time_slots: int):
+    '''
+    Bounds for x_i_t (in place): every time slot of the prefix is already decided,
+    so x_i_t is fixed to 1 for the job that got that slot and to 0 for all others. The remaining slots stay in [0, 1].
+    '''
+    x_bounds = x_bounds.reshape(num_jobs, num_time_slots, 2)
+    x_bounds[:, :len(prefix), 1] = 0
+    scheduled_slots = np.nonzero(prefix >= 0)[0]
+    x_bounds[prefix[scheduled_slots], scheduled_slots, :] = 1
+
+
+def _prefix_bounds(schedule: Schedule, num_jobs: int) -> np.ndarray:
+    '''Bounds for x_i_t given the partial schedule, see `_fix_prefix`.'''
+    bounds = np.zeros((num_jobs * schedule.T, 2))
+    bounds[:, 1] = 1
+    _fix_prefix(bounds, prefix_of(schedule), num_jobs, schedule.T)
+    return bounds
+
+
+def build_LP_linear(schedule: Schedule):
+    '''
+    Build the LP relaxation for linear penalty functions as sparse matrices.
+
+    Variables (in this order): x_i_t (job i at time slot t, flattened job-major), y_i (job i accepted),
+    t_i_tilde (tardiness of job i) and z_i (job i is late, pays the intercept).
+
+    Returns (c, A_ub, b_ub, A_eq, b_eq, bounds) in the form scipy.optimize.linprog expects,
+    with c already negated since linprog minimizes.
+    '''
+    params = _job_parameters(schedule)
+    num_jobs = len(schedule.jobs)
+    T = num_time_slots = schedule.T
+
+    job_indices = np.arange(num_jobs)
+    y_i_index = num_jobs * T + job_indices
+    t_i_tilde_index = num_jobs * T + num_jobs + job_indices
+    z_i_index = num_jobs * T + 2 * num_jobs + job_indices
+    total_num_decision_variables = num_jobs * T + 3 * num_jobs
+
+    # objective: x_i_t does not appear, y_i has w_i_hat, t_i_tilde has -slope and z_i has -intercept
+    f_i_slope = np.array([job.penalty_function.parameters["slope"] for job in schedule.jobs], dtype=float)
+    f_i_intercept = np.array([job.penalty_function.parameters["intercept"] for job in schedule.jobs], dtype=float)
+    objective_function_coefficients = np.concatenate([np.zeros(num_jobs * T), params["w_i_hat"], -f_i_slope, -f_i_intercept])
+
+    A_ub = _SparseRows(total_num_decision_variables)
+    A_eq = _SparseRows(total_num_decision_variables)
+
+    # ub constraint number one (capacity) and all the equality constraints
+    _add_shared_constraints(A_ub, A_eq, params, num_jobs, num_time_slots)
+
+    # ub constraint number two: For every job i, z_i <= t_i_tilde
+    A_ub.add_rows(
+        num_jobs,
+        rows=np.concatenate([job_indices, job_indices]),
+        columns=np.concatenate([z_i_index, t_i_tilde_index]),
+        values=np.concatenate([np.ones(num_jobs), -np.ones(num_jobs)]),
+        rhs=0
+    )
+
+    # ub constraint number three: For every job i, sum of x_i_t over t after d_i to the horizon <= z_i * p_i
+    # (a job whose last time slot is d_i itself is not late, see Schedule.score)
+    owner, t = _ranges(params["d_i"] + 1, np.full(num_jobs, T))
+    A_ub.add_rows(
+        num_jobs,
+        rows=np.concatenate([owner, job_indices]),
+        columns=np.concatenate([owner * T + t, z_i_index]),
+        values=np.concatenate([np.ones(len(owner)), -params["p_i"]]),
+        rhs=0
+    )
+
+    # ub constraint number four: For every job i, for every time slot t from d_i to the horizon, x_i_t * (t - d_i) <= t_i_tilde
+    # one row per (i, t) pair, in the same job-major order as the x_i_t variables
+    owner, t = _ranges(params["d_i"], np.full(num_jobs, T))
+    row = np.arange(len(owner))
+    A_ub.add_rows(
+        len(owner),
+        rows=np.concatenate([row, row]),
+        columns=np.concatenate([owner * T + t, t_i_tilde_index[owner]]),
+        values=np.concatenate([t - params["d_i"][owner], -np.ones(len(owner))]),
+        rhs=0
+    )
+
+    # bounds: x_i_t from the partial schedule, y_i in [0,1], t_i_tilde >= 0, z_i in [0,1]
+    bounds = np.concatenate([
+        _prefix_bounds(schedule, num_jobs),
+        np.tile([0, 1], (num_jobs, 1)),
+        np.tile([0, np.inf], (num_jobs, 1)),
+        np.tile([0, 1], (num_jobs, 1)),
+    ])
+
+    A_ub, b_ub = A_ub.to_csr()
+    A_eq, b_eq = A_eq.to_csr()
+
+    # linprog is minimizing, so we negate the objective function coefficients of our maximization problem
+    return -objective_function_coefficients, A_ub, b_ub, A_eq, b_eq, bounds
+
+
+def build_LP_per_timeslot(schedule: Schedule):
+    '''
+    Build the LP relaxation for per-timeslot penalty functions as sparse matrices.
+
+    Variables (in this order): x_i_t, y_i and tilde{t_i^{(j)}} for every job i and tardiness level j in 0..t_i_asterisk.
+    The penalty a_i^{(j)} of tardiness level j is the penalty function at j, and 0 for j = 0 (job on time).
+
+    Returns (c, A_ub, b_ub, A_eq, b_eq, bounds) like `build_LP_linear`.
+    '''
+    params = _job_parameters(schedule)
+    num_jobs = len(schedule.jobs)
+    T = num_time_slots = schedule.T
+
+    job_indices = np.arange(num_jobs)
+
+    # Calculate penalty values a_i^{(j)} for each job i and each tardiness level j
+    a_i_j = []
+    for job_instance in schedule.jobs:
+        # table[0] = 0: no penalty if the job is on time
+        a_i_j.append(job_instance.penalty_function.table(int(job_instance.t_i_asterisk)))
+
+    num_levels = np.array([len(penalties) for penalties in a_i_j], dtype=np.int64)
+    # first tilde{t_i^{(0)}} variable of every job
+    tilde_t_base = num_jobs * T + num_jobs + np.cumsum(num_levels) - num_levels
+    total_num_decision_variables = num_jobs * T + num_jobs + int(num_levels.sum())
+
+    objective_function_coefficients = np.concatenate(
+        [np.zeros(num_jobs * T), params["w_i_hat"]] + [-np.asarray(penalties, dtype=float) for penalties in a_i_j]
+    )
+
+    A_ub = _SparseRows(total_num_decision_variables)
+    A_eq = _SparseRows(total_num_decision_variables)
+
+    # Constraint 1 (capacity) and all the equality constraints
+    _add_shared_constraints(A_ub, A_eq, params, num_jobs, num_time_slots)
+
+    # Constraint 2: sum_{j=0}^{t_i^*} tilde{t_i^{(j)}} <= 1 for all i
+    level_owner, level = _ranges(np.zeros(num_jobs, dtype=np.int64), num_levels)
+    A_ub.add_rows(num_jobs, rows=level_owner, columns=tilde_t_base[level_owner] + level, values=1, rhs=1)
+
+    # Constraint 3: x_{i,t} * (t - d_i) - sum_j j * tilde{t_i^{(j)}} <= 0 for all i, for all t >= d_i
+    owner, t = _ranges(params["d_i"], np.full(num_jobs, T))
+    row = np.arange(len(owner))
+    # every row of job i repeats all tardiness levels of job i
+    levels_per_row = num_levels[owner]
+    level_row, level_in_row = _ranges(np.zeros(len(owner), dtype=np.int64), levels_per_row)
+    A_ub.add_rows(
+        len(owner),
+        rows=np.concatenate([row, level_row]),
+        columns=np.concatenate([owner * T + t, tilde_t_base[owner[level_row]] + level_in_row]),
+        values=np.concatenate([t - params["d_i"][owner], -level_in_row]),
+        rhs=0
+    )
+
+    # bounds: x_i_t from the partial schedule, y_i and tilde{t_i^{(j)}} in [0,1]
+    bounds = np.concatenate([
+        _prefix_bounds(schedule, num_jobs),
+        np.tile([0, 1], (num_jobs + int(num_levels.sum()), 1)),
+    ])
+
+    A_ub, b_ub = A_ub.to_csr()
+    A_eq, b_eq = A_eq.to_csr()
+
+    return -objective_function_coefficients, A_ub, b_ub, A_eq, b_eq, bounds
+
+
+def _step_levels(job: Job) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    Tardiness levels j (and their penalties a_i^{(j)}) of job i that the interval formulation keeps:
+    the last level of every step of the penalty function in 0..t_i_asterisk. Moving weight from level j to a later level
+    with the same penalty only loosens the tardiness constraints, so the other levels never improve the LP.
+    '''
+    penalties = np.asarray(job.penalty_function.table(int(job.t_i_asterisk)), dtype=float)
+    last_of_step = np.append(penalties[1:] != penalties[:-1], True)
+    levels = np.nonzero(last_of_step)[0]
+    return levels, penalties[levels]
+
+
+def build_LP_intervals(schedule: Schedule):
+    '''
+    Build the LP relaxation over the intervals between consecutive event points instead of single time slots.
+
+    The event points are the release times r_i, the first late time slots d_i + 1, the ends d_i + t_i_asterisk of the
+    schedulable windows, the end of the prefix (schedule.t + 1) and T. Every job is either allowed in a whole interval
+    or in none of it, so x_i_k (amount of job i in interval k, at most its length L_k) only exists where job i is allowed,
+    and the size of the model depends on the number of events instead of T.
+
+    Variables (in this order): x_i_k, y_i, then per job either t_i_tilde and z_i (linear penalty)
+    or tilde{t_i^{(j)}} for the levels of `_step_levels` (per-timeslot penalty), so both kinds can be mixed.
+
+    Tardiness: if an integral schedule gives job i x slots of a late interval k = [e_k, e_k + L_k), its last slot is at
+    least e_k + x - 1, so its tardiness is at least (e_k - d_i - 1) + x >= x * (e_k - d_i - 1 + L_k) / L_k
+    (as x <= L_k). This is the row per (job, late interval); for intervals of length 1 it is the time-indexed row.
+    The decided prefix is not split into intervals: every job gets its number of prefix slots as a constant,
+    and the tardiness of its last prefix slot as a lower bound.
+
+    Returns (c, A_ub, b_ub, A_eq, b_eq, bounds) like `build_LP_linear`.
+    '''
+    params = _job_parameters(schedule)
+    num_jobs = len(schedule.jobs)
+    T = schedule.T
+    job_indices = np.arange(num_jobs)
+
+    # slots and tardiness of the prefix per job
+    prefix = prefix_of(schedule)
+    start = len(prefix)
+    done = np.bincount(prefix[prefix >= 0], minlength=num_jobs)
+    last_prefix_slot = np.full(num_jobs, -1, dtype=np.int64)
+    np.maximum.at(last_prefix_slot, prefix[prefix >= 0], np.nonzero(prefix >= 0)[0])
+    prefix_tardiness = np.where(last_prefix_slot >= 0, np.maximum(last_prefix_slot - params["d_i"], 0), 0)
+
+    # intervals [events[k], events[k + 1]) after the prefix
+    window_end = params["d_i"] + params["t_i_asterisk"]
+    events = np.concatenate([[start, T], params["r_i"], params["d_i"] + 1, window_end])
+    events = np.unique(np.clip(events, start, T))
+    interval_start, interval_length = events[:-1], np.diff(events)
+    num_intervals = len(interval_start)
+
+    # x_i_k for every job and every interval inside its schedulable window, job-major
+    allowed = (params["r_i"][:, None] <= interval_start[None, :]) & (interval_start[None, :] < window_end[:, None])
+    x_job, x_interval = np.nonzero(allowed)
+    num_x = len(x_job)
+    x_start, x_length = interval_start[x_interval], interval_length[x_interval]
+
+    linear = np.array([job.penalty_function.function_type == "linear" for job in schedule.jobs])
+    linear_jobs = np.nonzero(linear)[0]
+    step_jobs = np.nonzero(~linear)[0]
+    y_i_index = num_x + job_indices
+    t_i_tilde_index = np.full(num_jobs, -1, dtype=np.int64)
+    z_i_index = np.full(num_jobs, -1, dtype=np.int64)
+    t_i_tilde_index[linear_jobs] = num_x + num_jobs + np.arange(len(linear_jobs))
+    z_i_index[linear_jobs] = num_x + num_jobs + len(linear_jobs) + np.arange(len(linear_jobs))
+
+    step_levels = [_step_levels(schedule.jobs[job_index]) for job_index in step_jobs]
+    num_levels = np.array([len(levels) for levels, _ in step_levels], dtype=np.int64)
+    level_base = np.zeros(num_jobs, dtype=np.int64)
+    level_base[step_jobs] = num_x + num_jobs + 2 * len(linear_jobs) + np.cumsum(num_levels) - num_levels
+    total_num_decision_variables = num_x + num_jobs + 2 * len(linear_jobs) + int(num_levels.sum())
+
+    f_i_slope = np.array([schedule.jobs[job_index].penalty_function.parameters["slope"] for job_index in linear_jobs], dtype=float)
+    f_i_intercept = np.array([schedule.jobs[job_index].penalty_function.parameters["intercept"] for job_index in linear_jobs], dtype=float)
+    objective_function_coefficients = np.concatenate(
+        [np.zeros(num_x), params["w_i_hat"], -f_i_slope, -f_i_intercept] + [-penalties for _, penalties in step_levels]
+    )
+
+    A_ub = _SparseRows(total_num_decision_variables)
+    A_eq = _SparseRows(total_num_decision_variables)
+
+    # capacity: for every interval k, sum of x_i_k over all jobs <= L_k
+    A_ub.add_rows(num_intervals, rows=x_interval, columns=np.arange(num_x), values=1, rhs=interval_length)
+
+    # for every job i, prefix slots + sum of x_i_k over all k == y_i * p_i
+    A_eq.add_rows(
+        num_jobs,
+        rows=np.concatenate([x_job, job_indices]),
+        columns=np.concatenate([np.arange(num_x), y_i_index]),
+        values=np.concatenate([np.ones(num_x), -params["p_i"]]),
+        rhs=-done
+    )
+
+    # tardiness: for every job i and every interval k after d_i, x_i_k * (e_k - d_i - 1 + L_k) / L_k <= tardiness of job i
+    late = np.nonzero(x_start > params["d_i"][x_job])[0]
+    coefficient = (x_start[late] - params["d_i"][x_job[late]] - 1 + x_length[late]) / x_length[late]
+    late_linear = late[linear[x_job[late]]]
+    coefficient_linear = coefficient[linear[x_job[late]]]
+    late_step = late[~linear[x_job[late]]]
+    coefficient_step = coefficient[~linear[x_job[late]]]
+
+    # linear: x_i_k * coefficient <= t_i_tilde, sum of x_i_k over late k <= z_i * p_i and z_i <= t_i_tilde
+    row = np.arange(len(late_linear))
+    A_ub.add_rows(
+        len(late_linear),
+        rows=np.concatenate([row, row]),
+        columns=np.concatenate([late_linear, t_i_tilde_index[x_job[late_linear]]]),
+        values=np.concatenate([coefficient_linear, -np.ones(len(late_linear))]),
+        rhs=0
+    )
+    linear_row = np.arange(len(linear_jobs))
+    row_of_job = np.zeros(num_jobs, dtype=np.int64)
+    row_of_job[linear_jobs] = linear_row
+    A_ub.add_rows(
+        len(linear_jobs),
+        rows=np.concatenate([row_of_job[x_job[late_linear]], linear_row]),
+        columns=np.concatenate([late_linear, z_i_index[linear_jobs]]),
+        values=np.concatenate([np.ones(len(late_linear)), -params["p_i"][linear_jobs]]),
+        rhs=0
+    )
+    A_ub.add_rows(
+        len(linear_jobs),
+        rows=np.concatenate([linear_row, linear_row]),
+        columns=np.concatenate([z_i_index[linear_jobs], t_i_tilde_index[linear_jobs]]),
+        values=np.concatenate([np.ones(len(linear_jobs)), -np.ones(len(linear_jobs))]),
+        rhs=0
+    )
+
+    # per-timeslot: sum_j tilde{t_i^{(j)}} <= 1, x_i_k * coefficient <= sum_j j * tilde{t_i^{(j)}}
+    # and the tardiness of the prefix <= sum_j j * tilde{t_i^{(j)}}
+    level_owner, level = _ranges(np.zeros(len(step_jobs), dtype=np.int64), num_levels)
+    level_job = step_jobs[level_owner]
+    level_value = np.concatenate([levels for levels, _ in step_levels]) if len(step_jobs) > 0 else np.zeros(0)
+    A_ub.add_rows(len(step_jobs), rows=level_owner, columns=level_base[level_job] + level, values=1, rhs=1)
+
+    step_index = np.zeros(num_jobs, dtype=np.int64)
+    step_index[step_jobs] = np.arange(len(step_jobs))
+    rows_levels = num_levels[step_index[x_job[late_step]]]
+    level_row, level_in_row = _ranges(np.zeros(len(late_step), dtype=np.int64), rows_levels)
+    row = np.arange(len(late_step))
+    row_job = x_job[late_step][level_row]
+    level_offset = (np.cumsum(num_levels) - num_levels)[step_index[row_job]] + level_in_row
+    A_ub.add_rows(
+        len(late_step),
+        rows=np.concatenate([row, level_row]),
+        columns=np.concatenate([late_step, level_base[row_job] + level_in_row]),
+        values=np.concatenate([coefficient_step, -level_value[level_offset]]),
+        rhs=0
+    )
+    A_ub.add_rows(
+        len(step_jobs),
+        rows=level_owner,
+        columns=level_base[level_job] + level,
+        values=-level_value,
+        rhs=-prefix_tardiness[step_jobs]
+    )
+
+    # bounds: x_i_k in [0, L_k], y_i in [0,1], t_i_tilde and z_i at least what the prefix already costs,
+    # tilde{t_i^{(j)}} in [0,1]
+    bounds = np.concatenate([
+        np.column_stack([np.zeros(num_x), x_length]),
+        np.tile([0, 1], (num_jobs, 1)),
+        np.column_stack([prefix_tardiness[linear_jobs], np.full(len(linear_jobs), np.inf)]),
+        np.column_stack([(prefix_tardiness[linear_jobs] > 0).astype(float), np.ones(len(linear_jobs))]),
+        np.tile([0, 1], (int(num_levels.sum()), 1)),
+    ]).astype(float)
+
+    A_ub, b_ub = A_ub.to_csr()
+    A_eq, b_eq = A_eq.to_csr()
+
+    return -objective_function_coefficients, A_ub, b_ub, A_eq, b_eq, bounds
+
+
+def _solve(schedule: Schedule, c, A_ub, b_ub, A_eq, b_eq, bounds) -> float:
+    return _solve_with_linprog(c, A_ub, b_ub, A_eq, b_eq, bounds, len(schedule.jobs), schedule.T)
+
+
+def _solve_with_linprog(c, A_ub, b_ub, A_eq, b_eq, bounds, num_jobs: int, num_time_slots: int) -> float:
+    res = linprog(c=c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method='highs')
+
     # Check if the optimization was successful
     if not res.success:
         print(f"Linear program failed: {res.message}")
         print(f"Status: {res.status}")
         print(f"Number of jobs: {num_jobs}, Number of time slots: {num_time_slots}")
-        print(f"Number of decision variables: {total_num_decision_variables}")
-        print(f"Number of inequality constraints: {len(A_ub)}")
-        print(f"Number of equality constraints: {len(A_eq)}")
+        print(f"Number of decision variables: {len(c)}")
+        print(f"Number of inequality constraints: {A_ub.shape[0]}")
+        print(f"Number of equality constraints: {A_eq.shape[0]}")
         raise ValueError(f"Linear program optimization failed: {res.message}")
-    
+
     return -res.fun  # negate back to get the maximized value
 
 
+def LP_linear(schedule: Schedule) -> float:
+    '''
+    LP relaxation for linear penalty functions.
+
+    Objective:
+    max sum_i w_hat_i * y_i - sum_i slope_i * t_i_tilde - sum_i intercept_i * z_i
+    '''
+    return _solve(schedule, *build_LP_linear(schedule))
+
+
 def LP_per_timeslot(schedule: Schedule) -> float:
     """
     LP formulation based on per-timeslot penalty function.
-    
+
     Variables:
     - x_{i,t}: binary variable indicating if job i is scheduled at time t
     - y_i: binary variable indicating if job i is accepted
     - tilde{t_i^{(j)}}: binary variable indicating if job i has tardiness level j
-    
+
     Objective:
     max sum_i w_hat_i * y_i - sum_i sum_j tilde{t_i^{(j)}} * a_i^{(j)}
-    
+
     where a_i^{(j)} is the penalty for job i at tardiness level j
     """
-    w_i_hat = [job_instance.reward + job_instance.drop_penalty for job_instance in schedule.jobs]
+    return _solve(schedule, *build_LP_per_timeslot(schedule))
 
-    num_jobs = len(schedule.jobs)
 
-    # r_i is the release time of job i, a fixed value
-    r_i = [job_instance.release_time for job_instance in schedule.jobs]
-    t_i_asterisk = [job_instance.t_i_asterisk for job_instance in schedule.jobs]
-    # d_i is the deadline of job i, a fixed value
-    d_i = [job_instance.deadline for job_instance in schedule.jobs]
-
-    # p_i is the processing time of job i, a fixed value
-    p_i = [job_instance.processing_time for job_instance in schedule.jobs]
+class LPBoundModel:
+    '''
+    The LP relaxation of one instance, built once from the root schedule.
 
-    num_time_slots = schedule.T
-    
-    # Calculate penalty values a_i^{(j)} for each job i and each tardiness level j
-    # a_i^{(j)} is the penalty when job i is tardy by j time slots
-    a_i_j = []
-    for job_instance in schedule.jobs:
-        penalties_for_job = []
-        for j in range(int(job_instance.t_i_asterisk) + 1):
-            # Penalty at tardiness level j
-            penalty = job_instance.penalty_function.calculate(j)
-            penalties_for_job.append(penalty)
-        a_i_j.append(penalties_for_job)
-    
-    # Decision variables structure:
-    # 1. x_{i,t} for all jobs i and time slots t: num_jobs * num_time_slots variables
-    # 2. y_i for all jobs i: num_jobs variables
-    # 3. tilde{t_i^{(j)}} for all jobs i and tardiness levels j (0 to t_i_asterisk): sum_i (t_i_asterisk_i + 1) variables
-    
-    # Construct objective function coefficients
-    # x_{i,t} coefficients: all 0 (don't appear in objective)
-    x_i_t_coefficients = [0] * (num_jobs * num_time_slots)
-    
-    # y_i coefficients: w_i_hat
-    y_i_coefficients = w_i_hat.copy()
-    
-    # tilde{t_i^{(j)}} coefficients: -a_i^{(j)}
-    tilde_t_i_j_coefficients = []
-    for job_index in range(num_jobs):
-        for j in range(len(a_i_j[job_index])):
-            tilde_t_i_j_coefficients.append(-a_i_j[job_index][j])
-    
-    # Combine all coefficients
-    objective_function_coefficients = x_i_t_coefficients + y_i_coefficients + tilde_t_i_j_coefficients
-    
-    total_num_decision_variables = len(objective_function_coefficients)
-    
-    # Helper function to get variable index for tilde{t_i^{(j)}}
-    def get_tilde_t_index(job_idx, tardiness_level):
-        base_index = num_jobs * num_time_slots + num_jobs
-        offset = sum(len(a_i_j[i]) for i in range(job_idx))
-        return base_index + offset + tardiness_level
-    
-    # Construct constraints
-    A_ub = []  # inequality constraints (<=)
-    b_ub = []
-    A_eq = []  # equality constraints (==)
-    b_eq = []
-    
-    # Constraint 1: sum_i x_{i,t} <= 1 for all t (resource capacity)
-    for t in range(num_time_slots):
-        constraint_row = [0] * total_num_decision_variables
-        for job_index in range(num_jobs):
-            variable_index = job_index * num_time_slots + t
-            constraint_row[variable_index] = 1
-        A_ub.append(constraint_row)
-        b_ub.append(1)
-    
-    # Constraint 2: sum_{t'=0}^{t_i^*} tilde{t_i^{(t')}} <= 1 for all i
-    for job_index in range(num_jobs):
-        constraint_row = [0] * total_num_decision_variables
-        for j in range(len(a_i_j[job_index])):
-            tilde_t_idx = get_tilde_t_index(job_index, j)
-            constraint_row[tilde_t_idx] = 1
-        A_ub.append(constraint_row)
-        b_ub.append(1)
-    
-    # Constraint 3: x_{i,t} * (t - d_i) <= sum_{t'=1}^T (t' - d_i) * tilde{t_i^{(t')}}
-    # This is: x_{i,t} * (t - d_i) - sum_{t'=1}^T (t' - d_i) * tilde{t_i^{(t')}} <= 0
-    # for all i, for all t >= d_i
-    for job_index in range(num_jobs):
-        deadline = d_i[job_index]
-        for t_0_based in range(deadline, num_time_slots):
-            constraint_row = [0] * total_num_decision_variables
-            
-            # Coefficient for x_{i,t}
-            x_i_t_variable_index = job_index * num_time_slots + t_0_based
-            # t_0_based is 0-indexed, but represents time slot t_0_based+1 in 1-indexed
-            # Actually, looking at the code, it seems t_0_based is used directly as the time value
-            constraint_row[x_i_t_variable_index] = t_0_based - deadline
-            
-            # Coefficients for tilde{t_i^{(t')}}
-            # Note: tardiness level j corresponds to being tardy by j time slots
-            # So if job completes at time (deadline + j), tardiness is j
-            for j in range(len(a_i_j[job_index])):
-                tilde_t_idx = get_tilde_t_index(job_index, j)
-                # t' - d_i = j (tardiness level)
-                constraint_row[tilde_t_idx] = -j
-            
-            A_ub.append(constraint_row)
-            b_ub.append(0)
-    
-    # Equality Constraint 1: sum_t x_{i,t} = y_i * p_i for all i
-    for job_index in range(num_jobs):
-        constraint_row = [0] * total_num_decision_variables
-        # Coefficients for x_{i,t}
-        for t in range(num_time_slots):
-            variable_index = job_index * num_time_slots + t
-            constraint_row[variable_index] = 1
-        # Coefficient for y_i
-        y_i_variable_index = num_jobs * num_time_slots + job_index
-        constraint_row[y_i_variable_index] = -p_i[job_index]
-        A_eq.append(constraint_row)
-        b_eq.append(0)
-    
-    # Equality Constraint 2: sum_{t=1}^{r_i-1} x_{i,t} = 0 for all i (release time)
-    for job_index in range(num_jobs):
-        constraint_row = [0] * total_num_decision_variables
-        if r_i[job_index] > 0:
-            for t in range(r_i[job_index]):
-                variable_index = job_index * num_time_slots + t
-                constraint_row[variable_index] = 1
-        A_eq.append(constraint_row)
-        b_eq.append(0)
-    
-    # Equality Constraint 3: sum_{t=t_i^*}^T x_{i,t} = 0 for all i (maximum tardiness)
-    # Note: t_i^* means deadline + t_i_asterisk
-    for job_index in range(num_jobs):
-        constraint_row = [0] * total_num_decision_variables
-        max_completion_time = d_i[job_index] + int(t_i_asterisk[job_index])
-        if max_completion_time < num_time_slots:
-            for t in range(max_completion_time, num_time_slots):
-                variable_index = job_index * num_time_slots + t
-                constraint_row[variable_index] = 1
-        A_eq.append(constraint_row)
-        b_eq.append(0)
-    
-    # Bounds for variables
-    bounds = []
-    
-    # Bounds for x_{i,t}: [0,1] or fixed based on current schedule
-    for job_index in range(num_jobs):
-        for t_0_based in range(num_time_slots):
-            if t_0_based <= schedule.t:
-                if schedule.schedule[t_0_based] is not None:
-                    scheduled_job = schedule.schedule[t_0_based]
-                    index_of_scheduled_job = schedule.jobs.index(schedule.get_job_from_id(scheduled_job))
-                    if index_of_scheduled_job == job_index:
-                        bounds.append((1, 1))
-                    else:
-                        bounds.append((0, 0))
-                else:
-                    bounds.append((0, 0))
-            else:
-                bounds.append((0, 1))
-    
-    # Bounds for y_i: [0,1]
-    for job_index in range(num_jobs):
-        bounds.append((0, 1))
-    
-    # Bounds for tilde{t_i^{(j)}}: [0,1]
-    for job_index in range(num_jobs):
-        for j in range(len(a_i_j[job_index])):
-            bounds.append((0, 1))
-    
-    # Negate objective coefficients for minimization
-    objective_function_coefficients = [-coeff for coeff in objective_function_coefficients]
-    
-    res = linprog(c=objective_function_coefficients, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method='highs')
-    
-    # Check if the optimization was successful
-    if not res.success:
-        print(f"Linear program failed: {res.message}")
-        print(f"Status: {res.status}")
-        print(f"Number of jobs: {num_jobs}, Number of time slots: {num_time_slots}")
-        print(f"Number of decision variables: {total_num_decision_variables}")
-        print(f"Number of inequality constraints: {len(A_ub)}")
-        print(f"Number of equality constraints: {len(A_eq)}")
-        raise ValueError(f"Linear program optimization failed: {res.message}")
-    
-    return -res.fun  # negate back to get the maximized value
+    Across the branch and bound tree only the bounds of x_i_t change (the prefix up to schedule.t is fixed),
+    so we keep the objective and constraint matrices and only produce a new bound vector per node.
+    If highspy is installed, the model is passed to HiGHS once and every solve only changes column bounds,
+    optionally warm-starting from a given basis (e.g. the parent's).
+    '''
+    def __init__(self, schedule: Schedule, use_highspy: Optional[bool] = None):
+        self.num_jobs = len(schedule.jobs)
+        self.T = schedule.T
+        self.job_index_from_id = {job.id: job_index for job_index, job in enumerate(schedule.jobs)}
+
+        root = schedule.copy()
+        root.t = -1
+        if all(job.penalty_function.function_type == "linear" for job in schedule.jobs):
+            self.c, self.A_ub, self.b_ub, self.A_eq, self.b_eq, self.root_bounds = build_LP_linear(root)
+        else:
+            self.c, self.A_ub, self.b_ub, self.A_eq, self.b_eq, self.root_bounds = build_LP_per_timeslot(root)
+        self.num_x_variables = self.num_jobs * self.T
+
+        if use_highspy is None:
+            use_highspy = highspy is not None
+        elif use_highspy and highspy is None:
+            raise ImportError("highspy is not installed")
+
+        self.highs = self._build_highs() if use_highspy else None
+        # basis of the last solve, only available with highspy
+        self.basis = None
+        # by default HiGHS starts from the basis of the previous solve. Without it, the result of a solve
+        # does not depend on the solves before it (used by the deterministic parallel search)
+        self.hot_start = True
+        # number of solves and the time spent in them (in seconds)
+        self.num_solves = 0
+        self.solve_time = 0.0
+
+    def _build_highs(self):
+        lp = highspy.HighsLp()
+        lp.num_col_ = len(self.c)
+        lp.num_row_ = self.A_ub.shape[0] + self.A_eq.shape[0]
+        lp.col_cost_ = self.c
+        lp.col_lower_ = self.root_bounds[:, 0]
+        lp.col_upper_ = np.where(np.isinf(self.root_bounds[:, 1]), highspy.kHighsInf, self.root_bounds[:, 1])
+        # inequality rows are (-inf, b_ub], equality rows are [b_eq, b_eq]
+        lp.row_lower_ = np.concatenate([np.full(self.A_ub.shape[0], -highspy.kHighsInf), self.b_eq])
+        lp.row_upper_ = np.concatenate([self.b_ub, self.b_eq])
+
+        A = sparse.vstack([self.A_ub, self.A_eq], format="csr")
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.num_col_ = lp.num_col_
+        lp.a_matrix_.num_row_ = lp.num_row_
+        lp.a_matrix_.start_ = A.indptr
+        lp.a_matrix_.index_ = A.indices
+        lp.a_matrix_.value_ = A.data
+
+        highs = highspy.Highs()
+        highs.setOptionValue("output_flag", False)
+        highs.passModel(lp)
+        return highs
+
+    def bounds(self, prefix: np.ndarray) -> np.ndarray:
+        '''Bound vector of all variables for a node whose decided time slots are `prefix` (see `prefix_of`).'''
+        bounds = self.root_bounds.copy()
+        _fix_prefix(bounds[:self.num_x_variables], prefix, self.num_jobs, self.T)
+        return bounds
+
+    def upper_bound(self, schedule: Schedule, basis=None) -> float:
+        return self.upper_bound_from_prefix(prefix_of(schedule), basis)
+
+    def upper_bound_from_prefix(self, prefix: np.ndarray, basis=None) -> float:
+        '''
+        Solve the LP relaxation of the node given by its prefix.
+        `basis` is only used with highspy: the solve is warm-started from it, afterwards self.basis holds the new optimal basis.
+        '''
+        start = time.perf_counter()
+        try:
+            return self._upper_bound_from_prefix(prefix, basis)
+        finally:
+            self.num_solves += 1
+            self.solve_time += time.perf_counter() - start
+
+    def _upper_bound_from_prefix(self, prefix: np.ndarray, basis=None) -> float:
+        if self.highs is None:
+            bounds = self.bounds(prefix)
+            return _solve_with_linprog(self.c, self.A_ub, self.b_ub, self.A_eq, self.b_eq, bounds, self.num_jobs, self.T)
+
+        x_bounds = self.bounds(prefix)[:self.num_x_variables]
+        self.highs.changeColsBounds(
+            self.num_x_variables, np.arange(self.num_x_variables, dtype=np.int32), x_bounds[:, 0], x_bounds[:, 1]
+        )
+        if not self.hot_start:
+            self.highs.clearSolver()
+        elif basis is not None:
+            self.highs.setBasis(basis)
+        self.highs.run()
+
+        status = self.highs.getModelStatus()
+        if status != highspy.HighsModelStatus.kOptimal:
+            print(f"Linear program failed: {self.highs.modelStatusToString(status)}")
+            print(f"Number of jobs: {self.num_jobs}, Number of time slots: {self.T}")
+            raise ValueError(f"Linear program optimization failed: {self.highs.modelStatusToString(status)}")
+
+        self.basis = self.highs.getBasis()
+        return -self.highs.getInfo().objective_function_value
+
+
+def LP_intervals(schedule: Schedule) -> float:
+    '''
+    LP relaxation over the intervals between event points, see `build_LP_intervals`.
+    Its size depends on the number of release times and deadlines instead of the horizon T.
+    It is a different relaxation than LP_linear / LP_per_timeslot: not always tighter or looser, but always an upper bound.
+    '''
+    return _solve(schedule, *build_LP_intervals(schedule))
 
 
-def get_upper_bound_by_LP(schedule: Schedule) -> float:
+def get_upper_bound_by_LP(schedule: Schedule, formulation: str = "time-indexed") -> float:
     '''
-    Compute an upper bound for the job assignment using a linear programming relaxation (the original problem is an integer linear programming problem). 
+    Compute an upper bound for the job assignment using a linear programming relaxation (the original problem is an integer linear programming problem).
     The computation is done via scipy.optimize.linprog for linear programming.
+    formulation: "time-indexed" (one variable per job and time slot) or "intervals" (see `LP_intervals`).
     '''
+    if formulation == "intervals":
+        return LP_intervals(schedule)
+    if formulation != "time-indexed":
+        raise ValueError(f"Unknown LP formulation: {formulation}")
+
     # if penalty functions are all linear
     if all(job.penalty_function.function_type == "linear" for job in schedule.jobs):
         return LP_linear(schedule)
 
     # if penalty functions are all per-timeslot
     return LP_per_timeslot(schedule)
-    
@@ -0,0 +1,187 @@
+from src.algorithms.our.search_node import SearchNode, SearchTree
+
+import bisect
+import time
+
+from typing import List, Optional, Tuple
+
+
+class LocalSearch:
+    '''
+    Improves a complete schedule (the time slots after node.t, as job indices with -1 for idle) by local search.
+
+    The score of a schedule is the score of node plus the contribution of every job: its gain (see SearchTree.gain)
+    if all of its remaining processing time is scheduled, with the last of its time slots as completion time, and 0 otherwise.
+    A move only changes the time slots of one or two jobs, so we keep the (sorted) time slots of every job and
+    compute the change of the score (the delta) from the jobs it touches only.
+
+    Moves, in the order they are tried:
+    - drop: remove a job whose contribution is negative
+    - accept: schedule an unfinished job in the earliest idle time slots of its window (keeping the slots it already has)
+    - replace: drop a scheduled job to make room for an unfinished one, then try to schedule all unfinished jobs again
+      (the dropped one included), the whole move is undone if the score did not improve
+    - swap: exchange two adjacent blocks (maximal runs of the same job, idle runs included),
+      which also moves a block into an idle gap next to it
+    Only improving moves are applied, until no move improves the schedule or the time budget is used up.
+    '''
+    def __init__(self, tree: SearchTree, node: SearchNode, jobs: List[int], time_budget: float = 1.0):
+        self.tree = tree
+        self.t0 = node.t + 1
+        self.base_score = node.score
+        self.time_budget = time_budget
+        # remaining processing time of every job at node, this is what a job needs in the time slots after node.t
+        self.need = [int(remaining) for remaining in node.remaining]
+
+        self.jobs = list(jobs)
+        self.slots: List[List[int]] = [[] for _ in range(tree.num_jobs)]
+        for offset, job_index in enumerate(self.jobs):
+            if job_index >= 0:
+                self.slots[job_index].append(self.t0 + offset)
+        self.values = [self._value(job_index, self.slots[job_index]) for job_index in range(tree.num_jobs)]
+        # number of improving moves
+        self.moves = 0
+
+    @property
+    def score(self) -> float:
+        '''Score of the current schedule, in the score_rewritten scale.'''
+        return self.base_score + sum(self.values)
+
+    def _value(self, job_index: int, slots: List[int]) -> float:
+        if self.need[job_index] == 0 or len(slots) < self.need[job_index]:
+            return 0
+        return self.tree.gain(job_index, slots[-1])
+
+    def _feasible(self, job_index: int, t: int) -> bool:
+        return self.tree.release_time[job_index] <= t < self.tree.latest_time[job_index]
+
+    def _assign(self, job_index: int, slots: List[int]):
+        '''Replace the time slots of job_index by slots (sorted).'''
+        for t in self.slots[job_index]:
+            self.jobs[t - self.t0] = -1
+        for t in slots:
+            self.jobs[t - self.t0] = job_index
+        self.slots[job_index] = slots
+        self.values[job_index] = self._value(job_index, slots)
+
+    def _earliest_slots(self, job_index: int, freed: Optional[List[int]] = None) -> Optional[List[int]]:
+        '''The earliest time slots in the window of job_index that are idle, its own or in freed. None if there are not enough.'''
+        start = max(int(self.tree.release_time[job_index]), self.t0)
+        stop = min(int(self.tree.latest_time[job_index]), self.tree.T)
+        freed = set(freed) if freed else ()
+        slots = []
+        for t in range(start, stop):
+            occupant = self.jobs[t - self.t0]
+            if occupant == -1 or occupant == job_index or t in freed:
+                slots.append(t)
+                if len(slots) == self.need[job_index]:
+                    return slots
+        return None
+
+    def _drop(self) -> bool:
+        improved = False
+        for job_index in range(self.tree.num_jobs):
+            if self.values[job_index] < 0:
+                self._assign(job_index, [])
+                self.moves += 1
+                improved = True
+        return improved
+
+    def _accept(self, order: Optional[List[int]] = None) -> bool:
+        improved = False
+        for job_index in (range(self.tree.num_jobs) if order is None else order):
+            if self.need[job_index] == 0 or len(self.slots[job_index]) == self.need[job_index]:
+                continue
+            slots = self._earliest_slots(job_index)
+            if slots is not None and self._value(job_index, slots) > self.values[job_index]:
+                self._assign(job_index, slots)
+                self.moves += 1
+                improved = True
+        return improved
+
+    def _replace(self) -> bool:
+        # unfinished jobs are put back in order of their deadline
+        by_deadline = sorted(range(self.tree.num_jobs), key=lambda job_index: self.tree.deadline[job_index])
+        for job_index in range(self.tree.num_jobs):
+            if self.need[job_index] == 0 or len(self.slots[job_index]) == self.need[job_index]:
+                continue
+            for other in range(self.tree.num_jobs):
+                if other == job_index or len(self.slots[other]) == 0:
+                    continue
+                # only jobs that overlap the window of job_index can make room for it
+                if self.slots[other][-1] < self.tree.release_time[job_index] or self.slots[other][0] >= self.tree.latest_time[job_index]:
+                    continue
+                slots = self._earliest_slots(job_index, freed=self.slots[other])
+                if slots is None:
+                    continue
+
+                # apply the move and fill what is left with the unfinished jobs (including the one we dropped)
+                score = self.score
+                snapshot = list(self.jobs), [list(job_slots) for job_slots in self.slots], list(self.values)
+                self._assign(other, [])
+                self._assign(job_index, slots)
+                self._accept(by_deadline)
+                if self.score > score:
+                    self.moves += 1
+                    return True
+                # undo
+                self.jobs, self.slots, self.values = snapshot
+        return False
+
+    def _blocks(self) -> List[Tuple[int, int, int]]:
+        '''Maximal runs of the same job as (start, stop, job index), stop excluded.'''
+        blocks = []
+        start = self.t0
+        for offset in range(1, len(self.jobs) + 1):
+            if offset == len(self.jobs) or self.jobs[offset] != self.jobs[offset - 1]:
+                blocks.append((start, self.t0 + offset, self.jobs[offset - 1]))
+                start = self.t0 + offset
+        return blocks
+
+    def _moved_slots(self, job_index: int, old_start: int, old_stop: int, new_start: int) -> List[int]:
+        slots = [t for t in self.slots[job_index] if not old_start <= t < old_stop]
+        for t in range(new_start, new_start + old_stop - old_start):
+            bisect.insort(slots, t)
+        return slots
+
+    def _swap(self) -> bool:
+        improved = False
+        blocks = self._blocks()
+        k = 0
+        while k < len(blocks) - 1:
+            (start, middle, first), (_, stop, second) = blocks[k], blocks[k + 1]
+            # after the swap, the second block starts at start and the first block ends at stop
+            new_middle = start + stop - middle
+            if (first == -1 or all(self._feasible(first, t) for t in (new_middle, stop - 1))) and \
+               (second == -1 or all(self._feasible(second, t) for t in (start, new_middle - 1))):
+                delta = 0
+                new_slots = {}
+                if first != -1:
+                    new_slots[first] = self._moved_slots(first, start, middle, new_middle)
+                    delta += self._value(first, new_slots[first]) - self.values[first]
+                if second != -1:
+                    new_slots[second] = self._moved_slots(second, middle, stop, start)
+                    delta += self._value(second, new_slots[second]) - self.values[second]
+                if delta > 0:
+                    for job_index, slots in new_slots.items():
+                        self.slots[job_index] = slots
+                        self.values[job_index] = self._value(job_index, slots)
+                    self.jobs[start - self.t0:stop - self.t0] = [second] * (stop - middle) + [first] * (middle - start)
+                    self.moves += 1
+                    improved = True
+                    blocks = self._blocks()
+                    continue
+            k += 1
+        return improved
+
+    def run(self) -> Tuple[float, List[int]]:
+        '''Apply improving moves until there are none left (or the time budget is used up), returns (score, jobs).'''
+        deadline = time.perf_counter() + self.time_budget
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for move in [self._drop, self._accept, self._replace, self._swap]:
+                if move():
+                    improved = True
+                if time.perf_counter() >= deadline:
+                    break
+        return self.score, list(self.jobs)
@@ -0,0 +1,259 @@
+from src.job import Job
+
+import heapq
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class KineticTournament:
+    '''
+    Tournament tree over jobs whose priority changes every time slot, the job with the lowest (priority, index) wins.
+
+    Every internal node keeps the winner of its two subtrees at the current time and a certificate: the first time slot
+    at which the loser beats the winner. Certificates are kept in a heap, advancing the time only replays the nodes
+    whose certificate failed (and their ancestors). This is correct as long as two jobs swap order at most once
+    while both are in the tournament, which holds for priorities that are linear in t (late jobs with a linear penalty).
+    Leaves of removed jobs are reused, so the tree only grows with the number of jobs in it at the same time.
+    '''
+    def __init__(self, priority: Callable[[int, int], float], expiry: Callable[[int], int]):
+        # priority(t, job_index), expiry(job_index): first time slot the job is not in the tournament anymore
+        self.priority = priority
+        self.expiry = expiry
+        self.now = 0
+        self.size = 1
+        # winner[node] (-1 if the subtree is empty), the leaves are size..2*size-1
+        self.winner = [-1, -1]
+        self.version = [0, 0]
+        # leaf (offset from size) of every job in the tournament, and the leaves that are not in use
+        self.leaf: Dict[int, int] = {}
+        self.free_leaves: List[int] = [0]
+        # (time, node, version of the node when the certificate was made)
+        self.certificates: List[Tuple[int, int, int]] = []
+
+    def best(self) -> int:
+        '''Winner at the current time (-1 if empty).'''
+        return self.winner[1]
+
+    def _beats(self, a: int, b: int, t: int) -> bool:
+        return (self.priority(t, a), a) < (self.priority(t, b), b)
+
+    def _grow(self):
+        '''Double the number of leaves.'''
+        leaves = self.winner[self.size:]
+        self.free_leaves.extend(range(self.size, 2 * self.size))
+        self.size *= 2
+        self.winner = [-1] * self.size + leaves + [-1] * (self.size - len(leaves))
+        self.version = [0] * (2 * self.size)
+        self.certificates = []
+        for node in range(self.size - 1, 0, -1):
+            self._play(node)
+
+    def _play(self, node: int):
+        '''Recompute the winner of node from its children and make a new certificate for it.'''
+        left, right = self.winner[2 * node], self.winner[2 * node + 1]
+        self.version[node] += 1
+        if left < 0 or right < 0:
+            self.winner[node] = max(left, right)
+            return
+        winner, loser = (left, right) if self._beats(left, right, self.now) else (right, left)
+        self.winner[node] = winner
+
+        # first time slot the loser beats the winner, while both are still in the tournament
+        lo, hi = self.now + 1, min(self.expiry(winner), self.expiry(loser)) - 1
+        if lo > hi or not self._beats(loser, winner, hi):
+            return
+        while lo < hi:
+            middle = (lo + hi) // 2
+            if self._beats(loser, winner, middle):
+                hi = middle
+            else:
+                lo = middle + 1
+        heapq.heappush(self.certificates, (lo, node, self.version[node]))
+
+    def _replay(self, node: int):
+        while node >= 1:
+            self._play(node)
+            node //= 2
+
+    def insert(self, job_index: int):
+        if len(self.free_leaves) == 0:
+            self._grow()
+        leaf = self.free_leaves.pop()
+        self.leaf[job_index] = leaf
+        self.winner[self.size + leaf] = job_index
+        self._replay((self.size + leaf) // 2)
+
+    def remove(self, job_index: int):
+        leaf = self.leaf.pop(job_index)
+        self.free_leaves.append(leaf)
+        self.winner[self.size + leaf] = -1
+        self._replay((self.size + leaf) // 2)
+
+    def advance(self, t: int):
+        '''Move the current time to t (never backwards), replaying the nodes whose certificate failed on the way.'''
+        while len(self.certificates) > 0 and self.certificates[0][0] <= t:
+            time, node, version = heapq.heappop(self.certificates)
+            if version != self.version[node]:
+                continue
+            self.now = time
+            self._replay(node)
+        self.now = max(self.now, t)
+
+
+class OnlineEngine:
+    '''
+    Event-driven version of the decision rule of OurOnline: in every time slot, process the released, not yet completed job
+    with the lowest (priority, index) that can still be scheduled (release_time <= t < deadline + t_i_asterisk).
+
+    priority(t, job) is OurOnline.u_i. It only depends on t through the tardiness penalty c_i, which gives three kinds of jobs:
+    - on time (t <= deadline - processing_time) or late with a penalty that is constant in between breakpoints
+      (per-timeslot, or linear with slope 0): the priority is constant until the next event (late start, next breakpoint),
+      these jobs are in a heap, an event re-pushes the job with its new priority (older entries are skipped lazily)
+    - late with a linear penalty (slope > 0): the priority changes every time slot, these jobs are in a KineticTournament
+    Releases come from a heap as well, so every event costs O(log n), and a time slot without an event only compares two jobs.
+
+    Jobs are forgotten as soon as they are completed or expired, and the lazy heaps are compacted when most of their
+    entries are outdated, so the memory only depends on the number of jobs that are pending or active at the same time.
+    This makes the engine usable for streams of jobs with an unbounded horizon (see OurOnline.stream).
+    '''
+    def __init__(self, priority: Callable[[int, Job], float]):
+        self.priority = priority
+        # per-job state by job index, only for jobs that are not released yet or active
+        self.jobs: Dict[int, Job] = {}
+        # time slots left to process per job
+        self.remaining: Dict[int, int] = {}
+        # first time slot the job can not be scheduled anymore (deadline + t_i_asterisk, None if there is none)
+        self.expiry: Dict[int, Optional[int]] = {}
+        # whether the job is released (and neither completed nor expired)
+        self.active: Dict[int, bool] = {}
+        # (release time, job index) of jobs that are not released yet
+        self.releases: List[Tuple[int, int]] = []
+        # (priority, job index, version) and (time, job index, version), version as in self.versions
+        self.heap: List[Tuple[float, int, int]] = []
+        self.events: List[Tuple[int, int, int]] = []
+        self.versions: Dict[int, int] = {}
+        self.tournament = KineticTournament(lambda t, job_index: self.priority(t, self.jobs[job_index]), lambda job_index: self.expiry[job_index])
+        self.in_tournament: Dict[int, bool] = {}
+        self.t = 0
+        self.num_added = 0
+        self.num_active = 0
+
+    def __len__(self) -> int:
+        '''Number of jobs that are not released yet or active.'''
+        return len(self.jobs)
+
+    def add(self, job: Job) -> int:
+        '''
+        Add a job (released now or later), returns its index. Jobs added earlier win ties.
+        A job with a release time before the current time slot is released now.
+        '''
+        job_index = self.num_added
+        self.num_added += 1
+        self.jobs[job_index] = job
+        self.remaining[job_index] = job.processing_time
+        self.expiry[job_index] = None if job.t_i_asterisk is None else job.deadline + job.t_i_asterisk
+        self.active[job_index] = False
+        self.versions[job_index] = 0
+        heapq.heappush(self.releases, (job.release_time, job_index))
+        return job_index
+
+    def next_release(self) -> Optional[int]:
+        return self.releases[0][0] if len(self.releases) > 0 else None
+
+    def _update(self, job_index: int, t: int):
+        '''(Re)place an active job according to its priority from time slot t on, and schedule its next event.'''
+        job = self.jobs[job_index]
+        self.versions[job_index] += 1
+        version = self.versions[job_index]
+        penalty_function = job.penalty_function
+        # first time slot with a tardiness penalty, see OurOnline.c_i
+        late_start = job.deadline - job.processing_time + 1
+        if t >= late_start and penalty_function.function_type == "linear" and penalty_function.parameters["slope"] > 0:
+            self.in_tournament[job_index] = True
+            self.tournament.insert(job_index)
+            return
+
+        heapq.heappush(self.heap, (self.priority(t, job), job_index, version))
+        if t < late_start:
+            next_change = late_start
+        else:
+            # the tardiness OurOnline.c_i uses is t - deadline + processing_time
+            next_tardiness = penalty_function.next_breakpoint(t - job.deadline + job.processing_time)
+            next_change = None if next_tardiness is None else next_tardiness + job.deadline - job.processing_time
+        expiry = self.expiry[job_index]
+        if next_change is not None and (expiry is None or next_change < expiry):
+            heapq.heappush(self.events, (next_change, job_index, version))
+
+    def _retire(self, job_index: int):
+        '''Forget a completed or expired job, its entries in the heaps are skipped from now on.'''
+        if self.active[job_index]:
+            self.num_active -= 1
+        if self.in_tournament.pop(job_index, False):
+            self.tournament.remove(job_index)
+        for state in (self.jobs, self.remaining, self.expiry, self.active, self.versions):
+            del state[job_index]
+
+    def _is_current(self, job_index: int, version: int) -> bool:
+        return self.active.get(job_index, False) and self.versions[job_index] == version
+
+    def _compact(self):
+        '''Drop outdated entries once they are the majority of a heap, so the heaps stay proportional to the active jobs.'''
+        limit = 2 * self.num_active + 64
+        if len(self.heap) > limit:
+            self.heap = [entry for entry in self.heap if self._is_current(entry[1], entry[2])]
+            heapq.heapify(self.heap)
+        if len(self.events) > limit:
+            self.events = [entry for entry in self.events if entry[1] in self.active and (entry[2] == -1 or self._is_current(entry[1], entry[2]))]
+            heapq.heapify(self.events)
+
+    def advance(self, t: int):
+        '''Process all releases and events up to time slot t.'''
+        while True:
+            next_release = self.releases[0][0] if len(self.releases) > 0 else None
+            next_event = self.events[0][0] if len(self.events) > 0 else None
+            if next_release is not None and next_release <= t and (next_event is None or next_release <= next_event):
+                time, job_index = heapq.heappop(self.releases)
+                time = max(time, self.t)
+                self.tournament.advance(time)
+                expiry = self.expiry[job_index]
+                if expiry is not None and time >= expiry:
+                    self._retire(job_index)
+                    continue
+                self.active[job_index] = True
+                self.num_active += 1
+                if expiry is not None:
+                    heapq.heappush(self.events, (expiry, job_index, -1))
+                self._update(job_index, time)
+            elif next_event is not None and next_event <= t:
+                time, job_index, version = heapq.heappop(self.events)
+                self.tournament.advance(time)
+                if not self.active.get(job_index, False):
+                    continue
+                if version == -1:
+                    # expiry, the job can not be scheduled anymore
+                    self._retire(job_index)
+                elif version == self.versions[job_index]:
+                    self._update(job_index, time)
+            else:
+                break
+        self.tournament.advance(t)
+        self.t = t
+        self._compact()
+
+    def decide(self, t: int) -> Optional[int]:
+        '''Index of the job to process in time slot t (None if there is none), see process.'''
+        self.advance(t)
+        while len(self.heap) > 0 and not self._is_current(self.heap[0][1], self.heap[0][2]):
+            heapq.heappop(self.heap)
+
+        best = self.heap[0][1] if len(self.heap) > 0 else -1
+        challenger = self.tournament.best()
+        if best < 0 or (challenger >= 0 and (self.priority(t, self.jobs[challenger]), challenger) < (self.heap[0][0], best)):
+            best = challenger
+        return None if best < 0 else best
+
+    def process(self, job_index: int):
+        '''Process job_index for one time slot, it leaves the engine once it is completed.'''
+        self.remaining[job_index] -= 1
+        if self.remaining[job_index] == 0:
+            self._retire(job_index)
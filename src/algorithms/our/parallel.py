@@ -0,0 +1,408 @@
+from src.schedule import Schedule
+from src.algorithms.our.get_upper_bound_by_LP import LPBoundModel
+from src.algorithms.our.branch_and_bound import BranchAndBound
+from src.algorithms.our.frontier import Frontier
+from src.algorithms.our.dominance import DominanceTable
+from src.algorithms.our.search_node import SearchTree
+
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def process_context(preload: Optional[List[str]] = None):
+    '''
+    The multiprocessing context of all our worker processes: a fork server where the platform has one, spawn otherwise.
+    fork is not safe once the solver runs threads (e.g. tqdm's monitor). `preload`: modules the fork server imports
+    once (only when it starts), so that the workers forked from it do not import them again.
+    '''
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        if preload is not None:
+            context.set_forkserver_preload(preload)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+# Every worker process builds its own LPBoundModel once, from the schedule passed to the pool initializer.
+# Tasks then only carry the prefix of the parent node and the jobs of its children.
+_worker_model: Optional[LPBoundModel] = None
+
+
+def _init_worker(schedule: Schedule):
+    global _worker_model
+    _worker_model = LPBoundModel(schedule)
+
+
+def _upper_bounds(model: LPBoundModel, parent_prefix: np.ndarray, jobs: List[int]) -> List[float]:
+    '''Upper bounds of the children of a node: child k has the prefix of the parent plus jobs[k] in the next time slot.'''
+    prefix = np.append(parent_prefix, -1)
+    upper_bounds = []
+    for job in jobs:
+        prefix[-1] = job
+        upper_bounds.append(model.upper_bound_from_prefix(prefix))
+    return upper_bounds
+
+
+def _process_task(parent_prefix: np.ndarray, jobs: List[int]) -> List[float]:
+    return _upper_bounds(_worker_model, parent_prefix, jobs)
+
+
+class BoundEvaluator:
+    '''
+    Computes the LP upper bounds of a batch of sibling nodes in parallel.
+
+    With executor="process" every worker process gets the instance once (through the pool initializer) and keeps its own LP model.
+    With executor="thread" every thread builds its own LP model the first time it is used, HiGHS models are not shared between threads.
+    The parent basis is not passed to the workers, each worker warm-starts from the last LP it solved.
+    '''
+    def __init__(self, schedule: Schedule, workers: int, executor: str = "process"):
+        assert executor in ["process", "thread"], f"Executor must be either 'process' or 'thread'. Got {executor}"
+        self.schedule = schedule
+        self.workers = workers
+        self.executor = executor
+        self._thread_local = threading.local()
+
+        self.pool: Executor
+        if executor == "process":
+            self.pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=process_context(),
+                initializer=_init_worker,
+                initargs=(schedule,)
+            )
+        else:
+            self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def _thread_task(self, parent_prefix: np.ndarray, jobs: List[int]) -> List[float]:
+        model = getattr(self._thread_local, "model", None)
+        if model is None:
+            model = self._thread_local.model = LPBoundModel(self.schedule)
+        return _upper_bounds(model, parent_prefix, jobs)
+
+    def upper_bounds(self, parent_prefix: np.ndarray, jobs: List[int]) -> List[float]:
+        '''Upper bounds of all children of one node, in the order of `jobs`.'''
+        # split the siblings in (at most) one chunk per worker
+        chunks = [chunk.tolist() for chunk in np.array_split(np.asarray(jobs), min(self.workers, len(jobs))) if len(chunk) > 0]
+        task = _process_task if self.executor == "process" else self._thread_task
+        futures = [self.pool.submit(task, parent_prefix, chunk) for chunk in chunks]
+
+        upper_bounds = []
+        for future in futures:
+            upper_bounds.extend(future.result())
+        return upper_bounds
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# State of a worker process of the parallel tree search, set once by the pool initializer
+_worker_schedule: Optional[Schedule] = None
+_worker_incumbent = None
+_worker_dominance_table_size = 0
+# kept between the tasks of a worker, only outside of the deterministic mode (its content depends on which tasks the worker got)
+_worker_dominance_table: Optional[DominanceTable] = None
+
+
+def _init_search_worker(schedule: Schedule, shared_incumbent, deterministic: bool, dominance_table_size: int):
+    global _worker_schedule, _worker_model, _worker_incumbent, _worker_dominance_table_size, _worker_dominance_table
+    _worker_schedule = schedule
+    _worker_model = LPBoundModel(schedule)
+    # without hot starts every LP is solved from scratch, so the bounds do not depend on which worker solves it
+    _worker_model.hot_start = not deterministic
+    _worker_incumbent = shared_incumbent
+    _worker_dominance_table_size = dominance_table_size
+    if dominance_table_size > 0 and not deterministic:
+        _worker_dominance_table = DominanceTable(dominance_table_size)
+
+
+def _explore_subtree(prefix: np.ndarray, lower_bound: float, upper_bound: float, incumbent: float, max_expansions: int, share_incumbent: bool) -> dict:
+    '''
+    Run the branch and bound on the subtree below the node given by its prefix, for at most max_expansions expansions.
+    Returns the best schedule found (if it beats `incumbent`) and the nodes that are still open, both as prefixes.
+    '''
+    dominance_table = _worker_dominance_table
+    if dominance_table is None and _worker_dominance_table_size > 0:
+        dominance_table = DominanceTable(_worker_dominance_table_size)
+    search = BranchAndBound(_worker_schedule, bound_model=_worker_model, dominance_table=dominance_table)
+    search.best_lower_case = incumbent
+    if share_incumbent:
+        search.shared_incumbent = _worker_incumbent
+
+    node = search.tree.from_prefix(prefix)
+    node.lower_bound = lower_bound
+    node.upper_bound = upper_bound
+    search.frontier.push(node)
+    search.run(max_expansions=max_expansions)
+
+    threshold = search.threshold()
+    return {
+        "best": None if search.best_node is None else (search.best_lower_case, search.tree.prefix(search.best_node)),
+        "open": [
+            (search.tree.prefix(open_node), open_node.lower_bound, open_node.upper_bound)
+            for open_node in search.frontier.nodes() if open_node.upper_bound > threshold
+        ],
+        "expanded": search.expanded,
+        "pruned": search.pruned,
+        "dominated": search.dominated,
+        "created": search.created,
+        "pruned_by": search.pruned_by,
+        "timings": search.timings,
+        "frontier_peak": search.frontier_peak,
+    }
+
+
+class _OpenSubtree:
+    '''An open node of the parallel tree search, kept by its prefix (the workers rebuild the SearchNode).'''
+    __slots__ = ('prefix', 'lower_bound', 'upper_bound', 'in_frontier')
+
+    def __init__(self, prefix: np.ndarray, lower_bound: float, upper_bound: float):
+        self.prefix = prefix
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.in_frontier = False
+
+
+class ParallelTreeSearch:
+    '''
+    Branch and bound where several worker processes explore different subtrees at the same time.
+
+    The main process keeps a frontier of open subtrees. Each task sends one subtree to a worker, which runs
+    the usual BranchAndBound on it for max_expansions expansions and returns its best schedule and the nodes
+    it did not get to, these go back into the frontier.
+
+    - deterministic=False: tasks are handed out as soon as a worker is free, and the workers publish every
+      improvement of the incumbent to a shared value that all of them prune against.
+    - deterministic=True: the search runs in rounds of one task per worker, results are merged in a fixed order
+      and the incumbent is only shared between rounds. The result no longer depends on timing.
+    Both return an optimal schedule, so the score is the same as the serial search.
+    The limits of BranchAndBound.incumbents (time, nodes, gap) are checked whenever a task is handed out.
+    '''
+    def __init__(self, schedule: Schedule, workers: int, deterministic: bool = False, max_expansions: int = 200, dominance_table_size: int = 0, presolve_time: float = 0):
+        self.schedule = schedule
+        self.workers = workers
+        self.deterministic = deterministic
+        self.max_expansions = max_expansions
+        # every worker has its own DominanceTable, there is no table shared between the processes
+        self.dominance_table_size = dominance_table_size
+        self.presolve_time = presolve_time
+
+        self.frontier = Frontier()
+        self.best_lower_case = float('-inf')
+        self.best_prefix: Optional[np.ndarray] = None
+        self.drop_penalties = sum(job.drop_penalty for job in schedule.jobs)
+        self.expanded = 0
+        self.pruned = 0
+        self.dominated = 0
+        # the LPs are solved in the workers, their time is not collected
+        self.lp_time = None
+        # see BranchAndBound, counters and timings are summed over the ramp-up and all tasks
+        self.created = 0
+        self.pruned_by: Dict[str, int] = {"bound": 0, "stale": 0, "dominated": 0, "dominated_later": 0}
+        self.timings: Dict[str, float] = {}
+        self.timeline: List[Tuple[float, float, int]] = []
+        # highest number of open nodes in the frontier of this process or of a single task
+        self._peak = 0
+        # set in the asynchronous mode: the workers may have found better schedules that are not merged yet,
+        # we can already prune against them
+        self.shared_incumbent = None
+        # subtrees that are being explored by a worker, they count for the best upper bound
+        self._in_flight: Dict[Future, _OpenSubtree] = {}
+        # see BranchAndBound.status
+        self.status: Optional[str] = None
+
+        self.tree: Optional[SearchTree] = None
+        self.on_incumbent: Optional[Callable[[Schedule], None]] = None
+        self._limits: dict = {}
+        self._start_time = 0.0
+
+    @property
+    def frontier_peak(self) -> int:
+        return max(self._peak, self.frontier.peak)
+
+    def threshold(self) -> float:
+        if self.shared_incumbent is not None:
+            return max(self.best_lower_case, self.shared_incumbent.value)
+        return self.best_lower_case
+
+    def best_upper_bound(self) -> float:
+        return max([self.frontier.best_upper_bound(), self.best_lower_case] + [subtree.upper_bound for subtree in self._in_flight.values()])
+
+    def relative_gap(self) -> float:
+        if self.best_prefix is None:
+            return float('inf')
+        return (self.best_upper_bound() - self.best_lower_case) / max(1.0, abs(self.best_lower_case - self.drop_penalties))
+
+    def _limit_reached(self, search) -> bool:
+        '''Check the limits against search (this object, or the BranchAndBound of the ramp-up) and set the status.'''
+        time_limit, node_limit, gap_tolerance = self._limits.get("time_limit"), self._limits.get("node_limit"), self._limits.get("gap_tolerance")
+        if node_limit is not None and search.expanded >= node_limit:
+            self.status = "node_limit"
+        elif time_limit is not None and time.perf_counter() - self._start_time >= time_limit:
+            self.status = "time_limit"
+        elif gap_tolerance is not None and search.relative_gap() <= gap_tolerance:
+            self.status = "gap_tolerance"
+        return self.status is not None
+
+    def _schedule_of(self, prefix: np.ndarray) -> Schedule:
+        best_node = self.tree.from_prefix(prefix)
+        schedule = self.tree.to_schedule(best_node)
+        schedule.lower_bound = self.best_lower_case
+        schedule.upper_bound = self.best_upper_bound()
+        return schedule
+
+    def _new_incumbent(self, score: float, prefix: np.ndarray):
+        self.best_lower_case, self.best_prefix = score, prefix
+        self.timeline.append((time.perf_counter() - self._start_time, score - self.drop_penalties, self.expanded))
+        if self.on_incumbent is not None:
+            self.on_incumbent(self._schedule_of(prefix))
+
+    def _push(self, prefix: np.ndarray, lower_bound: float, upper_bound: float):
+        if upper_bound <= self.threshold():
+            self.pruned += 1
+            self.pruned_by["bound"] += 1
+        else:
+            self.frontier.push(_OpenSubtree(prefix, lower_bound, upper_bound))
+
+    def _merge(self, result: dict):
+        if result["best"] is not None and result["best"][0] > self.best_lower_case:
+            self._new_incumbent(*result["best"])
+        for prefix, lower_bound, upper_bound in result["open"]:
+            self._push(prefix, lower_bound, upper_bound)
+        self.expanded += result["expanded"]
+        self.pruned += result["pruned"]
+        self.dominated += result["dominated"]
+        self._add_counters(result)
+
+    def _add_counters(self, result: dict):
+        '''Add the instrumentation of a BranchAndBound (as returned by _explore_subtree) to ours.'''
+        self.created += result["created"]
+        for reason, count in result["pruned_by"].items():
+            self.pruned_by[reason] = self.pruned_by.get(reason, 0) + count
+        for key, seconds in result["timings"].items():
+            self.timings[key] = self.timings.get(key, 0.0) + seconds
+        self._peak = max(self._peak, result["frontier_peak"])
+
+    def _next_subtree(self) -> Optional[_OpenSubtree]:
+        '''Pop the best open subtree that can not be pruned, None if there is none (or if a limit is reached).'''
+        if self._limit_reached(self):
+            return None
+        while len(self.frontier) != 0:
+            subtree = self.frontier.pop()
+            if subtree.upper_bound > self.threshold():
+                return subtree
+            self.pruned += 1
+            self.pruned_by["stale"] += 1
+        return None
+
+    def run(
+            self,
+            time_limit: Optional[float] = None,
+            node_limit: Optional[int] = None,
+            gap_tolerance: Optional[float] = None,
+            on_incumbent: Optional[Callable[[Schedule], None]] = None
+        ) -> Optional[Schedule]:
+        self._start_time = time.perf_counter()
+        self._limits = {"time_limit": time_limit, "node_limit": node_limit, "gap_tolerance": gap_tolerance}
+        self.on_incumbent = on_incumbent
+
+        # ramp-up: expand in this process until there is enough work for all workers
+        search = BranchAndBound(self.schedule, dominance_table=DominanceTable(self.dominance_table_size) if self.dominance_table_size > 0 else None)
+        self.tree = search.tree
+        if self.presolve_time > 0:
+            search.presolve(self.presolve_time if time_limit is None else min(self.presolve_time, time_limit / 10))
+        search.start()
+        last_incumbent = None
+        while True:
+            if search.best_node is not last_incumbent:
+                last_incumbent = search.best_node
+                self.expanded = search.expanded
+                self._new_incumbent(search.best_lower_case, search.tree.prefix(search.best_node))
+            if len(search.frontier) >= 2 * self.workers or search.done() or self._limit_reached(search):
+                break
+            search.step()
+        # the counters of the ramp-up first, _push counts what it prunes on top of them
+        self.expanded, self.pruned, self.dominated = search.expanded, search.pruned, search.dominated
+        self._add_counters({
+            "created": search.created, "pruned_by": search.pruned_by, "timings": search.timings, "frontier_peak": search.frontier_peak
+        })
+        for node in search.frontier.nodes():
+            self._push(search.tree.prefix(node), node.lower_bound, node.upper_bound)
+
+        if self.status is None and len(self.frontier) > 0:
+            context = process_context()
+            shared_incumbent = context.Value('d', self.best_lower_case)
+            with ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_search_worker,
+                    initargs=(self.schedule, shared_incumbent, self.deterministic, self.dominance_table_size)
+                ) as pool:
+                if self.deterministic:
+                    self._run_rounds(pool)
+                else:
+                    self._run_asynchronous(pool, shared_incumbent)
+        if self.status is None:
+            self.status = "optimal"
+
+        if self.best_prefix is None:
+            return None
+        return self._schedule_of(self.best_prefix)
+
+    def _submit(self, pool: Executor, subtree: _OpenSubtree, share_incumbent: bool) -> Future:
+        max_expansions = self.max_expansions
+        if self._limits.get("node_limit") is not None:
+            # do not overshoot the node limit by much
+            max_expansions = max(1, min(max_expansions, self._limits["node_limit"] - self.expanded))
+        future = pool.submit(
+            _explore_subtree, subtree.prefix, subtree.lower_bound, subtree.upper_bound,
+            self.best_lower_case, max_expansions, share_incumbent
+        )
+        self._in_flight[future] = subtree
+        return future
+
+    def _collect(self, future: Future):
+        del self._in_flight[future]
+        self._merge(future.result())
+
+    def _run_rounds(self, pool: Executor):
+        while True:
+            subtrees = []
+            while len(subtrees) < self.workers:
+                subtree = self._next_subtree()
+                if subtree is None:
+                    break
+                subtrees.append(subtree)
+            if len(subtrees) == 0:
+                return
+
+            futures = [self._submit(pool, subtree, share_incumbent=False) for subtree in subtrees]
+            for future in futures:
+                self._collect(future)
+
+    def _run_asynchronous(self, pool: Executor, shared_incumbent):
+        self.shared_incumbent = shared_incumbent
+        in_flight = set()
+        while True:
+            while len(in_flight) < self.workers:
+                subtree = self._next_subtree()
+                if subtree is None:
+                    break
+                in_flight.add(self._submit(pool, subtree, share_incumbent=True))
+            if len(in_flight) == 0:
+                return
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._collect(future)
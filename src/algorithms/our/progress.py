@@ -0,0 +1,44 @@
+from tqdm import tqdm
+
+import time
+
+
+class ProgressReporter:
+    '''
+    Shows the state of a BranchAndBound on a tqdm bar (on stderr), meant as its on_step callback.
+
+    Redrawing the bar on every step costs more than a cheap step of the search itself, so the bar is redrawn at most
+    every `interval` seconds (and once more when the reporter is closed, so the last state is always shown).
+    '''
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._bar = None
+        self._next_draw = 0.0
+        self._search = None
+
+    def __enter__(self) -> 'ProgressReporter':
+        self._bar = tqdm(total=0, position=0, leave=True, desc="Candidates in queue", dynamic_ncols=True)
+        return self
+
+    def __exit__(self, *args):
+        if self._search is not None:
+            self._draw(self._search)
+        self._bar.close()
+
+    def __call__(self, search):
+        self._search = search
+        now = time.perf_counter()
+        if now < self._next_draw:
+            return
+        self._next_draw = now + self.interval
+        self._draw(search)
+
+    def _draw(self, search):
+        best_lower_case = search.best_lower_case
+        self._bar.set_description(
+            f"Candidates: {len(search.frontier)} | Best Lower: {best_lower_case:0.2f} (true: {best_lower_case - search.drop_penalties:0.2f}) "
+            f"| Best Upper: {search.best_upper_bound():0.2f} | Expanded: {search.expanded} | Pruned branches: {search.pruned} | Dominated: {search.dominated}",
+            refresh=False
+        )
+        self._bar.n = len(search.frontier)
+        self._bar.refresh()
@@ -0,0 +1,144 @@
+from src.schedule import Schedule
+
+import numpy as np
+
+from typing import List, Optional
+
+
+class SearchNode:
+    '''
+    A partial schedule in the branch and bound tree of our offline algorithm, stored as a delta to its parent.
+
+    Instead of a full copy of the schedule (and all its jobs), a node only holds:
+    - parent: the node it was expanded from (None for the root)
+    - job: index (in schedule.jobs) of the job placed in time slot t, -1 if the time slot is idle
+    - t: the last decided time slot
+    - remaining: remaining processing time of every job, a job is completed when it reaches 0
+    - score: score of the partial schedule, in the same scale as Schedule.score_rewritten
+    The time slots 0..t are recovered by walking up the parent pointers, see SearchTree.prefix.
+    '''
+    __slots__ = ('parent', 'job', 't', 'remaining', 'score', 'upper_bound', 'lower_bound', 'in_frontier')
+
+    def __init__(self, parent: Optional['SearchNode'], job: int, t: int, remaining: np.ndarray, score: float):
+        self.parent = parent
+        self.job = job
+        self.t = t
+        self.remaining = remaining
+        self.score = score
+
+        self.upper_bound = None
+        self.lower_bound = None
+        # whether the node is currently in the Frontier
+        self.in_frontier = False
+
+
+class SearchTree:
+    '''
+    The instance data shared by all SearchNodes of one search: per-job parameters as arrays,
+    and the schedule the search started from (needed to rebuild full Schedules).
+    '''
+    def __init__(self, schedule: Schedule):
+        self.schedule = schedule
+        self.T = schedule.T
+        self.num_jobs = len(schedule.jobs)
+        self.job_index_from_id = {job.id: job_index for job_index, job in enumerate(schedule.jobs)}
+
+        self.release_time = np.array([job.release_time for job in schedule.jobs], dtype=np.int64)
+        self.deadline = np.array([job.deadline for job in schedule.jobs], dtype=np.int64)
+        # a job can be scheduled up to (excluding) deadline + t_i_asterisk, see Schedule.schedulable_jobs
+        self.latest_time = np.array([job.deadline + job.t_i_asterisk for job in schedule.jobs], dtype=np.int64)
+        self.processing_time = np.array([job.processing_time for job in schedule.jobs], dtype=np.int32)
+        self.w_i_hat = [job.reward + job.drop_penalty for job in schedule.jobs]
+        # _gains[job_index][t]: see gain, precomputed from the penalty table of every job
+        self._gains = [
+            (self.w_i_hat[job_index] - job.penalty_function.evaluate_many(np.arange(self.T) - job.deadline)).tolist()
+            for job_index, job in enumerate(schedule.jobs)
+        ]
+        # job indices sorted by release time, for the greedy lower bound
+        self.jobs_by_release = np.argsort(self.release_time, kind="stable")
+
+    def root(self) -> SearchNode:
+        '''The node of the schedule the search starts from (usually t = -1, but partial schedules work as well).'''
+        schedule = self.schedule
+        prefix = schedule.slots[:schedule.t + 1]
+        remaining = self.processing_time - np.bincount(prefix[prefix >= 0], minlength=self.num_jobs).astype(np.int32)
+        return SearchNode(None, -1, schedule.t, remaining, schedule.score_rewritten())
+
+    def gain(self, job_index: int, t: int) -> float:
+        '''Contribution of job job_index to the score (in the score_rewritten scale) if it completes in time slot t.'''
+        return self._gains[job_index][t]
+
+    def schedulable_jobs(self, node: SearchNode, time_step: int) -> np.ndarray:
+        '''Same as Schedule.schedulable_jobs, but returns job indices.'''
+        return np.nonzero(
+            (self.release_time <= time_step) & (time_step < self.latest_time) & (node.remaining > 0)
+        )[0]
+
+    def children(self, node: SearchNode) -> List[SearchNode]:
+        '''
+        Same as Schedule.get_candidates: one child per job that can be scheduled in time slot t+1,
+        or a single idle child if there is none.
+        '''
+        t = node.t + 1
+        if t >= self.T:
+            return []
+
+        schedulable = self.schedulable_jobs(node, t)
+        if len(schedulable) == 0:
+            return [SearchNode(node, -1, t, node.remaining, node.score)]
+
+        children = []
+        for job_index in schedulable:
+            job_index = int(job_index)
+            remaining = node.remaining.copy()
+            remaining[job_index] -= 1
+            score = node.score
+            if remaining[job_index] == 0:
+                score += self.gain(job_index, t)
+            children.append(SearchNode(node, job_index, t, remaining, score))
+        return children
+
+    def extend(self, node: SearchNode, jobs) -> SearchNode:
+        '''The node reached from node by placing jobs[k] in time slot node.t + 1 + k (-1 for idle).'''
+        for job_index in jobs:
+            job_index = int(job_index)
+            t = node.t + 1
+            remaining, score = node.remaining, node.score
+            if job_index >= 0:
+                remaining = remaining.copy()
+                remaining[job_index] -= 1
+                if remaining[job_index] == 0:
+                    score += self.gain(job_index, t)
+            node = SearchNode(node, job_index, t, remaining, score)
+        return node
+
+    def from_prefix(self, prefix: np.ndarray) -> SearchNode:
+        '''
+        The node reached from the root by placing prefix[t] in every time slot t after root.t (the inverse of `prefix`).
+        Used to rebuild nodes that were sent to another process as their prefix.
+        '''
+        root = self.root()
+        return self.extend(root, prefix[root.t + 1:])
+
+    def prefix(self, node: SearchNode) -> np.ndarray:
+        '''Job index of every time slot 0..node.t (-1 for idle), including the slots of the schedule we started from.'''
+        prefix = np.full(node.t + 1, -1, dtype=np.int64)
+        while node.parent is not None:
+            prefix[node.t] = node.job
+            node = node.parent
+        # the root may already contain a partial schedule
+        prefix[:node.t + 1] = self.schedule.slots[:node.t + 1]
+        return prefix
+
+    def to_schedule(self, node: SearchNode) -> Schedule:
+        '''Rebuild the full Schedule of a node.'''
+        schedule = self.schedule.copy()
+        slots = schedule.slots.copy()
+        slots[:node.t + 1] = self.prefix(node)
+        schedule.set_slots(slots)
+        for job_index, job in enumerate(schedule.jobs):
+            job.completed = bool(node.remaining[job_index] <= 0)
+        schedule.t = node.t
+        schedule.upper_bound = node.upper_bound
+        schedule.lower_bound = node.lower_bound
+        return schedule
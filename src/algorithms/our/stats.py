@@ -0,0 +1,123 @@
+import json
+
+from typing import Dict, List, Optional, Tuple
+
+
+class SearchStats:
+    '''
+    Summary of a run of our offline algorithm: why the search stopped, the incumbent and the proven optimality gap,
+    and the instrumentation of the search loop (see BranchAndBound for the reasons of pruned_by and the keys of timings).
+    Scores are in the scale of Schedule.score (the branch and bound itself works in the score_rewritten scale).
+    '''
+    def __init__(
+            self,
+            status: str,
+            incumbent: float,
+            upper_bound: float,
+            expanded: int,
+            pruned: int,
+            dominated: int,
+            elapsed: float,
+            lp_time: Optional[float] = None,
+            created: int = 0,
+            pruned_by: Optional[Dict[str, int]] = None,
+            frontier_peak: int = 0,
+            timings: Optional[Dict[str, float]] = None,
+            timeline: Optional[List[Tuple[float, float, int]]] = None
+        ):
+        # "optimal", "time_limit", "node_limit" or "gap_tolerance"
+        self.status = status
+        self.incumbent = incumbent
+        self.upper_bound = upper_bound
+        self.expanded = expanded
+        self.pruned = pruned
+        self.dominated = dominated
+        # wall time in seconds
+        self.elapsed = elapsed
+        # time spent solving the LP relaxations in seconds (None if they were solved in other processes)
+        self.lp_time = lp_time
+        # children generated by expansions
+        self.created = created
+        # pruned and dominated nodes by reason
+        self.pruned_by = pruned_by if pruned_by is not None else {}
+        # highest number of open nodes at any time
+        self.frontier_peak = frontier_peak
+        # cumulative time of the hot paths of the search in seconds (summed over the workers of a parallel search)
+        self.timings = timings if timings is not None else {}
+        # every improvement of the incumbent: (seconds since the start, score, expanded nodes)
+        self.timeline = timeline if timeline is not None else []
+
+    @classmethod
+    def from_search(cls, search, elapsed: float) -> 'SearchStats':
+        '''From a finished BranchAndBound or ParallelTreeSearch.'''
+        return cls(
+            status=search.status,
+            incumbent=search.best_lower_case - search.drop_penalties,
+            upper_bound=search.best_upper_bound() - search.drop_penalties,
+            expanded=search.expanded,
+            pruned=search.pruned,
+            dominated=search.dominated,
+            elapsed=elapsed,
+            lp_time=search.lp_time,
+            created=search.created,
+            pruned_by=dict(search.pruned_by),
+            frontier_peak=search.frontier_peak,
+            timings=dict(search.timings),
+            timeline=list(search.timeline)
+        )
+
+    @property
+    def gap(self) -> float:
+        '''An optimal schedule scores at most this much more than the incumbent.'''
+        return self.upper_bound - self.incumbent
+
+    @property
+    def relative_gap(self) -> float:
+        return self.gap / max(1.0, abs(self.incumbent))
+
+    @property
+    def optimal(self) -> bool:
+        return self.status == "optimal"
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.expanded / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "incumbent": self.incumbent,
+            "upper_bound": self.upper_bound,
+            "gap": self.gap,
+            "relative_gap": self.relative_gap,
+            "expanded": self.expanded,
+            "pruned": self.pruned,
+            "dominated": self.dominated,
+            "elapsed": self.elapsed,
+            "lp_time": self.lp_time,
+            "created": self.created,
+            "pruned_by": self.pruned_by,
+            "frontier_peak": self.frontier_peak,
+            "nodes_per_second": self.nodes_per_second,
+            "timings": self.timings,
+            "timeline": [{"elapsed": elapsed, "score": score, "expanded": expanded} for elapsed, score, expanded in self.timeline],
+        }
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        '''The stats as JSON (gaps of a search without incumbent are null), also written to path if given.'''
+        data = self.to_dict()
+        for key in ["incumbent", "upper_bound", "gap", "relative_gap"]:
+            if data[key] in (float('inf'), float('-inf')) or data[key] != data[key]:
+                data[key] = None
+        text = json.dumps(data, indent=4)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def report(self) -> str:
+        if self.optimal:
+            gap = "optimal"
+        else:
+            gap = f"stopped by {self.status}, upper bound {self.upper_bound:0.2f}, gap {self.gap:0.2f} ({100 * self.relative_gap:0.2f}%)"
+        return f"Score {self.incumbent:0.2f}, {gap} | {self.expanded} nodes expanded, {self.pruned} pruned, {self.dominated} dominated in {self.elapsed:0.2f}s"
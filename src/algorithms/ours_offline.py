@@ -1,102 +1,261 @@
 from src.algorithms.base import BaseOfflineSolver
 from src.schedule import Schedule
-from src.algorithms.our.get_lower_bound_by_greedy import lower_bound
-from src.algorithms.our.get_upper_bound_by_LP import get_upper_bound_by_LP
+from src.algorithms.our.branch_and_bound import BranchAndBound
+from src.algorithms.our.dominance import DominanceTable
+from src.algorithms.our.parallel import BoundEvaluator, ParallelTreeSearch, process_context
+from src.algorithms.our.stats import SearchStats
+from src.algorithms.our.progress import ProgressReporter
+from src.algorithms.our.decomposition import TimeBlock, time_blocks, block_instance, stitch
+from src.profiling import phase
 
-from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
 import time
 
-from typing import Dict, Optional, Any, List, Tuple
+import numpy as np
+
+from typing import Callable, Dict, Iterator, Optional, Any, List, Tuple
 
 
 class OurOffline(BaseOfflineSolver):
-    def __init__(self):
+    def __init__(
+            self,
+            warm_start: bool = True,
+            workers: int = 1,
+            executor: str = "process",
+            parallel: str = "bounds",
+            deterministic: bool = False,
+            max_expansions_per_task: int = 200,
+            dominance_table_size: int = 200_000,
+            greedy: bool = True,
+            presolve_time: float = 1.0,
+            time_limit: Optional[float] = None,
+            node_limit: Optional[int] = None,
+            gap_tolerance: Optional[float] = None,
+            on_incumbent: Optional[Callable[[Schedule], None]] = None,
+            decompose: bool = True,
+            progress: bool = True,
+            progress_interval: float = 0.5
+        ):
         super().__init__()
+        assert parallel in ["bounds", "tree"], f"Parallel must be either 'bounds' or 'tree'. Got {parallel}"
+        # warm-start the LPs of the children of the node expanded next from its optimal basis (only with highspy installed)
+        self.warm_start = warm_start
+        # with more than one worker we either compute the upper bounds of the children of a node in a process (or thread) pool (parallel="bounds"),
+        # or let every worker run the branch and bound on its own subtrees, sharing the incumbent (parallel="tree")
+        self.workers = workers
+        self.executor = executor
+        self.parallel = parallel
+        # parallel="tree" only: run the workers in rounds, so that the result does not depend on timing
+        self.deterministic = deterministic
+        # parallel="tree" only: number of expansions a worker does on a subtree before it reports back
+        self.max_expansions_per_task = max_expansions_per_task
+        # maximum number of states in the DominanceTable (per process), 0 turns it off
+        self.dominance_table_size = dominance_table_size
+        # use greedy completions (EDF and WSRT) as lower bounds and incumbents
+        self.greedy = greedy
+        # time budget (in seconds) of the local search that seeds the incumbent before the search, 0 turns it off
+        self.presolve_time = presolve_time
+        # anytime mode: stop after time_limit seconds, after node_limit expanded nodes, or once the relative gap
+        # between the best upper bound and the best schedule found is at most gap_tolerance (e.g. 0.01 for 1%)
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.gap_tolerance = gap_tolerance
+        # called with every improvement of the best schedule found so far
+        self.on_incumbent = on_incumbent
+        # split the instance into independent time blocks (see decomposition.py) and search each block on its own,
+        # so the tree size is the sum of the blocks' trees instead of their product. With more than one worker the
+        # blocks are solved in parallel (each by a single worker)
+        self.decompose = decompose
+        # show the state of the search on a progress bar (stderr), redrawn at most every progress_interval seconds
+        self.progress = progress
+        self.progress_interval = progress_interval
+        # SearchStats of the last call to schedule
+        self.stats: Optional[SearchStats] = None
 
     def schedule(self, schedule: Schedule) -> Schedule:
-        best_upper_case = float('-inf')
-        best_lower_case = float('-inf')
-        best_lower_case_correct = float('-inf')
+        '''The best schedule found. Without limits it is optimal, otherwise see self.stats for the proven gap.'''
         best_schedule = None
-        pruned = 0
-
-        # add all of the possible candidates at t=1
-        # assert schedule.t == -1, f"Provided schedule must be at t=-1, but got t={schedule.t}"
-        candidates = schedule.get_candidates()
-
-        # print('Got candidates: ', len(candidates))
-
-        # while candates are not empty, expend
-        
-
-        # start_time = time.time()
-        
-
-        # Initialize tqdm progress bar (updates only bar, does not change inner logic)
-        with tqdm(total=0, position=0, leave=True, desc="Candidates in queue", dynamic_ncols=True) as pbar:
-            while len(candidates) != 0:
-                # * 1. check that every candidate has a lower and upper bound
-                prune_list = []
-                for i in range(len(candidates)): # O(n)  - should be okay
-                    if candidates[i].lower_bound is None:
-                        candidates[i].lower_bound = lower_bound(candidates[i])
-                    if candidates[i].upper_bound is None:
-                        candidates[i].upper_bound = get_upper_bound_by_LP(candidates[i])
-
-                    # * 2. If a candidate has a lower UPPER bound than the best LOWER bound, we prune it
-                    if candidates[i].upper_bound <= best_lower_case:
-                        prune_list.append(i)
-                        pruned += 1
-
-                prune_list.sort(reverse=True)
-                candidates = [c for j, c in enumerate(candidates) if j not in prune_list]
-                # for j, i in enumerate(prune_list):
-                    # del candidates[i - j]
-
-                # We somehow pruned everything...
-                if len(candidates) == 0:
-                    break
-
-                # # * 3. Select candidate with highest upper bound
-                # best_candidate = max(candidates, key=lambda x: x.upper_bound)
-                # candidates.remove(best_candidate)
-
-                # * 3. Select candidate with highest upper bound, then by highest lower bound
-                best_candidate = max(
-                    candidates,
-                    key=lambda x: (x.lower_bound, x.upper_bound)  # first order by the highest lower bound, then break ties by the highest upper bound
-                )
-                candidates.remove(best_candidate)
-                
-                # * 3. Select candidate with highest lower bound
-                # best_candidate = max(candidates, key=lambda x: x.lower_bound)
-                # candidates.remove(best_candidate)
-
-                # * 4. Check if it's a complete schedule, otherwise expand it
-                # When t == T-1, we've scheduled all T time slots (complete schedule)
-                candidate_score = best_candidate.score_rewritten()
-                if candidate_score > best_lower_case:
-                    best_lower_case = candidate_score
-                    best_schedule = best_candidate
-                    best_lower_case_correct = best_candidate.score()
-                
-                if best_candidate.t < best_candidate.T - 1:
-                    # Complete schedule - evaluate it
-                    # candidate_score = best_candidate.score()
-                # else:
-                    # Expand the candidate
-                    new_candidates = best_candidate.get_candidates()
-                    candidates.extend(new_candidates)
-
-                # Update tqdm bar (without altering code behavior)
-                # elapsed = time.time() - start_time
-                pbar.set_description(f"Candidates: {len(candidates)} | Best Lower: {best_lower_case:0.2f} (true: {best_lower_case_correct:0.2f}) | Best Upper: {best_candidate.upper_bound:0.2f} | Pruned branches: {pruned}")
-                pbar.n = len(candidates)
-                pbar.refresh()
-
-                if all(candidate.upper_bound <= best_lower_case for candidate in candidates):
-                    break  # we found AN optimal schedule
+        for best_schedule in self.incumbents(schedule):
+            # the parallel tree search calls on_incumbent itself
+            if self.on_incumbent is not None and not self._parallel_tree_search():
+                self.on_incumbent(best_schedule)
+        if best_schedule is not None:
+            best_schedule.stats = self.stats
+        return best_schedule
+
+    def _parallel_tree_search(self) -> bool:
+        return self.workers > 1 and self.parallel == "tree"
+
+    def _options(self) -> Dict[str, Any]:
+        return {
+            "warm_start": self.warm_start,
+            "workers": self.workers,
+            "executor": self.executor,
+            "parallel": self.parallel,
+            "deterministic": self.deterministic,
+            "max_expansions_per_task": self.max_expansions_per_task,
+            "dominance_table_size": self.dominance_table_size,
+            "greedy": self.greedy,
+            "presolve_time": self.presolve_time,
+            "time_limit": self.time_limit,
+            "node_limit": self.node_limit,
+            "gap_tolerance": self.gap_tolerance,
+            "progress": self.progress,
+            "progress_interval": self.progress_interval,
+        }
+
+    def _block_options(self, share: float, in_parallel: bool) -> Dict[str, Any]:
+        '''
+        Options of the search of one block with `share` of the jobs: the presolve time and the node limit are split
+        by the number of jobs, and so is the time limit when the blocks are solved one after the other.
+        '''
+        options = self._options()
+        options["decompose"] = False
+        options["presolve_time"] = self.presolve_time * share
+        if self.node_limit is not None:
+            options["node_limit"] = max(1, round(self.node_limit * share))
+        if self.time_limit is not None:
+            options["time_limit"] = self.time_limit * min(1.0, share * self.workers if in_parallel else share)
+        if in_parallel:
+            options["workers"] = 1
+            # the bars of several processes would overwrite each other
+            options["progress"] = False
+        return options
+
+    def _solve_blocks(self, schedule: Schedule, blocks: List[TimeBlock], start_time: float) -> Schedule:
+        '''Solve every time block as its own instance and stitch the results, self.stats sums the stats of the blocks.'''
+        instances = [block_instance(schedule, block) for block in blocks]
+        in_parallel = self.workers > 1
+        options = [self._block_options(len(block.jobs) / len(schedule.jobs), in_parallel) for block in blocks]
 
+        # the setup, presolve and search of every block are phases within this one
+        with phase("blocks"):
+            if in_parallel:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(blocks)), mp_context=process_context()) as pool:
+                    results = list(pool.map(_solve_block, options, instances))
+            else:
+                results = [_solve_block(block_options, instance) for block_options, instance in zip(options, instances)]
+
+        for instance, (slots, _) in zip(instances, results):
+            instance.set_slots(slots)
+        best_schedule = stitch(schedule, blocks, instances)
+
+        # jobs in no block can not be scheduled, they only cost their drop penalty
+        in_blocks = set(job_index for block in blocks for job_index in block.jobs)
+        dropped = sum(job.drop_penalty for job_index, job in enumerate(schedule.jobs) if job_index not in in_blocks)
+        block_stats = [stats for _, stats in results]
+        pruned_by: Dict[str, int] = {}
+        timings: Dict[str, float] = {}
+        for stats in block_stats:
+            for reason, count in stats.pruned_by.items():
+                pruned_by[reason] = pruned_by.get(reason, 0) + count
+            for key, seconds in stats.timings.items():
+                timings[key] = timings.get(key, 0.0) + seconds
+        self.stats = SearchStats(
+            status=next((stats.status for stats in block_stats if not stats.optimal), "optimal"),
+            incumbent=sum(stats.incumbent for stats in block_stats) - dropped,
+            upper_bound=sum(stats.upper_bound for stats in block_stats) - dropped,
+            expanded=sum(stats.expanded for stats in block_stats),
+            pruned=sum(stats.pruned for stats in block_stats),
+            dominated=sum(stats.dominated for stats in block_stats),
+            elapsed=time.perf_counter() - start_time,
+            lp_time=None if any(stats.lp_time is None for stats in block_stats) else sum(stats.lp_time for stats in block_stats),
+            created=sum(stats.created for stats in block_stats),
+            pruned_by=pruned_by,
+            frontier_peak=max(stats.frontier_peak for stats in block_stats),
+            timings=timings
+        )
+        if in_parallel:
+            # the blocks ran at the same time, only the stitched result has a meaningful time
+            self.stats.timeline = [(self.stats.elapsed, self.stats.incumbent, self.stats.expanded)]
+        else:
+            self.stats.timeline = self._block_timeline(schedule, blocks, block_stats, dropped)
         return best_schedule
-        
-        
\ No newline at end of file
+
+    def _block_timeline(self, schedule: Schedule, blocks: List[TimeBlock], block_stats: List[SearchStats], dropped: float) -> List[Tuple[float, float, int]]:
+        '''
+        Incumbent timeline of the whole instance when the blocks were solved one after the other: the score of the
+        stitched schedule at every improvement, with the blocks before at their result and the blocks after still empty.
+        '''
+        # an empty block drops all of its jobs
+        empty = [-sum(schedule.jobs[job_index].drop_penalty for job_index in block.jobs) for block in blocks]
+        timeline = []
+        elapsed, expanded = 0.0, 0
+        for k, stats in enumerate(block_stats):
+            others = sum(other.incumbent for other in block_stats[:k]) + sum(empty[k + 1:]) - dropped
+            for block_elapsed, score, block_expanded in stats.timeline:
+                timeline.append((elapsed + block_elapsed, others + score, expanded + block_expanded))
+            elapsed += stats.elapsed
+            expanded += stats.expanded
+        return timeline
+
+    def incumbents(self, schedule: Schedule) -> Iterator[Schedule]:
+        '''
+        Yield every improvement of the best schedule found so far, the last one is the result of the search.
+        self.stats is set once the generator is exhausted.
+        With parallel="tree" only the result is yielded (on_incumbent is called for every improvement).
+        An instance that decomposes into more than one time block also only yields the result.
+        '''
+        start_time = time.perf_counter()
+        limits = {"time_limit": self.time_limit, "node_limit": self.node_limit, "gap_tolerance": self.gap_tolerance}
+
+        # the decomposition only applies to the empty schedule, a partial schedule may already use slots of several blocks
+        if self.decompose and schedule.t == -1:
+            blocks = time_blocks(schedule)
+            if len(blocks) > 1:
+                yield self._solve_blocks(schedule, blocks, start_time)
+                return
+
+        if self._parallel_tree_search():
+            search = ParallelTreeSearch(
+                schedule, self.workers, self.deterministic, self.max_expansions_per_task, self.dominance_table_size, self.presolve_time
+            )
+            with phase("search"):
+                best_schedule = search.run(on_incumbent=self.on_incumbent, **limits)
+            self.stats = SearchStats.from_search(search, time.perf_counter() - start_time)
+            if best_schedule is not None:
+                yield best_schedule
+            return
+
+        evaluator = BoundEvaluator(schedule, self.workers, self.executor) if self.workers > 1 else None
+        try:
+            yield from self._branch_and_bound(schedule, evaluator, start_time, limits)
+        finally:
+            if evaluator is not None:
+                evaluator.close()
+
+    def _branch_and_bound(self, schedule: Schedule, evaluator: Optional[BoundEvaluator], start_time: float, limits: dict) -> Iterator[Schedule]:
+        # phases for `main.py --profile`: building the LP, seeding the incumbent and the search itself
+        with phase("setup"):
+            dominance_table = DominanceTable(self.dominance_table_size) if self.dominance_table_size > 0 else None
+            search = BranchAndBound(schedule, warm_start=self.warm_start, evaluator=evaluator, dominance_table=dominance_table, greedy=self.greedy)
+
+        # start from a good complete schedule, so that we can prune from the first expansion on
+        if self.presolve_time > 0:
+            with phase("presolve"):
+                # with a time limit, the presolve may take at most a tenth of it
+                search.presolve(self.presolve_time if self.time_limit is None else min(self.presolve_time, self.time_limit / 10))
+
+        with phase("search"):
+            # add all of the possible candidates at t=1
+            # assert schedule.t == -1, f"Provided schedule must be at t=-1, but got t={schedule.t}"
+            search.start()
+
+            if self.time_limit is not None:
+                limits["time_limit"] = max(0.0, self.time_limit - (time.perf_counter() - start_time))
+
+            # the progress bar is redrawn at most every progress_interval seconds, not on every step
+            with ProgressReporter(self.progress_interval) if self.progress else contextlib.nullcontext() as reporter:
+                for node in search.incumbents(on_step=reporter, **limits):
+                    yield search.best_schedule()
+
+        self.stats = SearchStats.from_search(search, time.perf_counter() - start_time)
+
+
+def _solve_block(options: Dict[str, Any], instance: Schedule) -> Tuple[np.ndarray, SearchStats]:
+    '''Search one time block (in a worker process with more than one worker), returns its time slots and stats.'''
+    solver = OurOffline(**options)
+    best_schedule = solver.schedule(instance)
+    slots = best_schedule.slots if best_schedule is not None else np.full(instance.T, -1, dtype=np.int32)
+    return slots, solver.stats
@@ -1,9 +1,11 @@
-import sched
 from src.algorithms.base import BaseOfflineSolver
+from src.algorithms.our.online_engine import OnlineEngine
 from src.schedule import Schedule
 
 from src.job import Job
 
+from typing import Generator, Iterable, Optional, Tuple
+
 
 class OurOnline(BaseOfflineSolver):
     def __init__(self):
@@ -19,25 +21,52 @@ class OurOnline(BaseOfflineSolver):
         return (job.reward - self.c_i(t, job)) / job.processing_time
 
     def schedule(self, schedule: Schedule) -> Schedule:
-        
+        '''
+        In every time slot, process the schedulable job with the lowest u_i (ties: the first in schedule.jobs).
+        The OnlineEngine makes the same decisions as checking all jobs in every time slot, but only does work on events
+        (releases, jobs becoming late, completions) and skips idle stretches in one step.
+        '''
         # assume schedule.t == -1
+        engine = OnlineEngine(self.u_i)
+        for job in schedule.jobs:
+            engine.add(job)
 
-        while schedule.t < schedule.T:
-            schedule.t += 1
-
-            candidates = schedule.schedulable_jobs(schedule.t)
-            
-            if len(candidates) == 0:
+        t = 0
+        while t < schedule.T:
+            job_index = engine.decide(t)
+            if job_index is None:
+                # nothing to do until the next release
+                next_release = engine.next_release()
+                if next_release is None:
+                    break
+                t = max(t + 1, next_release)
                 continue
-            
-            uis = [(self.u_i(schedule.t, job), job) for job in candidates]
-            # sort 
-            uis.sort(key=lambda x: x[0])
 
-            u_i, job = uis[0]
-            schedule.schedule[schedule.t] = job.id
+            # marks the job as completed once all its time slots are scheduled
+            schedule.assign(t, schedule.jobs[job_index].id)
+            engine.process(job_index)
+            t += 1
+
+        schedule.t = schedule.T
+        return schedule
 
-            if sum(1 for job_id in schedule.schedule if job_id == job.id) >= job.processing_time:
-                job.completed = True
+    def stream(self) -> Generator[Optional[str], Tuple[int, Iterable[Job]], None]:
+        '''
+        The same decisions as schedule, for jobs that arrive over time instead of a Schedule known in advance.
 
-        return schedule
\ No newline at end of file
+        A coroutine: prime it with next(), then send (t, new_jobs) for a time slot t (non-decreasing) with the jobs that
+        arrived since the last one, it yields the id of the job to process in time slot t (None to stay idle).
+        Jobs are released at max(release_time, arrival), ties go to the job that arrived first. A job without a t_i_asterisk (its penalty never exceeds its reward)
+        stays schedulable forever. Completed and expired jobs are forgotten, so the memory does not grow with the horizon.
+        '''
+        engine = OnlineEngine(self.u_i)
+        decision = None
+        while True:
+            t, new_jobs = yield decision
+            for job in new_jobs:
+                engine.add(job)
+            job_index = engine.decide(t)
+            decision = None
+            if job_index is not None:
+                decision = engine.jobs[job_index].id
+                engine.process(job_index)
@@ -0,0 +1,152 @@
+# solve many instances in worker processes, one JSON result per instance
+from src.scheduler import Scheduler
+from src.algorithms.our.parallel import process_context
+from src.utility import load_jobs_from_input_file
+
+import contextlib
+import glob
+from multiprocessing.connection import Connection, wait
+import os
+import signal
+import time
+import traceback
+
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def find_instances(source: str) -> List[str]:
+    '''Instance files of a directory (every *.txt and *.json in it) or a glob pattern, sorted by name.'''
+    if os.path.isdir(source):
+        paths = glob.glob(os.path.join(source, "*.txt")) + glob.glob(os.path.join(source, "*.json"))
+    elif os.path.isfile(source):
+        paths = [source]
+    else:
+        paths = glob.glob(source)
+    if len(paths) == 0:
+        raise FileNotFoundError(f"No instances found at {source}")
+    return sorted(paths)
+
+
+def solve_instance(path: str, name: str = "ours", setting: str = "offline", options: Optional[Dict[str, Any]] = None) -> dict:
+    '''
+    Solve one instance with Scheduler and summarize the result:
+    score, time slots of every job (1-based, like Schedule.export and the solutions of `main.py score`),
+    wall time and, for our offline algorithm, the search status and the number of expanded nodes.
+    '''
+    start = time.perf_counter()
+    schedule = load_jobs_from_input_file(path)
+    scheduler = Scheduler(name, setting, **(options or {}))
+    # the progress bar of the search is of no use in a batch
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stderr(devnull):
+        schedule = scheduler.schedule(schedule)
+    stats = scheduler.stats
+    return {
+        "file": path,
+        "status": "ok",
+        "score": schedule.score(),
+        "jobs": [[t + 1 for t in time_slots] if len(time_slots) > 0 else None for time_slots in schedule.slots_by_job()],
+        "wall_time": time.perf_counter() - start,
+        "search_status": stats.status if stats is not None else None,
+        "expanded": stats.expanded if stats is not None else None,
+    }
+
+
+def _worker(connection: Connection, path: str, name: str, setting: str, options: Dict[str, Any]):
+    # a process group of its own, so that _kill also stops the processes the solver starts (e.g. with workers > 1)
+    if hasattr(os, "setpgid"):
+        os.setpgid(0, 0)
+    start = time.perf_counter()
+    try:
+        result = solve_instance(path, name, setting, options)
+    except Exception as error:
+        result = {
+            "file": path,
+            "status": "error",
+            "error": f"{type(error).__name__}: {error}",
+            "traceback": traceback.format_exc(),
+            "wall_time": time.perf_counter() - start,
+        }
+    connection.send(result)
+    connection.close()
+
+
+def _kill(process):
+    '''Kill a worker and everything it started, and wait for it.'''
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError, PermissionError):
+        # no process groups on this platform, or the worker did not get to setpgid yet
+        process.kill()
+    process.join()
+
+
+def run_batch(
+        paths: List[str],
+        name: str = "ours",
+        setting: str = "offline",
+        options: Optional[Dict[str, Any]] = None,
+        workers: int = 1,
+        timeout: Optional[float] = None
+    ) -> Iterator[dict]:
+    '''
+    Solve every instance in its own worker process, at most `workers` at a time, and yield a result per instance
+    as soon as it is done (so not in the order of `paths`). A result has "status":
+    - "ok": see solve_instance
+    - "error": the solver raised an exception, see "error" and "traceback"
+    - "timeout": the instance took longer than `timeout` seconds and its process was killed
+    - "crashed": the process died without a result (e.g. out of memory), see "exitcode"
+    A failing instance never stops the batch. The workers are not daemonic, so a solver can start processes of its own
+    (options such as workers > 1), they are killed explicitly on a timeout and when the batch stops. Workers are forked from a fork server that has already imported the
+    solver, so an instance does not pay the start-up of Python, SciPy and matplotlib.
+    '''
+    options = options or {}
+    context = process_context(preload=["src.batch"])
+
+    remaining = iter(paths)
+    # receiving end of the pipe of every running worker -> (process, path, start time)
+    running: Dict[Connection, tuple] = {}
+
+    def start_next() -> bool:
+        path = next(remaining, None)
+        if path is None:
+            return False
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_worker, args=(sender, path, name, setting, options))
+        process.start()
+        # only the worker holds the sending end now, so the receiver sees EOF if the worker dies
+        sender.close()
+        running[receiver] = (process, path, time.perf_counter())
+        return True
+
+    try:
+        while len(running) < workers and start_next():
+            pass
+        while len(running) > 0:
+            wait_time = None
+            if timeout is not None:
+                wait_time = max(0.0, min(started for _, _, started in running.values()) + timeout - time.perf_counter())
+            for receiver in wait(list(running.keys()), timeout=wait_time):
+                process, path, started = running.pop(receiver)
+                try:
+                    result = receiver.recv()
+                except EOFError:
+                    process.join()
+                    result = {"file": path, "status": "crashed", "exitcode": process.exitcode, "wall_time": time.perf_counter() - started}
+                receiver.close()
+                process.join()
+                yield result
+                start_next()
+
+            if timeout is not None:
+                now = time.perf_counter()
+                for receiver in [receiver for receiver, (_, _, started) in running.items() if now - started >= timeout]:
+                    process, path, started = running.pop(receiver)
+                    _kill(process)
+                    receiver.close()
+                    yield {"file": path, "status": "timeout", "wall_time": now - started}
+                    start_next()
+    finally:
+        # the batch was interrupted (or the consumer stopped early)
+        for receiver, (process, _, _) in running.items():
+            _kill(process)
+            receiver.close()
@@ -1,5 +1,4 @@
 from src.penalty_function import PenaltyFunction
-import math
 
 class Job:
     '''We consider a single-machine scheduling problem over a discrete
@@ -43,20 +42,9 @@ class Job:
         self.penalty_function = penalty_function
         self.completed = False
 
-        self.t_i_asterisk = None
-        if self.penalty_function.function_type == "linear":
-            if self.penalty_function.parameters["slope"] > 0: # if it's zero, then the t_i^* = T
-                # t_i_asterisk represents maximum acceptable tardiness (delay beyond deadline)
-                self.t_i_asterisk = math.floor((self.reward - self.penalty_function.parameters['intercept'])/(self.penalty_function.parameters["slope"]))
-        else:
-            # For non-linear penalty functions, find the tardiness where penalty exceeds reward
-            for tardiness in range(1, len(self.penalty_function.parameters)):
-                if self.penalty_function.parameters[tardiness][1] > self.reward:
-                    # t_i_asterisk represents maximum acceptable tardiness
-                    self.t_i_asterisk = tardiness
-                    break
-
-        if self.t_i_asterisk < 0:
+        # maximum acceptable tardiness (delay beyond deadline), None if the penalty never exceeds the reward (Schedule then sets it to T)
+        self.t_i_asterisk = self.penalty_function.max_acceptable_tardiness(self.reward)
+        if self.t_i_asterisk is not None and self.t_i_asterisk < 0:
             self.t_i_asterisk = 0
 
     def __str__(self):
@@ -0,0 +1,330 @@
+# single-pass loaders of the input files into columns (numpy arrays by job index), Jobs are only created on demand
+from src.schedule import Schedule
+from src.penalty_function import PenaltyFunction
+from src.job import Job
+
+from array import array
+import json
+import re
+
+import numpy as np
+
+from typing import IO, Any, Iterator, List, Optional, Tuple
+
+
+class JobColumns:
+    '''
+    The jobs of an instance as parallel arrays by job index, as read from an input file.
+    Holding a few hundred thousand jobs this way takes a fraction of the memory of Job objects,
+    `job(i)` creates a single Job and `to_schedule()` all of them.
+    - ids: None for txt files (the id of a job is its index)
+    - penalty_functions: (function_type, parameters) of every job, None for txt files (see penalty_function)
+    - total_time_slots: as declared by a JSON file, None for txt files (the horizon is the latest deadline either way)
+    '''
+    def __init__(
+            self,
+            release_time: np.ndarray,
+            processing_time: np.ndarray,
+            deadline: np.ndarray,
+            reward: np.ndarray,
+            drop_penalty: np.ndarray,
+            ids: Optional[List[Any]] = None,
+            penalty_functions: Optional[List[Tuple[str, Any]]] = None,
+            total_time_slots: Optional[int] = None
+        ):
+        self.release_time = release_time
+        self.processing_time = processing_time
+        self.deadline = deadline
+        self.reward = reward
+        self.drop_penalty = drop_penalty
+        self.ids = ids
+        self.penalty_functions = penalty_functions
+        self.total_time_slots = total_time_slots
+
+    def __len__(self) -> int:
+        return len(self.release_time)
+
+    @property
+    def T(self) -> int:
+        '''The horizon of the schedule: the latest deadline (like the loaders always did).'''
+        return int(self.deadline.max())
+
+    def penalty_function(self, job_index: int) -> PenaltyFunction:
+        if self.penalty_functions is None:
+            # txt files: pushing a job back is never worth it
+            value = self.reward[job_index].item() + self.drop_penalty[job_index].item()
+            return PenaltyFunction("linear", {"slope": value, "intercept": value})
+        function_type, parameters = self.penalty_functions[job_index]
+        return PenaltyFunction(function_type, parameters)
+
+    def job(self, job_index: int) -> Job:
+        return Job(
+            id=job_index if self.ids is None else self.ids[job_index],
+            release_time=self.release_time[job_index].item(),
+            processing_time=self.processing_time[job_index].item(),
+            deadline=self.deadline[job_index].item(),
+            reward=self.reward[job_index].item(),
+            drop_penalty=self.drop_penalty[job_index].item(),
+            penalty_function=self.penalty_function(job_index)
+        )
+
+    def jobs(self) -> Iterator[Job]:
+        '''All jobs, created one at a time.'''
+        # tolist() converts a whole column to Python numbers at once, much faster than item() per job
+        release_time, processing_time, deadline = self.release_time.tolist(), self.processing_time.tolist(), self.deadline.tolist()
+        reward, drop_penalty = self.reward.tolist(), self.drop_penalty.tolist()
+        for job_index in range(len(self)):
+            if self.penalty_functions is None:
+                value = reward[job_index] + drop_penalty[job_index]
+                penalty_function = PenaltyFunction("linear", {"slope": value, "intercept": value})
+            else:
+                penalty_function = PenaltyFunction(*self.penalty_functions[job_index])
+            yield Job(
+                id=job_index if self.ids is None else self.ids[job_index],
+                release_time=release_time[job_index],
+                processing_time=processing_time[job_index],
+                deadline=deadline[job_index],
+                reward=reward[job_index],
+                drop_penalty=drop_penalty[job_index],
+                penalty_function=penalty_function
+            )
+
+    def to_schedule(self) -> Schedule:
+        schedule = Schedule(list(self.jobs()), self.T)
+        if self.penalty_functions is None:
+            # the vectorized score needs the same columns, no need to collect them from the jobs again
+            value = (self.reward + self.drop_penalty).astype(float)
+            schedule._parameters = {
+                "reward": self.reward.astype(float),
+                "drop_penalty": self.drop_penalty.astype(float),
+                "release_time": self.release_time,
+                "processing_time": self.processing_time,
+                "deadline": self.deadline,
+                "linear": np.ones(len(self), dtype=bool),
+                "slope": value,
+                "intercept": value.copy(),
+                "integral": True,
+            }
+        return schedule
+
+
+def _int_column(values: array) -> np.ndarray:
+    return np.frombuffer(values, dtype=np.int64).copy() if len(values) > 0 else np.zeros(0, dtype=np.int64)
+
+
+def _parse_txt_lines(lines: List[str]) -> np.ndarray:
+    '''Job lines of a txt file as an int64 table with a row per line.'''
+    values = np.array(",".join(lines).split(','), dtype=np.int64)
+    if len(values) != 5 * len(lines):
+        raise ValueError("Every job line of a txt input file must have 5 fields: release_time, deadline, processing_time, reward, drop_penalty")
+    return values.reshape(-1, 5)
+
+
+def read_txt_columns(stream: IO[str], chunk_size: int = 1 << 20) -> JobColumns:
+    '''
+    The jobs of a txt input file, in a single pass over its lines: the number of jobs (optionally on a second line
+    of its own, after a line with a single field) and then a line "release_time, deadline, processing_time, reward, drop_penalty"
+    per job. The lines are parsed in chunks of about chunk_size characters straight into int64 columns.
+    Release times are made 0-based by subtracting the minimum release time (which must be at most 1), deadlines are kept.
+    '''
+    lines = (line for line in stream if line.strip() != "")
+    num_jobs = int(next(lines))
+    chunk: List[str] = []
+    first = next(lines, None)
+    if first is not None:
+        if len(first.split(',')) < 2:
+            num_jobs = int(first)
+        else:
+            chunk.append(first)
+
+    tables: List[np.ndarray] = []
+    num_lines = len(chunk)
+    size = 0
+    for line in lines:
+        # lines after the last job are ignored
+        if num_lines >= num_jobs:
+            break
+        chunk.append(line)
+        num_lines += 1
+        size += len(line)
+        if size >= chunk_size:
+            tables.append(_parse_txt_lines(chunk))
+            chunk, size = [], 0
+    if len(chunk) > 0:
+        tables.append(_parse_txt_lines(chunk))
+
+    table = np.concatenate(tables) if len(tables) > 0 else np.zeros((0, 5), dtype=np.int64)
+    if len(table) < num_jobs:
+        raise ValueError(f"Expected {num_jobs} jobs, the file has {len(table)}")
+    table = table[:num_jobs]
+
+    release_time = table[:, 0]
+    min_release_time = int(release_time.min())
+    assert min_release_time <= 1, f"Minimum release time must be less than or equal to 1, but got {min_release_time}"
+    return JobColumns(
+        release_time=release_time - min_release_time,
+        processing_time=np.ascontiguousarray(table[:, 2]),
+        deadline=np.ascontiguousarray(table[:, 1]),
+        reward=np.ascontiguousarray(table[:, 3]),
+        drop_penalty=np.ascontiguousarray(table[:, 4])
+    )
+
+
+class _JSONStream:
+    '''
+    Values of a JSON document decoded one at a time from a text stream that is read in chunks,
+    so only the current chunk and the decoded values are in memory.
+    '''
+    _WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+    def __init__(self, stream: IO[str], chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        '''Read the next chunk (dropping what was consumed), False at the end of the stream.'''
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if chunk == "":
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        '''The next character that is not whitespace ("" at the end of the stream), without consuming it.'''
+        while True:
+            self.position = self._WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        if character == "" or character not in characters:
+            raise ValueError(f"Invalid JSON input: expected one of {characters!r}, got {character!r}")
+        self.position += 1
+        return character
+
+    def value(self) -> Any:
+        '''Decode the next value (an object, array, string, number, ...).'''
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # a number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self._fill():
+                # decode (or raise) on what is left
+                continue
+
+    def items(self) -> Iterator[Any]:
+        '''The values of the array whose "[" was just consumed, decoded one by one.'''
+        if self.peek() == "]":
+            self.position += 1
+            return
+        scan, whitespace = self.decoder.scan_once, self._WHITESPACE.match
+        while True:
+            # fast path (almost every item): the item and the separator after it are complete in the buffer
+            buffer = self.buffer
+            position = whitespace(buffer, self.position).end()
+            separator = len(buffer)
+            try:
+                item, end = scan(buffer, position)
+                separator = whitespace(buffer, end).end()
+            except (StopIteration, json.JSONDecodeError):
+                pass
+            if separator < len(buffer) and buffer[separator] in ",]":
+                self.position = separator + 1
+                yield item
+                if buffer[separator] == "]":
+                    return
+                continue
+            # the item continues in the next chunk (or it is not valid JSON, then value() or expect() raise)
+            self.position = position
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+def iter_json_document(stream: IO[str], chunk_size: int = 1 << 20) -> Iterator[Tuple[str, Any]]:
+    '''
+    The top-level entries of a JSON input file as (key, value) pairs, except for "jobs": its jobs are yielded one by one
+    as ("job", job_data), so a file with millions of jobs never has to be in memory at once.
+    '''
+    document = _JSONStream(stream, chunk_size)
+    document.expect("{")
+    if document.peek() == "}":
+        return
+    while True:
+        key = document.value()
+        document.expect(":")
+        if key == "jobs":
+            document.expect("[")
+            for job_data in document.items():
+                yield "job", job_data
+        else:
+            yield key, document.value()
+        if document.expect(",}") == "}":
+            return
+
+
+def read_json_columns(stream: IO[str], chunk_size: int = 1 << 20) -> JobColumns:
+    '''The jobs of a JSON input file (see load_jobs_from_input_file_json), parsed incrementally.'''
+    ids: List[Any] = []
+    penalty_functions: List[Tuple[str, Any]] = []
+    release_time, processing_time, deadline = array('q'), array('q'), array('q')
+    rewards: List[Any] = []
+    drop_penalties: List[Any] = []
+    total_time_slots = None
+    for key, value in iter_json_document(stream, chunk_size):
+        if key == "job":
+            ids.append(value["id"])
+            release_time.append(value["release_time"])
+            processing_time.append(value["processing_time"])
+            deadline.append(value["deadline"])
+            rewards.append(value["reward"])
+            drop_penalties.append(value["drop_penalty"])
+            penalty_function = value["penalty_function"]
+            penalty_functions.append((penalty_function["function_type"], penalty_function["parameters"]))
+        elif key == "total_time_slots":
+            total_time_slots = value
+    if len(ids) == 0:
+        raise ValueError("The JSON input file has no jobs")
+
+    def number_column(values: List[Any]) -> np.ndarray:
+        # integer rewards stay integers, so that Job (and the score) sees the same values as before
+        return np.array(values, dtype=np.int64 if all(isinstance(value, int) for value in values) else float)
+
+    return JobColumns(
+        release_time=_int_column(release_time),
+        processing_time=_int_column(processing_time),
+        deadline=_int_column(deadline),
+        reward=number_column(rewards),
+        drop_penalty=number_column(drop_penalties),
+        ids=ids,
+        penalty_functions=penalty_functions,
+        total_time_slots=total_time_slots
+    )
+
+
+def load_columns(file_path: str) -> JobColumns:
+    '''The jobs of an input file (txt or json) as columns, without creating a single Job.'''
+    if file_path.endswith('.json'):
+        read = read_json_columns
+    elif file_path.endswith('.txt'):
+        read = read_txt_columns
+    else:
+        raise ValueError(f"Unsupported file extension: {file_path}")
+    with open(file_path, 'r') as f:
+        return read(f)
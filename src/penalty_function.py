@@ -1,3 +1,9 @@
+import bisect
+import math
+
+import numpy as np
+
+from typing import Optional
 
 
 class PenaltyFunction:
@@ -34,21 +40,72 @@ class PenaltyFunction:
             if parameters["intercept"] < 0:
                 raise ValueError("Intercept must be non-negative.")
         self.parameters = parameters
-    
+        self._compile()
+
+    def _compile(self):
+        '''
+        Precompute the lookup used by evaluate, evaluate_many and table.
+        - "per-timeslot": evaluate used to scan the points in order and stop at the first point later than the tardiness,
+          so the penalty is the value of the last point of the longest prefix whose times are all <= tardiness.
+          With the running maximum of the times, the length of that prefix is a binary search.
+          _values[k] is the penalty if k points apply (_values[0] = 0, before the first point).
+        - "linear": nothing to precompute
+        '''
+        # dense table of penalty by tardiness, built on demand by table()
+        self._table: Optional[np.ndarray] = None
+        if self.function_type == "per-timeslot":
+            self._times = np.maximum.accumulate([point[0] for point in self.parameters]).tolist() if self.parameters else []
+            self._values = [0] + [point[1] for point in self.parameters]
+            self._times_array = np.array(self._times, dtype=np.int64)
+            self._values_array = np.array(self._values, dtype=float)
+
     def evaluate(self, tardiness):
         '''Evaluate the penalty function at a given tardiness value (integer, > 0)'''
         if tardiness <= 0:
             raise ValueError("Tardiness must be positive.")
         if self.function_type == "per-timeslot":
-            tardiness_penalty_points = self.parameters
-            tardiness_penalty = 0
-            for point in tardiness_penalty_points:
-                if tardiness >= point[0]:
-                    tardiness_penalty = point[1]
-                else:
-                    break
-            return tardiness_penalty
+            return self._values[bisect.bisect_right(self._times, tardiness)]
         elif self.function_type == "linear":
             slope = self.parameters["slope"]
             intercept = self.parameters["intercept"]
-            return slope * tardiness + intercept
\ No newline at end of file
+            return slope * tardiness + intercept
+
+    def evaluate_many(self, tardiness) -> np.ndarray:
+        '''Evaluate the penalty function at every value of an array of tardiness, a tardiness <= 0 (on time) has no penalty.'''
+        tardiness = np.asarray(tardiness, dtype=np.int64)
+        if self.function_type == "per-timeslot":
+            penalty = self._values_array[np.searchsorted(self._times_array, tardiness, side="right")]
+        else:
+            penalty = self.parameters["slope"] * tardiness.astype(float) + self.parameters["intercept"]
+        return np.where(tardiness > 0, penalty, 0.0)
+
+    def table(self, max_tardiness: int) -> np.ndarray:
+        '''Dense table of the penalty for tardiness 0 to max_tardiness (table[0] = 0), kept for later calls.'''
+        if self._table is None or len(self._table) <= max_tardiness:
+            self._table = self.evaluate_many(np.arange(max(max_tardiness, 0) + 1))
+        return self._table[:max_tardiness + 1]
+
+    def next_breakpoint(self, tardiness: int) -> Optional[int]:
+        '''Smallest tardiness after the given one at which the penalty may change, None if it never changes again.'''
+        if self.function_type == "linear":
+            return tardiness + 1 if self.parameters["slope"] != 0 else None
+        k = bisect.bisect_right(self._times, tardiness)
+        return self._times[k] if k < len(self._times) else None
+
+    def max_acceptable_tardiness(self, reward: float) -> Optional[int]:
+        '''
+        Largest tardiness whose penalty does not exceed the reward (t_i_asterisk, may be negative for linear functions),
+        None if the penalty never exceeds the reward.
+        '''
+        if self.function_type == "linear":
+            slope = self.parameters["slope"]
+            intercept = self.parameters["intercept"]
+            if slope == 0:
+                return None if intercept <= reward else 0
+            return math.floor((reward - intercept) / slope)
+        # the penalties are non-decreasing: find the first point whose penalty exceeds the reward,
+        # the tardiness just before it is still acceptable
+        k = bisect.bisect_right(self._values, reward)
+        if k == len(self._values):
+            return None
+        return self._times[k - 1] - 1
@@ -0,0 +1,297 @@
+# profiling of a solve (main.py --profile), split by the phases of the solver
+import abc
+import contextlib
+import cProfile
+import inspect
+import io
+import os
+import pstats
+import signal
+import time
+import tracemalloc
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# the profiler of the running run_profiled call, phase() does nothing without one
+_active: Optional['_Profiler'] = None
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    '''
+    Marks a phase of the solver ("setup", "presolve", "search", ...), the profilers report every phase on its own.
+    Phases nest (the blocks of a decomposed instance run setup/presolve/search each), repeated phases add up.
+    Only the phases of this process are seen, workers of a parallel search are not profiled.
+    '''
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    profiler.enter(name)
+    try:
+        yield
+    finally:
+        profiler.exit()
+
+
+class _Profiler(abc.ABC):
+    '''Keeps the stack of phases (starting with "solve") and the wall time of every phase.'''
+    def __init__(self):
+        self.stack: List[str] = ["solve"]
+        self.phase_times: Dict[str, float] = {}
+        self._entered: List[float] = []
+
+    def start(self):
+        self._entered.append(time.perf_counter())
+
+    def stop(self):
+        self._add_time("solve", time.perf_counter() - self._entered.pop())
+
+    def enter(self, name: str):
+        self.stack.append(name)
+        self._entered.append(time.perf_counter())
+
+    def exit(self):
+        self._add_time(self.stack.pop(), time.perf_counter() - self._entered.pop())
+
+    def _add_time(self, name: str, seconds: float):
+        self.phase_times[name] = self.phase_times.get(name, 0.0) + seconds
+
+    def phase_summary(self) -> str:
+        return "\n".join(f"{name:<12} {seconds:>9.3f}s" for name, seconds in self.phase_times.items())
+
+    @abc.abstractmethod
+    def write(self, out: str) -> str:
+        '''Write the profile to out (and files next to it), returns a summary.'''
+
+
+@contextlib.contextmanager
+def _profileable_highspy():
+    '''
+    cProfile (Python 3.12+) loses its call stack on every call of a pybind11 `instancemethod`, such as the methods
+    of highspy.Highs: the frames around it (the whole LP bound) vanish from the profile. While profiling, the
+    methods are replaced by Python functions that call the underlying builtins, which cProfile tracks correctly.
+    '''
+    try:
+        import highspy
+    except ImportError:
+        yield
+        return
+    Highs = highspy.Highs
+    patched = []
+    for base in Highs.__mro__[1:]:
+        for name, method in vars(base).items():
+            function = getattr(method, "__func__", None)
+            if type(method).__name__ == "instancemethod" and function is not None and name not in vars(Highs):
+                setattr(Highs, name, (lambda function: lambda self, *args, **kwargs: function(self, *args, **kwargs))(function))
+                patched.append(name)
+    try:
+        yield
+    finally:
+        for name in patched:
+            delattr(Highs, name)
+
+
+class _CProfiler(_Profiler):
+    '''
+    cProfile with one profile per phase: entering a phase pauses the profile of the outer phase.
+    Writes the combined pstats to out and the profile of every phase to <out>.<phase>.prof.
+    '''
+    def __init__(self):
+        super().__init__()
+        self.profiles: Dict[str, cProfile.Profile] = {"solve": cProfile.Profile()}
+        self._patch = _profileable_highspy()
+
+    def start(self):
+        self._patch.__enter__()
+        super().start()
+        self.profiles["solve"].enable()
+
+    def stop(self):
+        self.profiles[self.stack[-1]].disable()
+        super().stop()
+        self._patch.__exit__(None, None, None)
+
+    def enter(self, name: str):
+        self.profiles[self.stack[-1]].disable()
+        super().enter(name)
+        self.profiles.setdefault(name, cProfile.Profile()).enable()
+
+    def exit(self):
+        self.profiles[self.stack[-1]].disable()
+        super().exit()
+        self.profiles[self.stack[-1]].enable()
+
+    def write(self, out: str) -> str:
+        # a profile that never ran has no stats
+        profiles = [profile for profile in self.profiles.values() if profile.getstats()]
+        pstats.Stats(*profiles).dump_stats(out)
+        root, _ = os.path.splitext(out)
+        for name, profile in self.profiles.items():
+            if name != "solve" and profile.getstats():
+                pstats.Stats(profile).dump_stats(f"{root}.{name}.prof")
+
+        text = io.StringIO()
+        pstats.Stats(*profiles, stream=text).sort_stats("cumulative").print_stats(25)
+        return f"{self.phase_summary()}\n{text.getvalue()}\nWrote {out} (view with `python -m pstats {out}` or snakeviz)"
+
+
+class _Sampler(_Profiler):
+    '''
+    Samples the stack of the main thread every `interval` seconds of CPU time (SIGPROF) and writes the samples as
+    collapsed stacks ("phase;file:function;... count" per line), the input of flamegraph.pl, speedscope and inferno.
+    The phases are the root frames of the stacks.
+    '''
+    def __init__(self, interval: float = 0.001):
+        super().__init__()
+        if not hasattr(signal, "setitimer"):
+            raise ValueError("The sampling profiler needs signal.setitimer (not available on this platform), use cprofile")
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self._previous_handler = None
+
+    def _sample(self, signum, frame):
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}")
+            frame = frame.f_back
+        stack = ";".join(self.stack + frames[::-1])
+        self.counts[stack] = self.counts.get(stack, 0) + 1
+
+    def start(self):
+        super().start()
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler)
+        super().stop()
+
+    def write(self, out: str) -> str:
+        with open(out, 'w') as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+        samples = sum(self.counts.values())
+        return f"{self.phase_summary()}\n{samples} samples every {1000 * self.interval:g}ms of CPU time\nWrote {out} (e.g. `flamegraph.pl {out} > profile.svg`)"
+
+
+def memory_keys() -> Dict[str, List[Callable]]:
+    '''
+    Functions the memory report attributes allocations to, an allocation counts for every one of them in its traceback.
+    (imported here, the solver imports this module for phase())
+    '''
+    from src.schedule import Schedule
+    from src.algorithms.our.search_node import SearchTree
+    from src.algorithms.our import get_upper_bound_by_LP as LP
+    return {
+        "Schedule.copy": [Schedule.copy],
+        "get_candidates": [Schedule.get_candidates, SearchTree.children, SearchTree.extend],
+        "LP builders": [LP.build_LP_linear, LP.build_LP_per_timeslot, LP.build_LP_intervals, LP.LPBoundModel.__init__],
+        "LP solves": [LP.LPBoundModel._upper_bound_from_prefix, LP._solve],
+    }
+
+
+def _line_ranges(functions: List[Callable]) -> List[Tuple[str, int, int]]:
+    '''(absolute file name, first line, last line) of the source of every function.'''
+    ranges = []
+    for function in functions:
+        lines, first = inspect.getsourcelines(function)
+        ranges.append((os.path.abspath(inspect.getsourcefile(function)), first, first + len(lines) - 1))
+    return ranges
+
+
+class _MemoryProfiler(_Profiler):
+    '''
+    tracemalloc: the peak of traced memory of every phase, and the memory still allocated at its end by line
+    and by memory_keys() (e.g. the search nodes of the frontier at the end of "search").
+    '''
+    def __init__(self, frames: int = 12, top: int = 15):
+        super().__init__()
+        self.frames = frames
+        self.top = top
+        self.peaks: Dict[str, int] = {}
+        self.snapshots: Dict[str, tracemalloc.Snapshot] = {}
+
+    def _update_peaks(self):
+        # the peak of the current phase is also a peak of every phase around it
+        peak = tracemalloc.get_traced_memory()[1]
+        for name in self.stack:
+            self.peaks[name] = max(self.peaks.get(name, 0), peak)
+
+    def start(self):
+        super().start()
+        tracemalloc.start(self.frames)
+
+    def stop(self):
+        self._update_peaks()
+        self.snapshots["solve"] = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        super().stop()
+
+    def enter(self, name: str):
+        self._update_peaks()
+        super().enter(name)
+        tracemalloc.reset_peak()
+
+    def exit(self):
+        self._update_peaks()
+        # the last run of a repeated phase
+        self.snapshots[self.stack[-1]] = tracemalloc.take_snapshot()
+        super().exit()
+
+    def _by_key(self, snapshot: tracemalloc.Snapshot) -> Dict[str, int]:
+        ranges = {key: _line_ranges(functions) for key, functions in memory_keys().items()}
+        sizes = {key: 0 for key in ranges}
+        absolute: Dict[str, str] = {}
+        for trace in snapshot.traces:
+            frames = [(absolute.setdefault(frame.filename, os.path.abspath(frame.filename)), frame.lineno) for frame in trace.traceback]
+            for key, key_ranges in ranges.items():
+                if any(filename == file and first <= lineno <= last for filename, lineno in frames for file, first, last in key_ranges):
+                    sizes[key] += trace.size
+        return sizes
+
+    def write(self, out: str) -> str:
+        lines = ["Time and peak of traced memory by phase:"]
+        for name, seconds in self.phase_times.items():
+            lines.append(f"  {name:<12} {seconds:>9.3f}s  peak {self.peaks.get(name, 0) / 2**20:>9.2f} MiB")
+        for name, snapshot in self.snapshots.items():
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            lines.append(f"\nAllocated at the end of {name}: {sum(stat.size for stat in snapshot.statistics('filename')) / 2**20:0.2f} MiB")
+            for key, size in self._by_key(snapshot).items():
+                lines.append(f"  {key:<20} {size / 2**20:>9.2f} MiB")
+            lines.append(f"  top {self.top} lines:")
+            for stat in snapshot.statistics('lineno')[:self.top]:
+                frame = stat.traceback[0]
+                lines.append(f"  {stat.size / 2**20:>9.2f} MiB {stat.count:>9} blocks  {frame.filename}:{frame.lineno}")
+        report = "\n".join(lines) + "\n"
+        with open(out, 'w') as f:
+            f.write(report)
+        return f"{report}\nWrote {out}"
+
+
+PROFILERS = {"cprofile": _CProfiler, "sample": _Sampler, "tracemalloc": _MemoryProfiler}
+DEFAULT_OUT = {"cprofile": "profile.prof", "sample": "profile.folded", "tracemalloc": "profile-memory.txt"}
+
+
+def run_profiled(function: Callable[[], Any], mode: str, out: Optional[str] = None) -> Tuple[Any, str]:
+    '''
+    Call function under the profiler of `mode` ("cprofile", "sample" or "tracemalloc") and write the profile to out
+    (see DEFAULT_OUT). Returns the result of function and a summary of the profile.
+    '''
+    global _active
+    if mode not in PROFILERS:
+        raise ValueError(f"Profile must be one of {', '.join(PROFILERS)}. Got {mode}")
+    if _active is not None:
+        raise RuntimeError("A profile is already running")
+    profiler = PROFILERS[mode]()
+    _active = profiler
+    profiler.start()
+    try:
+        result = function()
+    finally:
+        profiler.stop()
+        _active = None
+    return result, profiler.write(out if out is not None else DEFAULT_OUT[mode])
@@ -1,14 +1,78 @@
 from src.job import Job
 import copy
 
-from typing import List
+import numpy as np
+
+from typing import Iterator, List
 from typing import Optional
 
+
+class JobIds:
+    '''
+    List-like view of Schedule.slots as job ids (None = idle), this is `Schedule.schedule`.
+    Writing a time slot through it goes through Schedule.assign, so the per-job counters stay up to date.
+    '''
+    def __init__(self, schedule: 'Schedule'):
+        self._schedule = schedule
+
+    def _job_id(self, job_index: int) -> Optional[str]:
+        return None if job_index < 0 else self._schedule.jobs[job_index].id
+
+    def __len__(self) -> int:
+        return len(self._schedule.slots)
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        return (self._job_id(job_index) for job_index in self._schedule.slots.tolist())
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._job_id(job_index) for job_index in self._schedule.slots[key].tolist()]
+        return self._job_id(int(self._schedule.slots[key]))
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            time_slots = range(*key.indices(len(self)))
+            value = list(value)
+            if len(value) != len(time_slots):
+                raise ValueError(f"Can not assign {len(value)} job ids to {len(time_slots)} time slots")
+            for t, job_id in zip(time_slots, value):
+                self._schedule.assign(t, job_id)
+        else:
+            self._schedule.assign(range(len(self))[key], value)
+
+    def __eq__(self, other) -> bool:
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+def _last_slots(slots: np.ndarray, num_jobs: int) -> np.ndarray:
+    '''Last time slot of every job (-1 if it is not scheduled): the first occurrence of the job in the reversed schedule.'''
+    last_slot = np.full(num_jobs, -1, dtype=np.int64)
+    scheduled = np.nonzero(slots >= 0)[0][::-1]
+    jobs_present, first_in_reversed = np.unique(slots[scheduled], return_index=True)
+    last_slot[jobs_present] = scheduled[first_in_reversed]
+    return last_slot
+
+
 class Schedule:
+    '''
+    Assignment of jobs to the time slots 0..T-1, stored as `slots`: an int32 array of job indices (position in jobs, -1 = idle).
+    `schedule` is the same assignment as job ids (None = idle), see JobIds.
+
+    Time slots should be assigned with `assign` (or through `schedule`), which keeps per-job counters up to date
+    (number of scheduled time slots and the last one), so completion checks are O(1). `set_slots` replaces all time slots
+    at once and recounts with a few vectorized operations, score and score_rewritten are vectorized as well.
+    '''
     def __init__(self, jobs: list[Job], total_time_slots: int):
         self.jobs: List[Job] = jobs
         self.T = total_time_slots
-        self.schedule: List[Optional[Job]] = [None] * self.T
+        self.job_index_from_id = {job.id: job_index for job_index, job in enumerate(self.jobs)}
+        self.set_slots(np.full(self.T, -1, dtype=np.int32))
 
         # update each job's t_i_asterisk
         for job in self.jobs:
@@ -16,12 +80,55 @@ class Schedule:
                 job.t_i_asterisk = self.T
         
         # print([job.t_i_asterisk for job in self.jobs])
+
+        # per-job parameters as parallel arrays (by job index) for the vectorized score, built on first use
+        self._parameters: Optional[dict] = None
         
         # current time step
         self.t = -1
 
         self.upper_bound = None
         self.lower_bound = None
+        # SearchStats of the search that returned this schedule (see OurOffline.schedule)
+        self.stats = None
+
+    @property
+    def schedule(self) -> JobIds:
+        return JobIds(self)
+
+    @schedule.setter
+    def schedule(self, job_ids: List[Optional[str]]):
+        self.set_slots([-1 if job_id is None else self.job_index_from_id[job_id] for job_id in job_ids])
+
+    def set_slots(self, slots):
+        '''Replace all time slots by an array of job indices (-1 = idle), recount and mark the completed jobs.'''
+        self.slots = np.array(slots, dtype=np.int32)
+        # number of scheduled time slots and last scheduled time slot (-1 if none) of every job, by job index
+        self.slot_count = np.bincount(self.slots[self.slots >= 0], minlength=len(self.jobs)).tolist()
+        self.last_slot = _last_slots(self.slots, len(self.jobs)).tolist()
+        for job, count in zip(self.jobs, self.slot_count):
+            job.completed = count >= job.processing_time
+
+    def assign(self, t: int, job_id: Optional[str]):
+        '''Schedule job_id (None = idle) in time slot t, a job is marked completed once all its time slots are scheduled.'''
+        previous = int(self.slots[t])
+        if previous >= 0:
+            self.slot_count[previous] -= 1
+            if self.last_slot[previous] == t:
+                # only happens when a time slot is overwritten, look for the new last time slot
+                earlier = np.nonzero(self.slots[:t] == previous)[0]
+                self.last_slot[previous] = int(earlier[-1]) if len(earlier) > 0 else -1
+            self.jobs[previous].completed = self.slot_count[previous] >= self.jobs[previous].processing_time
+
+        if job_id is None:
+            self.slots[t] = -1
+            return
+        job_index = self.job_index_from_id[job_id]
+        self.slots[t] = job_index
+        self.slot_count[job_index] += 1
+        self.last_slot[job_index] = max(self.last_slot[job_index], t)
+        if self.slot_count[job_index] >= self.jobs[job_index].processing_time:
+            self.jobs[job_index].completed = True
 
     def schedulable_jobs(self, time_step: int) -> list[Job]:
         # t_i_asterisk represents maximum acceptable tardiness
@@ -47,7 +154,7 @@ class Schedule:
         if len(schedulable) == 0:
             # schedule null (no job at this time slot)
             candidate = self.copy()
-            candidate.schedule[self.t + 1] = None
+            candidate.assign(self.t + 1, None)
             candidate.t = self.t + 1
             candidate.upper_bound = None
             candidate.lower_bound = None
@@ -58,73 +165,107 @@ class Schedule:
 
         for job in schedulable:
             candidate = self.copy()
-            candidate.schedule[self.t + 1] = job.id
+            # marks the job as completed in the candidate if it has been fully scheduled
+            candidate.assign(self.t + 1, job.id)
             candidate.t = self.t + 1
             candidate.upper_bound = None
             candidate.lower_bound = None
 
-            # Mark job as completed in the candidate if it has been fully scheduled
-            candidate_job = candidate.get_job_from_id(job.id)
-            number_of_scheduled_steps = sum(1 for job_id in candidate.schedule if job_id == job.id)
-            if number_of_scheduled_steps == candidate_job.processing_time:
-                candidate_job.completed = True
-
             candidates.append(candidate)
 
         return candidates
 
 
     def copy(self) -> 'Schedule':
-        # Create a new Schedule instance with deep-copied jobs
-        jobs_copy = [copy.deepcopy(job) for job in self.jobs]
-        new_schedule = Schedule(jobs_copy, self.T)
-        new_schedule.schedule = list(self.schedule)
+        # Create a new Schedule instance with copied jobs (a shallow copy is enough, only `completed` changes,
+        # the penalty functions are shared)
+        jobs_copy = [copy.copy(job) for job in self.jobs]
+        new_schedule = Schedule.__new__(Schedule)
+        new_schedule.jobs = jobs_copy
+        new_schedule.T = self.T
+        new_schedule.job_index_from_id = self.job_index_from_id
+        new_schedule._parameters = self._parameters
+        new_schedule.slots = self.slots.copy()
+        new_schedule.slot_count = list(self.slot_count)
+        new_schedule.last_slot = list(self.last_slot)
         new_schedule.t = self.t
         new_schedule.upper_bound = self.upper_bound
         new_schedule.lower_bound = self.lower_bound
+        # the stats describe the search, not the copy
+        new_schedule.stats = None
         return new_schedule
 
     def get_job_from_id(self, job_id) -> Job:
-        for job in self.jobs:
-            if job.id == job_id:
-                return job
-        raise RuntimeError(f"Job with id {job_id} not found in jobs ({self.jobs})")
+        job_index = self.job_index_from_id.get(job_id)
+        if job_index is None:
+            raise RuntimeError(f"Job with id {job_id} not found in jobs ({self.jobs})")
+        return self.jobs[job_index]
 
-    def score(self) -> float:
-        _score = 0
-        for job in self.jobs:
-            if job.completed:
-                _score += job.reward
-                
-                latest_completion_time = max(t for t, job_id in enumerate(self.schedule) if job_id == job.id)
-                if latest_completion_time > job.deadline:
-                    tardiness = latest_completion_time - job.deadline
-                    _score -= job.penalty_function.evaluate(tardiness)
+    def job_parameters(self) -> dict:
+        '''The per-job constants of the score as arrays by job index, shared by all copies of the schedule.'''
+        if self._parameters is None:
+            linear = np.array([job.penalty_function.function_type == "linear" for job in self.jobs], dtype=bool)
+            self._parameters = {
+                "reward": np.array([job.reward for job in self.jobs], dtype=float),
+                "drop_penalty": np.array([job.drop_penalty for job in self.jobs], dtype=float),
+                "release_time": np.array([job.release_time for job in self.jobs], dtype=np.int64),
+                "processing_time": np.array([job.processing_time for job in self.jobs], dtype=np.int64),
+                "deadline": np.array([job.deadline for job in self.jobs], dtype=np.int64),
+                "linear": linear,
+                "slope": np.array([job.penalty_function.parameters["slope"] if is_linear else 0 for job, is_linear in zip(self.jobs, linear)], dtype=float),
+                "intercept": np.array([job.penalty_function.parameters["intercept"] if is_linear else 0 for job, is_linear in zip(self.jobs, linear)], dtype=float),
+                # scores of instances with integer parameters stay integers (like the sum over the jobs used to be)
+                "integral": all(
+                    isinstance(value, int)
+                    for job in self.jobs
+                    for value in [job.reward, job.drop_penalty] + (
+                        list(job.penalty_function.parameters.values()) if job.penalty_function.function_type == "linear"
+                        else [point[1] for point in job.penalty_function.parameters]
+                    )
+                ),
+            }
+        return self._parameters
 
-            else:
-                _score -= job.drop_penalty
+    def _tardiness_penalties(self, completed: np.ndarray) -> float:
+        '''Sum of the tardiness penalties of the completed jobs, from the last time slot of every job.'''
+        parameters = self.job_parameters()
+        tardiness = _last_slots(self.slots, len(self.jobs)) - parameters["deadline"]
+        late = completed & (tardiness > 0)
+        linear = late & parameters["linear"]
+        penalty = float(np.sum(parameters["slope"][linear] * tardiness[linear] + parameters["intercept"][linear]))
+        # per-timeslot penalty functions are looked up one by one (only the late jobs)
+        for job_index in np.nonzero(late & ~parameters["linear"])[0].tolist():
+            penalty += self.jobs[job_index].penalty_function.evaluate(int(tardiness[job_index]))
+        return penalty
 
-        return _score
+    def score(self) -> float:
+        parameters = self.job_parameters()
+        completed = np.array([job.completed for job in self.jobs], dtype=bool)
+        _score = np.sum(parameters["reward"][completed]) - np.sum(parameters["drop_penalty"][~completed])
+        return self._number(_score - self._tardiness_penalties(completed))
 
     def score_rewritten(self) -> float:
-        _score = 0
-        for job in self.jobs:
-            if job.completed:
-                _score += job.reward + job.drop_penalty
-                
-                latest_completion_time = max(t for t, job_id in enumerate(self.schedule) if job_id == job.id)
-                if latest_completion_time > job.deadline:
-                    tardiness = latest_completion_time - job.deadline
-                    _score -= job.penalty_function.evaluate(tardiness)
+        parameters = self.job_parameters()
+        completed = np.array([job.completed for job in self.jobs], dtype=bool)
+        _score = np.sum(parameters["reward"][completed] + parameters["drop_penalty"][completed])
+        return self._number(_score - self._tardiness_penalties(completed))
+
+    def _number(self, score) -> float:
+        return int(round(score)) if self.job_parameters()["integral"] else float(score)
 
-        return _score
+    def slots_by_job(self) -> List[List[int]]:
+        '''Scheduled time slots of every job (by job index).'''
+        scheduled = np.nonzero(self.slots >= 0)[0]
+        # a stable sort by job index keeps the time slots of every job in order
+        order = np.argsort(self.slots[scheduled], kind="stable")
+        counts = np.bincount(self.slots[scheduled], minlength=len(self.jobs))
+        return [slots.tolist() for slots in np.split(scheduled[order], np.cumsum(counts)[:-1])]
 
     def export(self, path: str):
         with open(path, 'w') as file:
-            for job in self.jobs:
-                scheduled_times_slots = [t for t, job_id in enumerate(self.schedule) if job_id == job.id]
+            for scheduled_times_slots in self.slots_by_job():
                 if len(scheduled_times_slots) == 0:
                     file.write('null\n')
                 else:
-                    file.write(', '.join([t+1 for t in scheduled_times_slots]) + '\n')
-            file.write(f'{self.score()}\n')
\ No newline at end of file
+                    file.write(', '.join([str(t+1) for t in scheduled_times_slots]) + '\n')
+            file.write(f'{self.score()}\n')
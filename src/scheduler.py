@@ -3,13 +3,18 @@ A class to contain the solver for our scheduling problem.
 """
 from src.algorithms.ours_offline import OurOffline
 from src.algorithms.ours_online import OurOnline
+from src.algorithms.bruteforce import BruteForceOffline
 from src.job import Job
 from src.schedule import Schedule
 
 class Scheduler:
-    def __init__(self, name: str, setting: str = "offline"):
+    def __init__(self, name: str, setting: str = "offline", **options):
+        '''
+        options are passed on to the solver, e.g. Scheduler('ours', 'offline', workers=8)
+        '''
         self.name = name
         self.setting = setting
+        self.options = options
 
         assert setting in ["offline", "online"], f"Setting must be either 'offline' or 'online'. Got {setting}"
 
@@ -21,17 +26,24 @@ class Scheduler:
     def setup(self):
         match self.name:
             case "bruteforce":
-                raise NotImplementedError("Bruteforce solver is not implemented yet")
-                self.solver = ...
+                if self.setting == 'offline':
+                    self.solver = BruteForceOffline(**self.options)
+                else:
+                    raise ValueError(f"Bruteforce is only available in the offline setting. Got {self.setting}")
             case "ours":
                 if self.setting == 'offline':
-                    self.solver = OurOffline()
+                    self.solver = OurOffline(**self.options)
                 elif self.setting == 'online':
-                    self.solver = OurOnline()
+                    self.solver = OurOnline(**self.options)
                 else:
                     raise ValueError(f"Setting must be either 'offline' or 'online'. Got {self.setting}")
             case _:
                 raise ValueError(f"Scheduler {self.name} was not found.")
 
     def schedule(self, schedule=Schedule) -> Schedule:
-        return self.solver.schedule(schedule)
\ No newline at end of file
+        return self.solver.schedule(schedule)
+
+    @property
+    def stats(self):
+        '''SearchStats of the last schedule call (status, proven gap, ...), None if the solver does not report any.'''
+        return getattr(self.solver, "stats", None)
\ No newline at end of file
@@ -0,0 +1,236 @@
+# a long-lived process that answers online scheduling decisions over a socket
+from src.algorithms.ours_online import OurOnline
+from src.utility import job_from_dict
+
+import asyncio
+import collections
+import json
+import random
+import time
+
+import numpy as np
+
+from typing import List, Optional, Tuple
+
+
+class DecisionService:
+    '''
+    The state of the decision service: one machine, scheduled online with OurOnline.stream.
+
+    The protocol is newline-delimited JSON, every request line gets exactly one response line:
+    - {"op": "submit", "jobs": [...]}: jobs in the format of utility.job_from_dict, released from the next time slot on
+      (or their release_time if it is later) -> {"ok": true, "submitted": n}
+    - {"op": "decide"} or {"op": "decide", "t": t}: decide the next time slot (or time slot t, the time slots in between
+      stay idle) -> {"ok": true, "t": t, "job": job id or null}
+    - {"op": "stats"} -> {"ok": true, "decisions": ..., "requests": ..., "requests_per_second": ..., "p50_ms": ..., "p99_ms": ...}
+    - {"op": "reset"}: forget all jobs and start again at time slot 0
+    Errors are answered with {"ok": false, "error": "..."}, the connection stays open. Invalid jobs are rejected by submit
+    (none of the jobs of the request are taken). Should the scheduler itself fail on a decision, its jobs are dropped and it
+    starts again empty at the same time slot.
+    Latencies are measured per decision inside the server, over the last `latency_window` decisions.
+    '''
+    def __init__(self, latency_window: int = 100000):
+        self.latencies = collections.deque(maxlen=latency_window)
+        self.started = time.perf_counter()
+        self.num_requests = 0
+        self.num_decisions = 0
+        self.reset()
+
+    def _start_stream(self):
+        self.decisions = OurOnline().stream()
+        next(self.decisions)
+        self.pending = []
+
+    def reset(self):
+        self._start_stream()
+        # next time slot to decide (the jobs submitted since the last decision are in self.pending)
+        self.t = 0
+
+    @staticmethod
+    def _check_job(job_data: dict):
+        '''Reject a job the scheduler cannot handle, before it gets into the stream.'''
+        if not isinstance(job_data, dict):
+            raise ValueError(f"A job must be an object, got {job_data!r}")
+        for key in ["release_time", "processing_time", "deadline"]:
+            value = job_data.get(key)
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"Job {job_data.get('id')!r}: {key} must be an integer, got {value!r}")
+        for key in ["reward", "drop_penalty"]:
+            value = job_data.get(key)
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise ValueError(f"Job {job_data.get('id')!r}: {key} must be a number, got {value!r}")
+        if job_data["processing_time"] <= 0:
+            raise ValueError(f"Job {job_data.get('id')!r}: processing_time must be positive")
+        if not 0 <= job_data["release_time"] < job_data["deadline"]:
+            raise ValueError(f"Job {job_data.get('id')!r}: release_time must be non-negative and less than the deadline")
+
+    def submit(self, jobs: List[dict]) -> dict:
+        if not isinstance(jobs, list):
+            raise ValueError(f"jobs must be a list, got {jobs!r}")
+        new_jobs = []
+        for job_data in jobs:
+            self._check_job({"release_time": self.t, **job_data} if isinstance(job_data, dict) else job_data)
+            new_jobs.append(job_from_dict({"release_time": self.t, **job_data}))
+        self.pending.extend(new_jobs)
+        return {"ok": True, "submitted": len(new_jobs)}
+
+    def decide(self, t: Optional[int] = None) -> dict:
+        start = time.perf_counter()
+        if t is None:
+            t = self.t
+        if t < self.t:
+            raise ValueError(f"Time slot {t} is already decided, the next one is {self.t}")
+        try:
+            job_id = self.decisions.send((t, self.pending))
+        except Exception as error:
+            # a failed generator is finished for good, every later send would raise StopIteration
+            self._start_stream()
+            self.t = t + 1
+            return {"ok": False, "error": f"{type(error).__name__}: {error} (the scheduler was restarted without its jobs)"}
+        self.pending = []
+        self.t = t + 1
+        self.num_decisions += 1
+        self.latencies.append(time.perf_counter() - start)
+        return {"ok": True, "t": t, "job": job_id}
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        p50, p99 = np.percentile(self.latencies, [50, 99]).tolist() if len(self.latencies) > 0 else (None, None)
+        return {
+            "ok": True,
+            "decisions": self.num_decisions,
+            "requests": self.num_requests,
+            "uptime": elapsed,
+            "requests_per_second": self.num_requests / elapsed if elapsed > 0 else 0,
+            "p50_ms": None if p50 is None else p50 * 1000,
+            "p99_ms": None if p99 is None else p99 * 1000,
+        }
+
+    def handle(self, line: str) -> dict:
+        '''The response to one request line.'''
+        self.num_requests += 1
+        try:
+            request = json.loads(line)
+            op = request.get("op")
+            if op == "submit":
+                return self.submit(request.get("jobs", []))
+            if op == "decide":
+                return self.decide(request.get("t"))
+            if op == "stats":
+                return self.stats()
+            if op == "reset":
+                self.reset()
+                return {"ok": True}
+            raise ValueError(f"Unknown op {op!r}")
+        except (ValueError, KeyError, TypeError, AttributeError, AssertionError) as error:
+            return {"ok": False, "error": f"{type(error).__name__}: {error}"}
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip() == b"":
+                    continue
+                writer.write(json.dumps(self.handle(line.decode())).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def start_server(service: DecisionService, unix: Optional[str] = None, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+    '''Listen on the Unix socket `unix`, or on host:port if it is None.'''
+    if unix is not None:
+        return await asyncio.start_unix_server(service.serve_client, path=unix)
+    return await asyncio.start_server(service.serve_client, host=host, port=port)
+
+
+async def serve(unix: Optional[str] = None, host: str = "127.0.0.1", port: int = 8765):
+    '''Run a DecisionService until the process is stopped.'''
+    server = await start_server(DecisionService(), unix, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+async def _connect(unix: Optional[str], host: str, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    if unix is not None:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection(host, port)
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: dict) -> dict:
+    writer.write(json.dumps(request).encode() + b'\n')
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+def random_job(rng: random.Random, job_id: str, deadline: int) -> dict:
+    '''A job for the load test, in the format of utility.job_from_dict (released when it is submitted).'''
+    return {
+        "id": job_id,
+        "processing_time": rng.randint(1, 4),
+        "deadline": deadline,
+        "reward": rng.randint(1, 30),
+        "drop_penalty": rng.randint(0, 10),
+        "penalty_function": {"function_type": "linear", "parameters": {"slope": rng.randint(0, 5), "intercept": 0}},
+    }
+
+
+async def load_test(
+        unix: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        clients: int = 8,
+        requests: int = 10000,
+        submit_every: int = 2,
+        seed: int = 0
+    ) -> dict:
+    '''
+    Send `requests` requests per client from `clients` concurrent connections (a submit of one random job every
+    `submit_every` requests, decide otherwise) and measure the latency of every request on the client side.
+    Returns the client side p50/p99 latency and requests per second, and the stats of the server.
+    '''
+    async def client(client_index: int) -> List[float]:
+        rng = random.Random(seed * 1000003 + client_index)
+        reader, writer = await _connect(unix, host, port)
+        latencies = []
+        # the last time slot this client saw decided, the other clients decide at most 2 time slots each in between
+        t = 0
+        try:
+            for k in range(requests):
+                if k % submit_every == 0:
+                    deadline = t + 2 * clients + rng.randint(2, 20)
+                    request = {"op": "submit", "jobs": [random_job(rng, f"{client_index}-{k}", deadline)]}
+                else:
+                    request = {"op": "decide"}
+                start = time.perf_counter()
+                response = await _request(reader, writer, request)
+                latencies.append(time.perf_counter() - start)
+                if not response["ok"]:
+                    raise RuntimeError(f"Request {request} failed: {response['error']}")
+                t = response.get("t", t)
+        finally:
+            writer.close()
+        return latencies
+
+    start = time.perf_counter()
+    latencies = np.concatenate(await asyncio.gather(*[client(client_index) for client_index in range(clients)]))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await _connect(unix, host, port)
+    try:
+        server_stats = await _request(reader, writer, {"op": "stats"})
+    finally:
+        writer.close()
+    p50, p99 = np.percentile(latencies, [50, 99]).tolist()
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": p50 * 1000,
+        "p99_ms": p99 * 1000,
+        "server": server_stats,
+    }
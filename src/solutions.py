@@ -0,0 +1,255 @@
+# validate and score many solutions of one instance at once
+from src.schedule import Schedule
+from src.algorithms.our.parallel import process_context
+
+from concurrent.futures import Future, ProcessPoolExecutor
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+class SolutionReport:
+    '''
+    Result of checking one solution against its instance.
+    - valid: no time slot is out of range, before the release time of its job or used twice, and no job has more
+      time slots than its processing time (a job with fewer time slots is not completed, which is allowed)
+    - score: Schedule.score of the solution (also computed for invalid solutions, where it is only indicative)
+    - declared_score: the score written on the last line of the solution file, if any
+    '''
+    def __init__(self, name: str, violations: List[str], score: Optional[float], declared_score: Optional[float] = None):
+        self.name = name
+        self.violations = violations
+        self.score = score
+        self.declared_score = declared_score
+
+    @property
+    def valid(self) -> bool:
+        return len(self.violations) == 0
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "valid": self.valid,
+            "score": self.score,
+            "declared_score": self.declared_score,
+            "violations": self.violations,
+        }
+
+    def __repr__(self) -> str:
+        return f"SolutionReport({self.to_dict()})"
+
+
+def parse_solution_txt(text: str, num_jobs: int) -> Tuple[List[List[int]], Optional[float]]:
+    '''
+    A solution in the format of tests/Schedule-*.txt: one line per job with its time slots (1-based, comma separated)
+    or "null", optionally followed by a line with the score. Returns (time slots of every job, declared score).
+    '''
+    lines = [line.strip() for line in text.splitlines() if line.strip() != ""]
+    if len(lines) < num_jobs:
+        raise ValueError(f"Expected a line for each of the {num_jobs} jobs, got {len(lines)} lines")
+    slots = [[] if line == 'null' else [int(time_slot) for time_slot in line.split(',')] for line in lines[:num_jobs]]
+    declared_score = float(lines[num_jobs]) if len(lines) > num_jobs else None
+    return slots, declared_score
+
+
+def parse_solution_json(data: dict, num_jobs: int) -> Tuple[List[List[int]], Optional[float]]:
+    '''
+    A solution as a JSON object: {"jobs": [[1, 2], null, ...], "score": ...} with the same content as the txt format
+    ("score" is optional, but a number if it is given).
+    '''
+    if not isinstance(data, dict):
+        raise ValueError(f"A solution must be a JSON object, got {type(data).__name__}")
+    jobs = data["jobs"]
+    if len(jobs) != num_jobs:
+        raise ValueError(f"Expected time slots for each of the {num_jobs} jobs, got {len(jobs)}")
+    slots = [[] if job_slots is None else [int(time_slot) for time_slot in job_slots] for job_slots in jobs]
+    declared_score = data.get("score")
+    if declared_score is not None and (isinstance(declared_score, bool) or not isinstance(declared_score, (int, float))):
+        raise ValueError(f"The score must be a number, got {declared_score!r}")
+    return slots, declared_score
+
+
+def read_solutions(source: str) -> Iterator[Tuple[str, str, str]]:
+    '''
+    Raw solutions as (name, format, text), without parsing them (parsing happens in check_solutions, possibly in a worker):
+    - a directory: every *.txt file in it (sorted by name)
+    - a glob pattern: every matching file, txt or json
+    - a .jsonl file, or "-" for stdin: one JSON solution per line (see parse_solution_json), named by its "name" or line number
+    - any other file: a single solution
+    '''
+    if source == "-" or source.endswith(".jsonl"):
+        stream = sys.stdin if source == "-" else open(source, 'r')
+        try:
+            for line_number, line in enumerate(stream, start=1):
+                if line.strip() != "":
+                    yield f"{source}:{line_number}", "json", line
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        return
+
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.txt")))
+    elif os.path.isfile(source):
+        paths = [source]
+    else:
+        paths = sorted(glob.glob(source))
+        if len(paths) == 0:
+            raise FileNotFoundError(f"No solutions found at {source}")
+    for path in paths:
+        with open(path, 'r') as f:
+            yield path, "json" if path.endswith(".json") else "txt", f.read()
+
+
+def check_solutions(schedule: Schedule, solutions: Iterable[Tuple[str, str, str]]) -> List[SolutionReport]:
+    '''
+    Validate and score a batch of raw solutions (see read_solutions) of the instance `schedule`.
+
+    All (solution, job, time slot) triples of the batch go into flat arrays, so the checks and the score are a few
+    vectorized operations over the whole batch instead of a Schedule per solution.
+    '''
+    parameters = schedule.job_parameters()
+    num_jobs, T = len(schedule.jobs), schedule.T
+
+    names, declared_scores, violations, parsed = [], [], [], []
+    solution_of, job_of, slot_of = [], [], []
+    for name, solution_format, text in solutions:
+        k = len(names)
+        names.append(name)
+        violations.append([])
+        try:
+            if solution_format == "json":
+                data = json.loads(text)
+                if isinstance(data, dict):
+                    names[k] = data.get("name", name)
+                slots, declared_score = parse_solution_json(data, num_jobs)
+            else:
+                slots, declared_score = parse_solution_txt(text, num_jobs)
+        except (ValueError, KeyError, TypeError) as error:
+            violations[k].append(f"Can not parse the solution: {error}")
+            declared_scores.append(None)
+            parsed.append(False)
+            continue
+        declared_scores.append(declared_score)
+        parsed.append(True)
+        for job_index, job_slots in enumerate(slots):
+            solution_of.extend([k] * len(job_slots))
+            job_of.extend([job_index] * len(job_slots))
+            slot_of.extend(job_slots)
+
+    num_solutions = len(names)
+    solution_of = np.array(solution_of, dtype=np.int64)
+    job_of = np.array(job_of, dtype=np.int64)
+    # the files are 1-based, internally time slots start at 0
+    slot_of = np.array(slot_of, dtype=np.int64) - 1
+
+    def report(mask: np.ndarray, message):
+        for k, job_index, t in zip(solution_of[mask].tolist(), job_of[mask].tolist(), slot_of[mask].tolist()):
+            violations[k].append(message(schedule.jobs[job_index], t))
+
+    # time slots outside of the horizon are reported and then ignored
+    in_range = (0 <= slot_of) & (slot_of < T)
+    report(~in_range, lambda job, t: f"Job {job.id}: time slot {t + 1} is outside of the horizon 1..{T}")
+    solution_of, job_of, slot_of = solution_of[in_range], job_of[in_range], slot_of[in_range]
+
+    report(slot_of < parameters["release_time"][job_of], lambda job, t: f"Job {job.id}: time slot {t + 1} is before its release time")
+
+    # a time slot that appears more than once in a solution
+    used, counts = np.unique(solution_of * T + slot_of, return_counts=True)
+    for k, t in zip((used[counts > 1] // T).tolist(), (used[counts > 1] % T).tolist()):
+        violations[k].append(f"Time slot {t + 1} is assigned more than once")
+
+    # number of time slots and last time slot of every (solution, job)
+    pair = solution_of * num_jobs + job_of
+    slot_count = np.bincount(pair, minlength=num_solutions * num_jobs).reshape(num_solutions, num_jobs)
+    last_slot = np.full(num_solutions * num_jobs, -1, dtype=np.int64)
+    np.maximum.at(last_slot, pair, slot_of)
+    last_slot = last_slot.reshape(num_solutions, num_jobs)
+
+    too_many = slot_count > parameters["processing_time"]
+    for k, job_index in zip(*np.nonzero(too_many)):
+        job = schedule.jobs[job_index]
+        violations[k].append(f"Job {job.id}: {slot_count[k, job_index]} time slots, but its processing time is {job.processing_time}")
+
+    # the score of every solution, like Schedule.score
+    completed = slot_count >= parameters["processing_time"]
+    score = np.where(completed, parameters["reward"], -parameters["drop_penalty"]).sum(axis=1)
+    tardiness = last_slot - parameters["deadline"]
+    late = completed & (tardiness > 0)
+    score -= np.where(late & parameters["linear"], parameters["slope"] * tardiness + parameters["intercept"], 0).sum(axis=1)
+    for job_index in np.nonzero(~parameters["linear"])[0].tolist():
+        penalty = schedule.jobs[job_index].penalty_function.evaluate_many(tardiness[:, job_index])
+        score -= np.where(late[:, job_index], penalty, 0)
+
+    # scores of instances with integer parameters stay integers, like Schedule.score
+    scores = [int(round(value)) if parameters["integral"] else value for value in score.tolist()]
+    return [
+        SolutionReport(names[k], violations[k], scores[k] if parsed[k] else None, declared_scores[k])
+        for k in range(num_solutions)
+    ]
+
+
+# the instance of the worker processes, set once by _init_worker
+_worker_schedule: Optional[Schedule] = None
+
+
+def _init_worker(schedule: Schedule):
+    global _worker_schedule
+    _worker_schedule = schedule
+
+
+def _check_in_worker(solutions: List[Tuple[str, str, str]]) -> List[SolutionReport]:
+    return check_solutions(_worker_schedule, solutions)
+
+
+def _chunks(items: Iterable, chunk_size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+
+def score_solutions(
+        schedule: Schedule,
+        solutions,
+        workers: int = 1,
+        chunk_size: int = 1000
+    ) -> Iterator[SolutionReport]:
+    '''
+    Validate and score solutions of one instance, yielding a SolutionReport per solution in input order.
+
+    `solutions` is a source for read_solutions (directory, glob, .jsonl file or "-") or an iterable of raw solutions.
+    Solutions are checked in chunks of chunk_size with check_solutions. With workers > 1 the chunks go to a process pool,
+    at most 2 chunks per worker are in flight, so a stream of solutions is never read into memory at once.
+    '''
+    if isinstance(solutions, str):
+        solutions = read_solutions(solutions)
+    chunks = _chunks(solutions, chunk_size)
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield from check_solutions(schedule, chunk)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=process_context(),
+        initializer=_init_worker,
+        initargs=(schedule,)
+    ) as pool:
+        in_flight: List[Future] = []
+        for chunk in chunks:
+            in_flight.append(pool.submit(_check_in_worker, chunk))
+            if len(in_flight) >= 2 * workers:
+                yield from in_flight.pop(0).result()
+        for future in in_flight:
+            yield from future.result()
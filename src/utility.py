@@ -2,9 +2,10 @@ import json
 from src.schedule import Schedule
 from src.penalty_function import PenaltyFunction
 from src.job import Job
+from src.loader import read_txt_columns, iter_json_document
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
-from typing import Optional
+from typing import IO, Iterator, List, Optional, Tuple
 from src.schedule import Schedule
 
 def load_jobs_from_input_file(file_path) -> Schedule:
@@ -24,65 +25,49 @@ def load_solution(solution: str, schedule: Schedule) -> Schedule:
         for time_slot in time_slots:
             if time_slot == 'null':
                 continue
-            schedule.schedule[int(time_slot) - 1] = schedule.jobs[job_id].id
-
-    for job in schedule.jobs:
-        if sum(1 for t, job_id in enumerate(schedule.schedule) if job_id == job.id) >= job.processing_time:
-            job.completed = True
+            # marks the job as completed once all its time slots are scheduled
+            schedule.assign(int(time_slot) - 1, schedule.jobs[job_id].id)
 
     return schedule
 
 def load_jobs_from_input_file_txt(file_path) -> Schedule:
-
+    '''
+    Load jobs from a txt input file: the number of jobs, then "release_time, deadline, processing_time, reward, drop_penalty"
+    per line. Release times are shifted to start at 0. The file is parsed in a single pass (see src.loader.read_txt_columns).
+    '''
     with open(file_path, 'r') as f:
-        lines = [line.strip() for line in f if line.strip() != ""]
-
-    # print(lines)
-    num_jobs = int(lines[0])
-    offset = 1
-    if len(lines[1].split(',')) < 2:
-        num_jobs = int(lines[1])
-        offset = 2
+        return read_txt_columns(f).to_schedule()
 
-    jobs = []
 
-    min_release_time = float('inf')
-    for i in range(num_jobs):
-        job_data = lines[i + offset].split(',')
-        release_time, deadline, processing_time, reward, drop_penalty = job_data
-        min_release_time = min(min_release_time, int(release_time))
 
-    assert min_release_time <= 1, f"Minimum release time must be less than or equal to 1, but got {min_release_time}"
-
-    for i in range(num_jobs):
-        job_data = lines[i + offset].split(',')
-        release_time, deadline, processing_time, reward, drop_penalty = job_data
-        penalty_function = PenaltyFunction(
-            function_type="linear",
-            parameters={
-                "slope": int(reward)+int(drop_penalty),
-                "intercept": int(reward)+int(drop_penalty)
-            }
-        )
-
-        job = Job(
-            id=i,
-            release_time=int(release_time) - min_release_time,
-            deadline=int(deadline),
-            processing_time=int(processing_time),
-            reward=int(reward),
-            drop_penalty=int(drop_penalty),
-            penalty_function=penalty_function
-        )
-        jobs.append(job)
-
-    schedule = Schedule(
-        jobs=jobs,
-        total_time_slots=max(job.deadline for job in jobs)
+def job_from_dict(job_data: dict) -> Job:
+    '''A job in the format of the "jobs" of a JSON input file (see load_jobs_from_input_file_json).'''
+    # Construct penalty function (pf)
+    pf_data = job_data["penalty_function"]
+    pf = PenaltyFunction(pf_data["function_type"], pf_data["parameters"])
+    return Job(
+        id=job_data["id"],
+        release_time=job_data["release_time"],
+        processing_time=job_data["processing_time"],
+        deadline=job_data["deadline"],
+        reward=job_data["reward"],
+        drop_penalty=job_data["drop_penalty"],
+        penalty_function=pf
     )
 
-    return schedule
 
+def read_arrivals(stream: IO[str]) -> Iterator[Tuple[int, List[Job]]]:
+    '''
+    Job arrivals for the streaming online scheduler, one JSON object per line: {"t": 3, "jobs": [...]},
+    the jobs that arrive at time slot t in the format of job_from_dict ("jobs" is optional, "release_time" defaults to t).
+    Lines are read one at a time, so the stream can be a live feed.
+    '''
+    for line in stream:
+        if line.strip() == "":
+            continue
+        data = json.loads(line)
+        t = data["t"]
+        yield t, [job_from_dict({"release_time": t, **job_data}) for job_data in data.get("jobs", [])]
 
 
 def load_jobs_from_input_file_json(file_path) -> Schedule:
@@ -112,41 +97,14 @@ def load_jobs_from_input_file_json(file_path) -> Schedule:
     ```
     total_time_slots denotes how many time slots we have. 
     time slot starts from 1 to total_time_slots, inclusive.
+    The file is parsed incrementally (see src.loader.iter_json_document), the jobs are created one by one as they are read,
+    so the document never has to be in memory as a whole. The horizon of the schedule is the latest deadline.
     '''
-
     with open(file_path, 'r') as f:
-        data = json.load(f)
-
-    jobs = {
-        "total_time_slots": data["total_time_slots"],
-        "job_instances": []
-    }
-
-
-    for job_data in data["jobs"]:
-        # Construct penalty function (pf)
-        pf_data = job_data["penalty_function"]
-        pf = PenaltyFunction(pf_data["function_type"], pf_data["parameters"])
-        # make sure each job's release time and deadline are within total_time_slots
-        # if not (1 <= job_data["release_time"] < job_data["deadline"] <= (data["total_time_slots"] + 1 )): # deadline itself is not schedulable
-            # raise ValueError(f"Job {job_data['id']} has illegal release time {job_data['release_time']} or deadline {job_data['deadline']}. total time slots: {data['total_time_slots']}.")
-        job_instance = Job(
-            id=job_data["id"],
-            release_time=job_data["release_time"],
-            processing_time=job_data["processing_time"],
-            deadline=job_data["deadline"],
-            reward=job_data["reward"],
-            drop_penalty=job_data["drop_penalty"],
-            penalty_function=pf
-        )
-        jobs["job_instances"].append(job_instance)
-
-    schedule = Schedule(
-        jobs=jobs['job_instances'],
-        total_time_slots=max(job.deadline for job in jobs['job_instances'])
-    )
-    
-    return schedule
+        jobs = [job_from_dict(job_data) for key, job_data in iter_json_document(f) if key == "job"]
+    if len(jobs) == 0:
+        raise ValueError(f"{file_path} has no jobs")
+    return Schedule(jobs=jobs, total_time_slots=max(job.deadline for job in jobs))
 
 
 def display_schedule(schedule: Schedule, figsize=(14, 8), show_plot=True):
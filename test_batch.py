@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from src.batch import find_instances, run_batch
+
+
+class TestBatch(unittest.TestCase):
+    def test_batch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            broken = os.path.join(directory, "broken.txt")
+            with open(broken, 'w') as f:
+                f.write("2\n1,2,3\n")
+            paths = ['tests/Job-3.txt', 'tests/Job-4.txt', broken, 'tests/Job-7.txt']
+            results = {result["file"]: result for result in run_batch(paths, workers=2, timeout=60)}
+
+        self.assertEqual(set(results.keys()), set(paths))
+        self.assertEqual([results[path]["score"] for path in paths if path != broken], [31, 37, 43])
+        self.assertEqual(results['tests/Job-7.txt']["search_status"], "optimal")
+        self.assertEqual(results['tests/Job-7.txt']["jobs"], [[4, 5, 6], [2, 3], [7, 8, 9, 10], [1], None])
+        # an instance that fails does not stop the others
+        self.assertEqual(results[broken]["status"], "error")
+
+    def test_timeout(self):
+        # the search on this instance runs for well over 20 seconds, the process is killed and the next instance still runs
+        from test_instances import generate_instance, write_instance
+        with tempfile.TemporaryDirectory() as directory:
+            slow = os.path.join(directory, "slow.json")
+            write_instance(generate_instance(40, 160, load_factor=1.5, window_tightness=0.5, penalty="per-timeslot", seed=0), slow)
+            results = list(run_batch([slow, 'tests/Job-3.txt'], timeout=3))
+        self.assertEqual([result["status"] for result in results], ["timeout", "ok"])
+
+    def test_nested_workers(self):
+        # the solver of an instance can start worker processes of its own
+        results = list(run_batch(['tests/Job-7.txt'], options={"workers": 2}, timeout=60))
+        self.assertEqual(results[0]["status"], "ok", results[0].get("error"))
+        self.assertEqual(results[0]["score"], 43)
+
+    def test_find_instances(self):
+        self.assertEqual(find_instances('tests/Job-*.txt'), [f'tests/Job-{i}.txt' for i in range(1, 8)])
+
+
+if __name__ == '__main__':
+    unittest.main()
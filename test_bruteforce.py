@@ -0,0 +1,47 @@
+import contextlib
+import io
+import unittest
+from src.utility import load_jobs_from_input_file
+from src.algorithms.bruteforce import BruteForceOffline
+from src.scheduler import Scheduler
+from test_instances import generate_random_instance
+
+
+class TestBruteForce(unittest.TestCase):
+    def test_matches_ours(self):
+        # both are exact, so the optimal scores must be the same
+        for i in [1, 2, 3, 4, 6, 7]:
+            exact = BruteForceOffline().schedule(load_jobs_from_input_file(f'tests/Job-{i}.txt'))
+            with contextlib.redirect_stderr(io.StringIO()):
+                ours = Scheduler('ours', 'offline').schedule(load_jobs_from_input_file(f'tests/Job-{i}.txt'))
+            self.assertEqual(exact.score(), ours.score())
+            self.assertEqual(exact.lower_bound, exact.score_rewritten())
+
+    def test_reference_schedule_5(self):
+        # the reference solution of Job-5 scores 3199, but it is not optimal
+        self.assertEqual(BruteForceOffline().schedule(load_jobs_from_input_file('tests/Job-5.txt')).score(), 3499)
+
+    def test_small_cache(self):
+        # evicted states are computed again, the result does not change
+        solver = BruteForceOffline(max_cache_size=1000)
+        self.assertEqual(solver.schedule(load_jobs_from_input_file('tests/Job-7.txt')).score(), 43)
+
+    def test_random_instances(self):
+        for seed in range(30):
+            for penalty in ["txt", "linear", "per-timeslot"]:
+                exact = BruteForceOffline().schedule(generate_random_instance(5, seed=seed, penalty=penalty))
+                with contextlib.redirect_stderr(io.StringIO()):
+                    ours = Scheduler('ours', 'offline', presolve_time=0.1).schedule(generate_random_instance(5, seed=seed, penalty=penalty))
+                self.assertAlmostEqual(exact.score(), ours.score())
+
+    def test_on_deadline_is_not_late(self):
+        # found by the fuzzer: the optimum finishes a job in its deadline time slot, the LP used to charge the intercept for it
+        for num_jobs, seed in [(5, 268753269), (6, 1616496809)]:
+            exact = BruteForceOffline().schedule(generate_random_instance(num_jobs, seed=seed, penalty="linear"))
+            with contextlib.redirect_stderr(io.StringIO()):
+                ours = Scheduler('ours', 'offline').schedule(generate_random_instance(num_jobs, seed=seed, penalty="linear"))
+            self.assertEqual(exact.score(), ours.score())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+def run_main(*args: str) -> subprocess.CompletedProcess:
+    '''Run main.py as from the command line (without a plot window).'''
+    return subprocess.run(
+        [sys.executable, "main.py", *args], capture_output=True, text=True, timeout=300,
+        env={**os.environ, "MPLBACKEND": "Agg", "PYTHONPATH": os.getcwd()}
+    )
+
+
+class TestCLI(unittest.TestCase):
+    def test_noprogress(self):
+        # only our offline algorithm has a progress bar, the flag is ignored by the other engines
+        with tempfile.TemporaryDirectory() as directory:
+            for name, setting in [("ours", "offline"), ("ours", "online"), ("bruteforce", "offline")]:
+                out = os.path.join(directory, f"{name}-{setting}.txt")
+                result = run_main("tests/Job-3.txt", name, setting, "--noprogress", f"--output_path={out}")
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertTrue(os.path.exists(out))
+
+    def test_anytime_limits(self):
+        result = run_main("tests/Job-3.txt", "ours", "offline", "--time_limit=10", "--node_limit=1000", "--noprogress", "--output_path=/dev/null")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        # the other engines have no limits: a clear error before anything is solved, also for a batch
+        for args in [("tests/Job-3.txt", "ours", "online", "--time_limit=1"), ("tests/Job-3.txt", "bruteforce", "offline", "--node_limit=100"),
+                     ("batch", "tests/Job-3.txt", "--name=bruteforce", "--gap_tolerance=0.1")]:
+            result = run_main(*args)
+            self.assertNotEqual(result.returncode, 0)
+            self.assertIn("only supported by ours offline", result.stderr)
+            self.assertNotIn("TypeError", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
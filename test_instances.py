@@ -0,0 +1,211 @@
+"""
+Random instances, and a fuzz harness that compares our offline algorithm with the exact (bruteforce) solver on them.
+
+Run with:
+```
+uv run python test_instances.py fuzz --num_instances=2000 --max_jobs=6
+uv run python test_instances.py generate instances/ --num_jobs=50 --num_time_slots=200 --count=10 --penalty=linear --format=json
+```
+"""
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import time
+
+from fire import Fire
+
+from src.job import Job
+from src.penalty_function import PenaltyFunction
+from src.schedule import Schedule
+from src.scheduler import Scheduler
+
+from typing import Optional
+
+
+def random_penalty_function(rng: random.Random, penalty: str, reward: int, drop_penalty: int) -> PenaltyFunction:
+    '''
+    - "txt": the push-back function of the txt input files, pushing a job back is never worth it
+    - "linear": a random linear function that allows a few time slots of tardiness
+    - "per-timeslot": a random step function that allows a few time slots of tardiness
+    '''
+    if penalty == "txt":
+        return PenaltyFunction("linear", {"slope": reward + drop_penalty, "intercept": reward + drop_penalty})
+    if penalty == "linear":
+        # t_i_asterisk = floor((reward - intercept) / slope)
+        return PenaltyFunction("linear", {"slope": rng.randint(1, max(1, reward // 2)), "intercept": rng.randint(0, reward)})
+    if penalty == "per-timeslot":
+        # non-decreasing steps, the last one above the reward (otherwise t_i_asterisk is not defined)
+        steps = rng.randint(2, 4)
+        values = sorted(rng.randint(0, reward) for _ in range(steps - 1)) + [reward + rng.randint(1, 10)]
+        return PenaltyFunction("per-timeslot", [[tardiness + 1, value] for tardiness, value in enumerate(values)])
+    raise ValueError(f"Penalty must be 'txt', 'linear' or 'per-timeslot'. Got {penalty}")
+
+
+def generate_random_instance(num_jobs: int, num_time_slots: Optional[int] = None, seed: int = 0, penalty: str = "txt") -> Schedule:
+    '''
+    A random instance with num_jobs jobs, the horizon is the latest deadline (like the input files) and at most num_time_slots.
+    The same seed always gives the same instance.
+    '''
+    rng = random.Random(seed)
+    if num_time_slots is None:
+        num_time_slots = 2 * num_jobs + 2
+
+    jobs = []
+    for i in range(num_jobs):
+        release_time = rng.randint(0, num_time_slots - 2)
+        deadline = rng.randint(release_time + 1, num_time_slots)
+        reward = rng.randint(1, 50)
+        drop_penalty = rng.randint(0, 30)
+        jobs.append(Job(
+            id=i,
+            release_time=release_time,
+            processing_time=rng.randint(1, min(4, deadline - release_time)),
+            deadline=deadline,
+            reward=reward,
+            drop_penalty=drop_penalty,
+            penalty_function=random_penalty_function(rng, penalty, reward, drop_penalty)
+        ))
+    return Schedule(jobs, max(job.deadline for job in jobs))
+
+
+def generate_instance(
+        num_jobs: int,
+        num_time_slots: int,
+        load_factor: float = 1.0,
+        window_tightness: float = 0.5,
+        penalty: str = "linear",
+        seed: int = 0
+    ) -> Schedule:
+    '''
+    A random instance for benchmarks, the same parameters and seed always give the same instance.
+    - load_factor: total processing time / num_time_slots (above 1 the machine is overloaded and jobs must be dropped)
+    - window_tightness: processing time / (deadline - release time) of every job, 1 leaves no slack at all
+    - penalty: see random_penalty_function, or "mixed" for a random mix of linear and per-timeslot functions
+    The first job is released at 0 (as the txt format requires) and the horizon is the latest deadline (at most num_time_slots).
+    '''
+    assert 0 < window_tightness <= 1, f"Window tightness must be in (0, 1]. Got {window_tightness}"
+    rng = random.Random(seed)
+    mean_processing_time = max(1.0, load_factor * num_time_slots / num_jobs)
+
+    jobs = []
+    for i in range(num_jobs):
+        processing_time = min(num_time_slots, max(1, round(rng.uniform(0.5, 1.5) * mean_processing_time)))
+        window = min(num_time_slots, max(processing_time, math.ceil(processing_time / window_tightness)))
+        release_time = 0 if i == 0 else rng.randint(0, num_time_slots - window)
+        reward = rng.randint(1, 50)
+        drop_penalty = rng.randint(0, 30)
+        job_penalty = rng.choice(["linear", "per-timeslot"]) if penalty == "mixed" else penalty
+        jobs.append(Job(
+            id=i,
+            release_time=release_time,
+            processing_time=processing_time,
+            deadline=release_time + window,
+            reward=reward,
+            drop_penalty=drop_penalty,
+            penalty_function=random_penalty_function(rng, job_penalty, reward, drop_penalty)
+        ))
+    return Schedule(jobs, max(job.deadline for job in jobs))
+
+
+def write_instance(schedule: Schedule, path: str):
+    '''
+    Write an instance in the input format of its extension, so that load_jobs_from_input_file gives it back:
+    - .txt: only for the push-back functions of the txt format (penalty "txt"), release times are written 1-based
+    - .json: any penalty functions
+    '''
+    if path.endswith('.json'):
+        data = {
+            "total_time_slots": schedule.T,
+            "jobs": [
+                {
+                    "id": job.id,
+                    "release_time": job.release_time,
+                    "processing_time": job.processing_time,
+                    "deadline": job.deadline,
+                    "reward": job.reward,
+                    "drop_penalty": job.drop_penalty,
+                    "penalty_function": {
+                        "function_type": job.penalty_function.function_type,
+                        "parameters": job.penalty_function.parameters
+                    }
+                }
+                for job in schedule.jobs
+            ]
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=4)
+    elif path.endswith('.txt'):
+        for job in schedule.jobs:
+            parameters = job.penalty_function.parameters
+            if job.penalty_function.function_type != "linear" or parameters["slope"] != job.reward + job.drop_penalty or parameters["intercept"] != job.reward + job.drop_penalty:
+                raise ValueError(f"The txt format only has the push-back functions of penalty 'txt', use json for job {job.id}")
+        assert min(job.release_time for job in schedule.jobs) == 0, "The txt format needs a job released at 0"
+        with open(path, 'w') as f:
+            f.write(f"{len(schedule.jobs)}\n")
+            for job in schedule.jobs:
+                f.write(f"{job.release_time + 1}, {job.deadline}, {job.processing_time}, {job.reward}, {job.drop_penalty}\n")
+    else:
+        raise ValueError(f"Unsupported file extension: {path}")
+
+
+def generate(
+        out_dir: str,
+        num_jobs: int = 20,
+        num_time_slots: int = 100,
+        load_factor: float = 1.0,
+        window_tightness: float = 0.5,
+        penalty: str = "linear",
+        count: int = 1,
+        seed: int = 0,
+        format: str = "json"
+    ):
+    '''Write `count` instances of generate_instance (seeds seed..seed+count-1) to out_dir.'''
+    os.makedirs(out_dir, exist_ok=True)
+    for instance_seed in range(seed, seed + count):
+        schedule = generate_instance(num_jobs, num_time_slots, load_factor, window_tightness, penalty, instance_seed)
+        name = f"n{num_jobs}_T{num_time_slots}_load{load_factor}_tight{window_tightness}_{penalty}_s{instance_seed}.{format}"
+        write_instance(schedule, os.path.join(out_dir, name))
+        print(os.path.join(out_dir, name))
+
+
+def fuzz(
+        num_instances: int = 1000,
+        min_jobs: int = 1,
+        max_jobs: int = 6,
+        penalties: str = "txt,linear,per-timeslot",
+        seed: int = 0,
+        verbose: bool = False
+    ) -> int:
+    '''
+    Solve random instances with our offline algorithm and with the exact solver and compare the optimal scores.
+    Prints every instance where they differ (with the seed to reproduce it) and returns the number of differences.
+    '''
+    penalties = penalties if isinstance(penalties, (tuple, list)) else penalties.split(',')
+    rng = random.Random(seed)
+    mismatches = 0
+    start_time = time.perf_counter()
+    for k in range(num_instances):
+        num_jobs = rng.randint(min_jobs, max_jobs)
+        penalty = penalties[k % len(penalties)]
+        instance_seed = rng.randrange(2**31)
+
+        exact = Scheduler('bruteforce', 'offline').schedule(generate_random_instance(num_jobs, seed=instance_seed, penalty=penalty))
+        # our algorithm reports its progress on stderr
+        with contextlib.redirect_stderr(io.StringIO()):
+            ours = Scheduler('ours', 'offline', presolve_time=0.1).schedule(generate_random_instance(num_jobs, seed=instance_seed, penalty=penalty))
+
+        if abs(exact.score() - ours.score()) > 1e-6:
+            mismatches += 1
+            print(f"generate_random_instance({num_jobs}, seed={instance_seed}, penalty='{penalty}'): exact {exact.score()}, ours {ours.score()}")
+        elif verbose:
+            print(f"generate_random_instance({num_jobs}, seed={instance_seed}, penalty='{penalty}'): {exact.score()}")
+
+    print(f"{num_instances} instances, {mismatches} mismatches in {time.perf_counter() - start_time:0.1f}s")
+    return mismatches
+
+
+if __name__ == "__main__":
+    Fire({"fuzz": fuzz, "generate": generate})
@@ -0,0 +1,68 @@
+import io
+import json
+import unittest
+from benchmarks.bench_loading import legacy_load_txt, legacy_load_json
+from src.loader import read_txt_columns, read_json_columns, iter_json_document, load_columns
+from src.utility import load_jobs_from_input_file
+
+
+def describe(job):
+    return (job.id, job.release_time, job.processing_time, job.deadline, job.reward, job.drop_penalty,
+            job.penalty_function.function_type, job.penalty_function.parameters, job.t_i_asterisk)
+
+
+class TestLoader(unittest.TestCase):
+    def test_same_as_legacy(self):
+        for path, legacy in [(f'tests/Job-{i}.txt', legacy_load_txt) for i in range(1, 6)] + [
+                ('example_inputs/input.txt', legacy_load_txt), ('example_inputs/input.json', legacy_load_json)]:
+            schedule, expected = load_jobs_from_input_file(path), legacy(path)
+            self.assertEqual(schedule.T, expected.T, path)
+            self.assertEqual([describe(job) for job in schedule.jobs], [describe(job) for job in expected.jobs], path)
+            self.assertEqual(schedule.score(), expected.score(), path)
+            # the columns give the same jobs
+            columns = load_columns(path)
+            self.assertEqual(len(columns), len(expected.jobs))
+            self.assertEqual(columns.T, expected.T)
+            self.assertEqual([describe(columns.job(i)) for i in range(len(columns))], [describe(job) for job in expected.jobs], path)
+
+    def test_txt(self):
+        # the number of jobs on a line of its own, blank lines and lines after the last job are ignored
+        text = "3\n2\n\n1, 4, 2, 10, 5\n3,6,1,7,0\n\n9, 9, 9, 9, 9\n"
+        for chunk_size in [1, 8, 1 << 20]:
+            columns = read_txt_columns(io.StringIO(text), chunk_size=chunk_size)
+            self.assertEqual(columns.release_time.tolist(), [0, 2])
+            self.assertEqual(columns.deadline.tolist(), [4, 6])
+            self.assertEqual(columns.processing_time.tolist(), [2, 1])
+            self.assertEqual(columns.penalty_function(0).parameters, {"slope": 15, "intercept": 15})
+            self.assertIsNone(columns.total_time_slots)
+
+        with self.assertRaises(ValueError):
+            read_txt_columns(io.StringIO("3\n1, 4, 2, 10, 5\n"))
+        with self.assertRaises(ValueError):
+            read_txt_columns(io.StringIO("1\n1, 4, 2, 10\n"))
+
+    def test_json_chunks(self):
+        with open('example_inputs/input.json') as f:
+            text = f.read()
+        data = json.loads(text)
+        # values split at every possible place between two chunks
+        for chunk_size in [1, 2, 3, 7, 64, 1 << 20]:
+            entries = list(iter_json_document(io.StringIO(text), chunk_size=chunk_size))
+            self.assertEqual([value for key, value in entries if key == "job"], data["jobs"])
+            self.assertEqual({key: value for key, value in entries if key != "job"}, {key: value for key, value in data.items() if key != "jobs"})
+
+        compact = json.dumps({"jobs": data["jobs"], "total_time_slots": 12345}, separators=(',', ':'))
+        for chunk_size in [1, 5, 1 << 20]:
+            columns = read_json_columns(io.StringIO(compact), chunk_size=chunk_size)
+            self.assertEqual(columns.ids, [job["id"] for job in data["jobs"]])
+            self.assertEqual(columns.deadline.tolist(), [job["deadline"] for job in data["jobs"]])
+            self.assertEqual(columns.total_time_slots, 12345)
+
+    def test_json_errors(self):
+        for text in ['', '[]', '{"jobs": [}', '{"jobs": [{"id": 1}', '{"jobs": [] "x": 1}', '{"jobs": []}']:
+            with self.assertRaises((ValueError, KeyError), msg=text):
+                read_json_columns(io.StringIO(text), chunk_size=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
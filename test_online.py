@@ -0,0 +1,93 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from src.utility import load_jobs_from_input_file
+from src.algorithms.ours_online import OurOnline
+from src.penalty_function import PenaltyFunction
+from src.job import Job
+from src.schedule import Schedule
+from test_instances import generate_random_instance
+from main import online
+
+
+def reference_online(schedule: Schedule) -> Schedule:
+    '''The decision rule of OurOnline checked against every job in every time slot, as it was before the OnlineEngine.'''
+    online = OurOnline()
+    for t in range(schedule.T):
+        candidates = schedule.schedulable_jobs(t)
+        if len(candidates) == 0:
+            continue
+        uis = sorted([(online.u_i(t, job), job) for job in candidates], key=lambda x: x[0])
+        schedule.assign(t, uis[0][1].id)
+    schedule.t = schedule.T
+    return schedule
+
+
+class TestOnline(unittest.TestCase):
+    def test_same_decisions_as_reference(self):
+        for i in range(1, 8):
+            expected = reference_online(load_jobs_from_input_file(f'tests/Job-{i}.txt'))
+            actual = OurOnline().schedule(load_jobs_from_input_file(f'tests/Job-{i}.txt'))
+            self.assertEqual(list(actual.schedule), list(expected.schedule))
+            self.assertEqual(actual.score(), expected.score())
+
+    def test_random_instances(self):
+        for seed in range(100):
+            num_jobs = random.Random(seed).randint(1, 40)
+            for penalty in ["txt", "linear", "per-timeslot"]:
+                expected = reference_online(generate_random_instance(num_jobs, seed=seed, penalty=penalty))
+                actual = OurOnline().schedule(generate_random_instance(num_jobs, seed=seed, penalty=penalty))
+                self.assertEqual(list(actual.schedule), list(expected.schedule), f"seed {seed}, {penalty}")
+
+    def test_late_linear_jobs_swap(self):
+        # two late jobs with linear penalties: the steeper one is preferred at first and loses priority later on
+        steep = Job("steep", 0, 3, 1, 10, 0, PenaltyFunction("linear", {"slope": 3, "intercept": 0}))
+        flat = Job("flat", 0, 3, 1, 7, 0, PenaltyFunction("linear", {"slope": 1, "intercept": 0}))
+        expected = reference_online(Schedule([steep, flat], 8))
+        actual = OurOnline().schedule(Schedule([steep, flat], 8))
+        self.assertEqual(list(actual.schedule), list(expected.schedule))
+
+    def test_stream_matches_schedule(self):
+        for seed in range(30):
+            for penalty in ["txt", "linear", "per-timeslot"]:
+                # ties go to the job that arrived first, which is the order of schedule.jobs if it is sorted by release time
+                instance = generate_random_instance(20, seed=seed, penalty=penalty)
+                expected = OurOnline().schedule(Schedule(sorted(instance.jobs, key=lambda job: job.release_time), instance.T))
+                schedule = generate_random_instance(20, seed=seed, penalty=penalty)
+                decisions = OurOnline().stream()
+                next(decisions)
+                actual = [decisions.send((t, [job for job in schedule.jobs if job.release_time == t])) for t in range(schedule.T)]
+                self.assertEqual(actual, list(expected.schedule), f"seed {seed}, {penalty}")
+
+    def test_stream_memory_is_bounded(self):
+        # a job arrives in every time slot, completed and expired jobs must be forgotten
+        rng = random.Random(0)
+        decisions = OurOnline().stream()
+        next(decisions)
+        engine = decisions.gi_frame.f_locals["engine"]
+        for t in range(20000):
+            slope = rng.choice([0, 1, 5])
+            job = Job(t, t, rng.randint(1, 3), t + rng.randint(2, 6), rng.randint(1, 20), 1,
+                      PenaltyFunction("linear", {"slope": slope, "intercept": 25 if slope == 0 else 0}))
+            decisions.send((t, [job]))
+            self.assertLess(len(engine), 100)
+            self.assertLess(len(engine.heap) + len(engine.events), 1000)
+
+    def test_online_command(self):
+        job = {"processing_time": 2, "deadline": 4, "reward": 10, "drop_penalty": 1,
+               "penalty_function": {"function_type": "linear", "parameters": {"slope": 1, "intercept": 0}}}
+        with tempfile.TemporaryDirectory() as directory:
+            arrivals, out = os.path.join(directory, "arrivals.ndjson"), os.path.join(directory, "decisions.ndjson")
+            with open(arrivals, 'w') as f:
+                f.write(json.dumps({"t": 0, "jobs": [{**job, "id": "a"}]}) + '\n')
+                f.write(json.dumps({"t": 5, "jobs": [{**job, "id": "b", "release_time": 6, "deadline": 9}]}) + '\n')
+            online(arrivals, out=out)
+            with open(out, 'r') as f:
+                decisions = [json.loads(line) for line in f]
+        self.assertEqual(decisions, [{"t": 0, "job": "a"}, {"t": 1, "job": "a"}, {"t": 6, "job": "b"}, {"t": 7, "job": "b"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
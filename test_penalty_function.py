@@ -0,0 +1,48 @@
+import random
+import unittest
+import numpy as np
+from src.penalty_function import PenaltyFunction
+from src.job import Job
+
+
+def scan(points, tardiness):
+    # the linear scan PenaltyFunction.evaluate used to do
+    penalty = 0
+    for point in points:
+        if tardiness >= point[0]:
+            penalty = point[1]
+        else:
+            break
+    return penalty
+
+
+class TestPenaltyFunction(unittest.TestCase):
+    def test_lookup_matches_scan(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            # times are not required to be sorted, the lookup must behave like the scan anyway
+            values = sorted(rng.randint(0, 20) for _ in range(rng.randint(1, 6)))
+            points = [[rng.randint(1, 10), value] for value in values]
+            penalty_function = PenaltyFunction("per-timeslot", points)
+            expected = [scan(points, tardiness) for tardiness in range(1, 15)]
+            self.assertEqual([penalty_function.evaluate(tardiness) for tardiness in range(1, 15)], expected)
+            self.assertEqual(penalty_function.evaluate_many(np.arange(1, 15)).tolist(), expected)
+            self.assertEqual(penalty_function.table(14).tolist(), [0] + expected)
+
+    def test_evaluate_many_linear(self):
+        penalty_function = PenaltyFunction("linear", {"slope": 2, "intercept": 3})
+        self.assertEqual(penalty_function.evaluate_many([-1, 0, 1, 4]).tolist(), [0, 0, 5, 11])
+
+    def test_t_i_asterisk(self):
+        job = Job(0, 0, 1, 5, 10, 0, PenaltyFunction("per-timeslot", [[1, 2], [3, 8], [6, 11]]))
+        # the penalty exceeds the reward from tardiness 6 on
+        self.assertEqual(job.t_i_asterisk, 5)
+        job = Job(0, 0, 1, 5, 10, 0, PenaltyFunction("linear", {"slope": 3, "intercept": 1}))
+        self.assertEqual(job.t_i_asterisk, 3)
+        # the penalty never exceeds the reward, Schedule sets t_i_asterisk to T
+        self.assertIsNone(Job(0, 0, 1, 5, 10, 0, PenaltyFunction("linear", {"slope": 0, "intercept": 1})).t_i_asterisk)
+        self.assertIsNone(Job(0, 0, 1, 5, 10, 0, PenaltyFunction("per-timeslot", [[1, 2]])).t_i_asterisk)
+
+
+if __name__ == '__main__':
+    unittest.main()
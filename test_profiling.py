@@ -0,0 +1,61 @@
+import os
+import pstats
+import tempfile
+import unittest
+from src.utility import load_jobs_from_input_file
+from src.scheduler import Scheduler
+from src.profiling import run_profiled, phase
+
+
+class TestProfiling(unittest.TestCase):
+    def solve(self, mode: str, out: str):
+        scheduler = Scheduler('ours', 'offline', progress=False, node_limit=300, decompose=False)
+        schedule = load_jobs_from_input_file('tests/Job-1.txt')
+        return run_profiled(lambda: scheduler.schedule(schedule), mode, out)
+
+    def test_cprofile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            out = os.path.join(directory, "solve.prof")
+            schedule, summary = self.solve("cprofile", out)
+            self.assertIsNotNone(schedule)
+            self.assertIn("search", summary)
+            # a profile per phase next to the combined one
+            self.assertTrue(all(os.path.exists(os.path.join(directory, f"solve.{name}.prof")) for name in ["setup", "search"]))
+            # the LP bounds (and the highspy calls in them) are not lost from the profile
+            functions = {function for _, _, function in pstats.Stats(out).stats}
+            self.assertIn("upper_bound_from_prefix", functions)
+
+        import highspy
+        self.assertNotIn("run", vars(highspy.Highs))
+
+    def test_sample(self):
+        with tempfile.TemporaryDirectory() as directory:
+            out = os.path.join(directory, "solve.folded")
+            self.solve("sample", out)
+            with open(out) as f:
+                lines = f.read().splitlines()
+        self.assertGreater(len(lines), 0)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(stack.startswith("solve"))
+            self.assertGreater(int(count), 0)
+        self.assertTrue(any(line.startswith("solve;search;") for line in lines))
+
+    def test_tracemalloc(self):
+        with tempfile.TemporaryDirectory() as directory:
+            out = os.path.join(directory, "memory.txt")
+            _, summary = self.solve("tracemalloc", out)
+            with open(out) as f:
+                report = f.read()
+        for key in ["Schedule.copy", "get_candidates", "LP builders", "Allocated at the end of search"]:
+            self.assertIn(key, report)
+
+    def test_phase_without_profiler(self):
+        with phase("search"):
+            pass
+        with self.assertRaises(ValueError):
+            run_profiled(lambda: None, "perf", "unused")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+import contextlib
+import io
+import json
+import random
+import unittest
+import numpy as np
+from src.utility import load_jobs_from_input_file
+from src.algorithms.our.search_node import SearchTree, SearchNode
+from src.algorithms.our.frontier import Frontier
+from src.algorithms.our.dominance import DominanceTable
+from src.algorithms.our.branch_and_bound import BranchAndBound
+from src.algorithms.our.get_lower_bound_by_greedy import greedy_completion
+from src.algorithms.our.local_search import LocalSearch
+from src.algorithms.our.decomposition import time_blocks
+from src.scheduler import Scheduler
+
+
+class TestSearchNode(unittest.TestCase):
+    def test_children_match_get_candidates(self):
+        # walking down the tree with SearchNodes must give the same schedules as Schedule.get_candidates
+        rng = random.Random(0)
+        for i in range(1, 8):
+            schedule = load_jobs_from_input_file(f'tests/Job-{i}.txt')
+            tree = SearchTree(schedule)
+            for _ in range(5):
+                node, candidate = tree.root(), schedule
+                while True:
+                    children, candidates = tree.children(node), candidate.get_candidates()
+                    self.assertEqual(len(children), len(candidates))
+                    if len(children) == 0:
+                        break
+                    k = rng.randrange(len(children))
+                    node, candidate = children[k], candidates[k]
+
+                    rebuilt = tree.to_schedule(node)
+                    self.assertEqual(rebuilt.schedule, candidate.schedule)
+                    self.assertEqual(node.score, candidate.score_rewritten())
+                    self.assertEqual(rebuilt.score(), candidate.score())
+
+    def test_frontier(self):
+        frontier = Frontier()
+        bounds = [(1, 5), (3, 4), (3, 9), (0, 7)]
+        for lower_bound, upper_bound in bounds:
+            node = SearchNode(None, -1, -1, None, 0)
+            node.lower_bound, node.upper_bound = lower_bound, upper_bound
+            frontier.push(node)
+
+        self.assertEqual(frontier.best_upper_bound(), 9)
+        # highest lower bound first, ties broken by the highest upper bound
+        popped = [frontier.pop() for _ in range(2)]
+        self.assertEqual([(node.lower_bound, node.upper_bound) for node in popped], [(3, 9), (3, 4)])
+        self.assertEqual(frontier.best_upper_bound(), 7)
+        self.assertEqual(len(frontier), 2)
+
+    def test_dominance_table(self):
+        # merging nodes with the same state must not change the optimum, only the number of expanded nodes
+        for i in [3, 4, 6, 7]:
+            searches = []
+            for dominance_table in [None, DominanceTable(), DominanceTable(max_size=10)]:
+                search = BranchAndBound(load_jobs_from_input_file(f'tests/Job-{i}.txt'), dominance_table=dominance_table)
+                search.start()
+                search.run()
+                searches.append(search)
+            without_table, with_table, small_table = searches
+            self.assertEqual(without_table.best_schedule().score(), with_table.best_schedule().score(), f"Job-{i}")
+            self.assertEqual(without_table.best_schedule().score(), small_table.best_schedule().score(), f"Job-{i}")
+            self.assertLessEqual(with_table.expanded, without_table.expanded)
+            self.assertLessEqual(len(small_table.dominance_table), 10)
+
+    def test_dominance_table_lru(self):
+        table = DominanceTable(max_size=2)
+        nodes = []
+        for t in range(3):
+            node = SearchNode(None, -1, t, np.array([1, 2], dtype=np.int32), 5)
+            node.upper_bound = 8
+            nodes.append(node)
+        table.store(nodes[0])
+        table.store(nodes[1])
+        # using the first state makes the second one the least recently used
+        self.assertEqual(table.lookup(nodes[0]), (5, 3))
+        table.store(nodes[2])
+        self.assertIsNotNone(table.lookup(nodes[0]))
+        self.assertIsNone(table.lookup(nodes[1]))
+        self.assertEqual(table.evictions, 1)
+
+        # same state, lower score: dominated
+        worse = SearchNode(None, -1, 0, np.array([1, 2], dtype=np.int32), 4)
+        self.assertTrue(table.is_dominated(worse))
+        self.assertFalse(table.is_strictly_dominated(nodes[0]))
+
+    def test_greedy_completion(self):
+        # the score returned by the greedy heuristic must be the score of the schedule it builds
+        rng = random.Random(0)
+        for i in range(1, 8):
+            schedule = load_jobs_from_input_file(f'tests/Job-{i}.txt')
+            tree = SearchTree(schedule)
+            node = tree.root()
+            while True:
+                for rule in ["edf", "wsrt"]:
+                    score, jobs = greedy_completion(tree, node, rule)
+                    self.assertEqual(len(jobs), tree.T - 1 - node.t)
+                    completed = tree.to_schedule(tree.extend(node, jobs))
+                    self.assertEqual(completed.score_rewritten(), score, f"Job-{i} with {rule}")
+                children = tree.children(node)
+                if len(children) == 0:
+                    break
+                node = children[rng.randrange(len(children))]
+
+    def test_local_search(self):
+        # local search never makes the schedule worse, and its score is the score of the schedule it returns
+        for i in range(1, 8):
+            schedule = load_jobs_from_input_file(f'tests/Job-{i}.txt')
+            tree = SearchTree(schedule)
+            root = tree.root()
+            for rule in ["edf", "wsrt"]:
+                greedy_score, jobs = greedy_completion(tree, root, rule)
+                score, jobs = LocalSearch(tree, root, jobs).run()
+                self.assertGreaterEqual(score, greedy_score)
+                self.assertEqual(tree.to_schedule(tree.extend(root, jobs)).score_rewritten(), score, f"Job-{i} with {rule}")
+
+        # Job-2: earliest deadline first gives -10, local search finds the optimum
+        schedule = load_jobs_from_input_file('tests/Job-2.txt')
+        tree = SearchTree(schedule)
+        score, jobs = LocalSearch(tree, tree.root(), greedy_completion(tree, tree.root(), "edf")[1]).run()
+        self.assertEqual(tree.to_schedule(tree.extend(tree.root(), jobs)).score(), 165)
+
+    def test_anytime(self):
+        # with a node limit we get the best schedule so far and a proven upper bound
+        scheduler = Scheduler('ours', 'offline', node_limit=20, presolve_time=0)
+        schedule = scheduler.schedule(load_jobs_from_input_file('tests/Job-1.txt'))
+        self.assertEqual(scheduler.stats.status, "node_limit")
+        self.assertEqual(scheduler.stats.incumbent, schedule.score())
+        self.assertGreaterEqual(scheduler.stats.upper_bound, 177)
+        self.assertLessEqual(schedule.score(), 177)
+
+        # the gap tolerance stops the search as soon as the gap is small enough
+        scheduler = Scheduler('ours', 'offline', gap_tolerance=0.5)
+        scheduler.schedule(load_jobs_from_input_file('tests/Job-7.txt'))
+        self.assertIn(scheduler.stats.status, ["gap_tolerance", "optimal"])
+        self.assertLessEqual(scheduler.stats.relative_gap, 0.5)
+
+        # the incumbents only get better, and the last one is optimal
+        solver = Scheduler('ours', 'offline', greedy=False, presolve_time=0).solver
+        scores = [schedule.score() for schedule in solver.incumbents(load_jobs_from_input_file('tests/Job-7.txt'))]
+        self.assertEqual(scores, sorted(scores))
+        self.assertEqual(scores[-1], 43)
+        self.assertTrue(solver.stats.optimal)
+        self.assertEqual(solver.stats.gap, 0)
+
+    def test_parallel_bounds(self):
+        # computing the bounds of the children in a pool must not change the result
+        for executor in ["process", "thread"]:
+            for i in [3, 4, 6, 7]:
+                serial = Scheduler('ours', 'offline').schedule(load_jobs_from_input_file(f'tests/Job-{i}.txt'))
+                parallel = Scheduler('ours', 'offline', workers=2, executor=executor).schedule(load_jobs_from_input_file(f'tests/Job-{i}.txt'))
+                self.assertEqual(serial.score(), parallel.score(), f"Job-{i} with {executor} pool")
+
+    def test_parallel_tree_search(self):
+        # the workers explore different subtrees, but the result must still be optimal
+        for i in [3, 4, 6, 7]:
+            serial = Scheduler('ours', 'offline').schedule(load_jobs_from_input_file(f'tests/Job-{i}.txt'))
+            parallel = Scheduler('ours', 'offline', workers=2, parallel="tree", max_expansions_per_task=5).schedule(load_jobs_from_input_file(f'tests/Job-{i}.txt'))
+            self.assertEqual(serial.score(), parallel.score(), f"Job-{i}")
+
+        # in the deterministic mode two runs give the same schedule
+        runs = [
+            Scheduler('ours', 'offline', workers=2, parallel="tree", deterministic=True, max_expansions_per_task=5).schedule(load_jobs_from_input_file('tests/Job-7.txt'))
+            for _ in range(2)
+        ]
+        self.assertEqual(runs[0].schedule, runs[1].schedule)
+        self.assertEqual(runs[0].score(), 43)
+
+    def test_decomposition(self):
+        # Job-5 consists of 6 clusters of jobs, searching them one by one expands far fewer nodes
+        schedule = load_jobs_from_input_file('tests/Job-5.txt')
+        blocks = time_blocks(schedule)
+        self.assertEqual([(block.start, block.end) for block in blocks], [(0, 4), (4, 6), (6, 9), (9, 12), (12, 15), (15, 18)])
+        self.assertEqual(sorted(job_index for block in blocks for job_index in block.jobs), list(range(len(schedule.jobs))))
+
+        whole = Scheduler('ours', 'offline', decompose=False)
+        whole_schedule = whole.schedule(load_jobs_from_input_file('tests/Job-5.txt'))
+        for workers in [1, 2]:
+            decomposed = Scheduler('ours', 'offline', workers=workers)
+            decomposed_schedule = decomposed.schedule(load_jobs_from_input_file('tests/Job-5.txt'))
+            self.assertEqual(decomposed_schedule.score(), whole_schedule.score())
+            self.assertEqual(decomposed.stats.incumbent, decomposed_schedule.score())
+            self.assertTrue(decomposed.stats.optimal)
+            self.assertLess(decomposed.stats.expanded, whole.stats.expanded)
+
+
+    def test_stats(self):
+        # the counters of the search add up, the timeline ends at the result and the stats come with the schedule
+        for options in [{"decompose": False}, {"decompose": True}, {"workers": 2, "parallel": "tree", "max_expansions_per_task": 5}]:
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                schedule = Scheduler('ours', 'offline', progress=False, **options).schedule(load_jobs_from_input_file('tests/Job-5.txt'))
+            self.assertEqual(stderr.getvalue(), "")
+            stats = schedule.stats
+            self.assertEqual(stats.pruned, stats.pruned_by["bound"] + stats.pruned_by["stale"])
+            self.assertEqual(stats.dominated, stats.pruned_by["dominated"] + stats.pruned_by["dominated_later"])
+            self.assertGreaterEqual(stats.created, stats.expanded)
+            self.assertGreater(stats.frontier_peak, 0)
+            self.assertGreater(stats.timings["upper_bound"], 0)
+            scores = [score for _, score, _ in stats.timeline]
+            self.assertEqual(scores, sorted(scores))
+            self.assertEqual(scores[-1], schedule.score())
+            data = json.loads(stats.to_json())
+            self.assertEqual(data["incumbent"], schedule.score())
+            self.assertEqual(len(data["timeline"]), len(stats.timeline))
+
+if __name__ == '__main__':
+    unittest.main()
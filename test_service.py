@@ -0,0 +1,66 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from src.service import DecisionService, start_server, load_test, _connect, _request
+
+JOB = {"processing_time": 2, "deadline": 4, "reward": 10, "drop_penalty": 1,
+       "penalty_function": {"function_type": "linear", "parameters": {"slope": 1, "intercept": 0}}}
+
+
+class TestService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket = os.path.join(self.directory.name, "decisions.sock")
+        self.server = await start_server(DecisionService(), unix=self.socket)
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.directory.cleanup()
+
+    async def test_protocol(self):
+        reader, writer = await _connect(self.socket, None, None)
+        try:
+            self.assertEqual(await _request(reader, writer, {"op": "submit", "jobs": [{**JOB, "id": "a"}, {**JOB, "id": "b", "reward": 20}]}), {"ok": True, "submitted": 2})
+            decisions = [await _request(reader, writer, {"op": "decide"}) for _ in range(5)]
+            self.assertEqual([decision["job"] for decision in decisions], ["a", "a", "b", "b", None])
+            self.assertEqual([decision["t"] for decision in decisions], [0, 1, 2, 3, 4])
+
+            # errors do not close the connection
+            self.assertFalse((await _request(reader, writer, {"op": "decide", "t": 2}))["ok"])
+            self.assertFalse((await _request(reader, writer, {"op": "unknown"}))["ok"])
+            stats = await _request(reader, writer, {"op": "stats"})
+            self.assertEqual(stats["decisions"], 5)
+            self.assertEqual(stats["requests"], 9)
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+        finally:
+            writer.close()
+
+    async def test_invalid_jobs(self):
+        service = DecisionService()
+        for job in [{**JOB, "id": "a", "processing_time": 0}, {**JOB, "id": "a", "release_time": 4}, {**JOB, "id": "a", "deadline": "4"}, [1, 2]]:
+            response = service.handle(json.dumps({"op": "submit", "jobs": [{**JOB, "id": "ok"}, job]}))
+            self.assertFalse(response["ok"], job)
+        # nothing of a rejected request was taken
+        self.assertEqual(service.handle(json.dumps({"op": "decide"})), {"ok": True, "t": 0, "job": None})
+
+        # a scheduler that fails is restarted, the next decisions work again
+        def failing():
+            yield
+            raise ZeroDivisionError("division by zero")
+        service.decisions = failing()
+        next(service.decisions)
+        self.assertFalse(service.handle(json.dumps({"op": "decide"}))["ok"])
+        service.handle(json.dumps({"op": "submit", "jobs": [{**JOB, "id": "b", "deadline": 10}]}))
+        self.assertEqual(service.handle(json.dumps({"op": "decide"})), {"ok": True, "t": 2, "job": "b"})
+
+    async def test_load_test(self):
+        result = await load_test(unix=self.socket, clients=4, requests=200)
+        self.assertEqual(result["requests"], 800)
+        self.assertEqual(result["server"]["decisions"], 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
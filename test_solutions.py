@@ -0,0 +1,50 @@
+import json
+import unittest
+from src.utility import load_jobs_from_input_file, load_solution
+from src.solutions import check_solutions, read_solutions, score_solutions
+
+
+class TestSolutions(unittest.TestCase):
+    def test_reference_solutions(self):
+        # the reference solutions are valid and score like load_solution + Schedule.score
+        for i in range(1, 8):
+            schedule = load_jobs_from_input_file(f'tests/Job-{i}.txt')
+            report, = score_solutions(schedule, f'tests/Schedule-{i}.txt')
+            self.assertTrue(report.valid, report.violations)
+            self.assertEqual(report.score, load_solution(f'tests/Schedule-{i}.txt', schedule.copy()).score())
+            self.assertEqual(report.score, report.declared_score)
+
+    def test_violations(self):
+        schedule = load_jobs_from_input_file('tests/Job-7.txt')
+        solutions = [
+            ("conflict", "txt", "2, 5, 6\n2, 4\n7, 8, 9, 10\n1\nnull\n"),
+            ("release", "txt", "2, 6, 7\n3, 4\n5, 8, 9, 10\n1\nnull\n"),
+            ("too many", "txt", "2, 5, 6, 11\n3, 4\n7, 8, 9, 10\n1\n12\n"),
+            ("missing lines", "txt", "2, 5, 6\n"),
+            ("valid", "json", json.dumps({"jobs": [[2, 5, 6], [3, 4], [7, 8, 9, 10], [1], None]})),
+            # valid JSON that is not a solution object, a score that is not a number
+            ("array", "json", "[1, 2]"),
+            ("number", "json", "3"),
+            ("score", "json", json.dumps({"jobs": [[2, 5, 6], [3, 4], [7, 8, 9, 10], [1], None], "score": "43"})),
+        ]
+        reports = check_solutions(schedule, solutions)
+        self.assertEqual([report.name for report in reports], [name for name, _, _ in solutions])
+        self.assertEqual([report.valid for report in reports], [False, False, False, False, True, False, False, False])
+        self.assertTrue(all(report.score is None and report.declared_score is None for report in reports[5:]))
+        self.assertIn("Time slot 2 is assigned more than once", reports[0].violations)
+        self.assertTrue(any("before its release time" in violation for violation in reports[1].violations))
+        self.assertTrue(any("outside of the horizon" in violation for violation in reports[2].violations))
+        self.assertIsNone(reports[3].score)
+        self.assertEqual(reports[4].score, 43)
+
+    def test_workers(self):
+        # the process pool gives the same reports, in the same order
+        schedule = load_jobs_from_input_file('tests/Job-1.txt')
+        solutions = list(read_solutions('tests/Schedule-*.txt')) * 3
+        expected = [report.to_dict() for report in score_solutions(schedule, solutions)]
+        reports = [report.to_dict() for report in score_solutions(schedule, solutions, workers=2, chunk_size=4)]
+        self.assertEqual(reports, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from src.job import Job
+from src.penalty_function import PenaltyFunction
+from src.schedule import Schedule
+from src.utility import load_jobs_from_input_file
+from src.algorithms.our.get_upper_bound_by_LP import get_upper_bound_by_LP, LPBoundModel, highspy, build_LP_intervals, build_LP_linear
+from src.algorithms.bruteforce import BruteForceOffline
+from test_instances import generate_random_instance
+
+
+class TestUpperBound(unittest.TestCase):
+    def test_root_bounds(self):
+        # upper bounds of the empty schedule, as computed by the original dense formulation
+        expected = {1: 359.5, 2: 509.16666666666663, 3: 44.0, 4: 52.0, 5: 31460.0, 6: 49.0, 7: 79.5}
+        for i, upper_bound in expected.items():
+            schedule = load_jobs_from_input_file(f'tests/Job-{i}.txt')
+            self.assertAlmostEqual(get_upper_bound_by_LP(schedule), upper_bound, msg=f"Job-{i}")
+
+    def test_partial_bounds(self):
+        # partial schedules: the prefix up to schedule.t is fixed in the LP
+        schedule = load_jobs_from_input_file('tests/Job-1.txt')
+        schedule.schedule[:12] = [12, 0, 7, 12, 7, 7, 8, 8, 8, 2, 10, 3]
+        schedule.t = 11
+        self.assertAlmostEqual(get_upper_bound_by_LP(schedule), 249.66666666666666)
+
+        schedule = load_jobs_from_input_file('tests/Job-5.txt')
+        schedule.schedule[:9] = [0, 2, 4, 3, 5, 5, 9, 8, 7]
+        schedule.t = 8
+        self.assertAlmostEqual(get_upper_bound_by_LP(schedule), 29080.0)
+
+    def test_bound_model(self):
+        # the persistent model only changes the bounds, it must agree with building the LP from scratch
+        schedule = load_jobs_from_input_file('tests/Job-2.txt')
+        backends = [False, True] if highspy is not None else [False]
+        for use_highspy in backends:
+            bound_model = LPBoundModel(schedule, use_highspy=use_highspy)
+            node = schedule
+            while node.t < node.T - 1:
+                self.assertAlmostEqual(bound_model.upper_bound(node, basis=bound_model.basis), get_upper_bound_by_LP(node))
+                node = node.get_candidates()[-1]
+
+    def test_per_timeslot(self):
+        job = Job(
+            id="job1", release_time=0, processing_time=2, deadline=2, reward=10, drop_penalty=1,
+            penalty_function=PenaltyFunction("per-timeslot", [[1, 3], [2, 20]])
+        )
+        schedule = Schedule([job], total_time_slots=2)
+        self.assertAlmostEqual(get_upper_bound_by_LP(schedule), 11.0)
+
+    def test_intervals(self):
+        # on the test instances, the interval formulation gives the same bounds with fewer variables
+        for i in range(1, 8):
+            schedule = load_jobs_from_input_file(f'tests/Job-{i}.txt')
+            self.assertAlmostEqual(get_upper_bound_by_LP(schedule, "intervals"), get_upper_bound_by_LP(schedule), msg=f"Job-{i}")
+            self.assertLess(len(build_LP_intervals(schedule)[0]), len(build_LP_linear(schedule)[0]))
+
+        schedule = load_jobs_from_input_file('tests/Job-1.txt')
+        schedule.schedule[:12] = [12, 0, 7, 12, 7, 7, 8, 8, 8, 2, 10, 3]
+        schedule.t = 11
+        self.assertAlmostEqual(get_upper_bound_by_LP(schedule, "intervals"), 249.66666666666666)
+
+    def test_intervals_are_upper_bounds(self):
+        # for every prefix of an optimal schedule, the bound is at least the optimum
+        for seed in range(20):
+            for penalty in ["txt", "linear", "per-timeslot"]:
+                optimal = BruteForceOffline().schedule(generate_random_instance(5, seed=seed, penalty=penalty))
+                for t in range(-1, optimal.T, 3):
+                    schedule = generate_random_instance(5, seed=seed, penalty=penalty)
+                    slots = optimal.slots.copy()
+                    slots[t + 1:] = -1
+                    schedule.set_slots(slots)
+                    schedule.t = t
+                    upper_bound = get_upper_bound_by_LP(schedule, "intervals")
+                    self.assertGreaterEqual(upper_bound, optimal.score_rewritten() - 1e-6, f"seed {seed}, {penalty}, t {t}")
+
+
+if __name__ == '__main__':
+    unittest.main()